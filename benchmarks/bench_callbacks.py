@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Measures the throughput of connecting, emitting to and disconnecting from a
+projex.callbacks.CallbackSet with increasing numbers of slots.  Emit
+throughput is measured in slot calls per second, so it is comparable between
+the slot counts.
+
+:usage      |python benchmarks/bench_callbacks.py --counts 1,100,10000
+"""
+
+import optparse
+import os
+import sys
+import time
+
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from projex.callbacks import CallbackSet
+
+
+class Slot(object):
+    def method(self, value):
+        pass
+
+
+def benchmark(counts=(1, 10, 100, 1000, 10000), emits=100):
+    """
+    Connects, emits to and disconnects bound method slots for each of the
+    inputted numbers of slots.
+
+    :param      counts | [<int>, ..] | numbers of slots to connect
+                emits  | <int> | number of emits per slot count
+
+    :return     {<int> count: {<str> name: <float> per second, ..}, ..}
+    """
+    results = OrderedDict()
+    for count in counts:
+        callbacks = CallbackSet()
+        slots = [Slot() for _ in xrange(count)]
+
+        start = time.time()
+        for slot in slots:
+            callbacks.connect('signal', slot.method)
+        connect = time.time() - start
+
+        start = time.time()
+        for _ in xrange(emits):
+            callbacks.emit('signal', 1)
+        emit = time.time() - start
+
+        start = time.time()
+        for slot in slots:
+            callbacks.disconnect('signal', slot.method)
+        disconnect = time.time() - start
+
+        results[count] = OrderedDict([
+            ('connect', count / max(connect, 1e-9)),
+            ('emit', count * emits / max(emit, 1e-9)),
+            ('disconnect', count / max(disconnect, 1e-9))
+        ])
+        print ('{0:>6} slots: connect {1:>12,.0f}/s  emit {2:>12,.0f} calls/s  '
+               'disconnect {3:>12,.0f}/s'.format(count, *results[count].values()))
+
+    return results
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-c', '--counts', default='1,10,100,1000,10000',
+                      help='comma separated numbers of slots to connect')
+    parser.add_option('-e', '--emits', type='int', default=100,
+                      help='number of emits per slot count')
+
+    options, args = parser.parse_args(argv)
+
+    try:
+        counts = [int(x) for x in options.counts.split(',')]
+    except ValueError:
+        parser.error('invalid slot counts: {0}'.format(options.counts))
+
+    benchmark(counts, options.emits)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+Measures the throughput of the projex.security file encryption functions, in
+MB/s, on a temporary file of random data.  The original implementation, which
+padded and encrypted each chunk of the file separately, is measured alongside
+the FileCipher based functions as the point of comparison.
+
+:usage      |python benchmarks/bench_security.py --size 64
+"""
+
+import optparse
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from projex import security
+
+try:
+    from Crypto.Cipher import AES
+    from Crypto import Random
+except ImportError:
+    AES = None
+
+
+# ----------------------------------------------------------------------
+#                         BASELINE IMPLEMENTATION
+# ----------------------------------------------------------------------
+
+def baseline_decryptfile(filename, key=None, outfile=None, chunk=64 * 1024):
+    """
+    Decrypts a file written by the baseline_encryptfile function.
+
+    :param      filename | <str>
+                key      | <str>
+                outfile  | <str> || None
+                chunk    | <int>
+    """
+    if key is None:
+        key = security.ENCRYPT_KEY
+
+    if not outfile:
+        outfile = os.path.splitext(filename)[0]
+
+    with open(filename, 'rb') as input:
+        origsize = struct.unpack('<Q', input.read(struct.calcsize('Q')))[0]
+        iv = input.read(16)
+        cipher = AES.new(key, AES.MODE_CBC, iv)
+
+        with open(outfile, 'wb') as output:
+            while True:
+                data = input.read(chunk)
+                if len(data) == 0:
+                    break
+
+                data = cipher.decrypt(data)
+                data = security.unpad(data)
+                output.write(data)
+                output.truncate(origsize)
+
+
+def baseline_encryptfile(filename, key=None, outfile=None, chunk=64 * 1024):
+    """
+    Encrypts a file the way the security module originally did, padding each
+    chunk of the file separately.  The read chunk size must match the size the
+    file was encrypted with plus its padding, so files are only readable by
+    the baseline_decryptfile function with the padded chunk size.
+
+    :param      filename | <str>
+                key      | <str>
+                outfile  | <str> || None
+                chunk    | <int>
+    """
+    if key is None:
+        key = security.ENCRYPT_KEY
+
+    if not outfile:
+        outfile = filename + '.enc'
+
+    iv = Random.new().read(16)
+    cipher = AES.new(key, AES.MODE_CBC, iv)
+    filesize = os.path.getsize(filename)
+
+    with open(filename, 'rb') as input:
+        with open(outfile, 'wb') as output:
+            output.write(struct.pack('<Q', filesize))
+            output.write(iv)
+
+            while True:
+                data = input.read(chunk)
+                if len(data) == 0:
+                    break
+
+                data = security.pad(data, len(key))
+                output.write(cipher.encrypt(data))
+
+
+# ----------------------------------------------------------------------
+#                               BENCHMARK
+# ----------------------------------------------------------------------
+
+def benchmark(size=32 * 1024 * 1024, key=None, workers=None):
+    """
+    Runs each of the encryption functions on a temporary file of random data.
+
+    :param      size    | <int> | bytes of data to encrypt
+                key     | <str> || None
+                workers | <int> || None | workers for the segmented functions
+
+    :return     {<str> name: <float> MB/s, ..}
+    """
+    if key is None:
+        key = security.ENCRYPT_KEY
+
+    # the baseline pads every chunk, so it must read back the padded size
+    chunk = 64 * 1024
+    padded = chunk + len(key)
+
+    tempdir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(tempdir, 'data')
+        encfile = source + '.enc'
+        decfile = source + '.dec'
+
+        with open(source, 'wb') as f:
+            remaining = size
+            while remaining > 0:
+                block = os.urandom(min(remaining, 1024 * 1024))
+                f.write(block)
+                remaining -= len(block)
+
+        tests = [
+            ('baseline encryptfile',
+             lambda: baseline_encryptfile(source, key, encfile, chunk)),
+            ('baseline decryptfile',
+             lambda: baseline_decryptfile(encfile, key, decfile, padded)),
+            ('encryptfile',
+             lambda: security.encryptfile(source, key, encfile)),
+            ('decryptfile',
+             lambda: security.decryptfile(encfile, key, decfile)),
+            ('encryptfile (authenticated)',
+             lambda: security.encryptfile(source, key, encfile, authenticate=True)),
+            ('decryptfile (authenticated)',
+             lambda: security.decryptfile(encfile, key, decfile, authenticate=True)),
+            ('encryptsegments',
+             lambda: security.encryptsegments(source, key, encfile, workers=workers)),
+            ('decryptsegments',
+             lambda: security.decryptsegments(encfile, key, decfile, workers=workers))
+        ]
+
+        results = OrderedDict()
+        for name, func in tests:
+            start = time.time()
+            func()
+            elapsed = max(time.time() - start, 1e-6)
+
+            # make sure each decryption round trips the source data
+            if name.startswith(('baseline decrypt', 'decrypt')):
+                with open(source, 'rb') as a, open(decfile, 'rb') as b:
+                    if a.read() != b.read():
+                        raise AssertionError('{0} did not round trip'.format(name))
+
+            results[name] = size / elapsed / (1024 * 1024)
+            print '{0:<30} {1:>10.1f} MB/s'.format(name, results[name])
+
+        return results
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-s', '--size', type='int', default=32,
+                      help='megabytes of data to encrypt')
+    parser.add_option('-w', '--workers', type='int', default=None,
+                      help='workers for the segmented functions')
+
+    options, args = parser.parse_args(argv)
+
+    if AES is None:
+        parser.error('the PyCrypto module is required to run this benchmark')
+
+    benchmark(options.size * 1024 * 1024, workers=options.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,46 +1,205 @@
 """ Generic signal/slot callback system. """
 
+import heapq
 import inspect
+import itertools
 import logging
+import threading
+import time
 import weakref
 
+from collections import OrderedDict
+from projex.enum import enum
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
 logger = logging.getLogger(__name__)
 
+DeliveryMode = enum('Direct', 'Queued', 'Async')
+
+
+def _deliver(callbacks, args):
+    """
+    Calls each of the inputted callbacks with the given arguments, logging
+    any errors that occur.
+
+    :param      callbacks | [<Callback>, ..]
+                args      | <tuple>
+    """
+    for callback in callbacks:
+        try:
+            callback(*args)
+        except StandardError:
+            logger.exception('Error occurred during callback.')
+
+
+class CallbackQueue(object):
+    """
+    Pool of worker threads that delivers queued callbacks off of the emitting
+    thread.  Emits for the same signal that arrive before their delivery has
+    started are coalesced, so only the latest arguments are delivered, and
+    deliveries for a single signal never run concurrently.  Signals are
+    scheduled by the time they are due, so a signal held for its coalescing
+    window never keeps a worker from delivering one that is already due.
+
+    :param      workers | <int> | number of delivery threads
+                window  | <float> | seconds to hold a signal for coalescing
+    """
+    def __init__(self, workers=4, window=0):
+        self._workers = workers
+        self._window = window
+        self._threads = []
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._schedule = []
+        self._order = itertools.count()
+        self._pending = {}
+        self._active = set()
+
+    def _push(self, key):
+        """
+        Schedules the pending delivery for the inputted key by its due time
+        and wakes a worker to pick it up.  The lock must be held.
+
+        :param      key | <hashable>
+        """
+        due = self._pending[key][2]
+        heapq.heappush(self._schedule, (due, next(self._order), key))
+        self._ready.notify()
+
+    def _run(self):
+        """
+        Delivers queued signals until the process exits.
+        """
+        while True:
+            with self._lock:
+                while True:
+                    if not self._schedule:
+                        self._ready.wait()
+                        continue
+
+                    delay = self._schedule[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self._ready.wait(delay)
+
+                key = heapq.heappop(self._schedule)[2]
+                callbacks, args, due = self._pending.pop(key)
+                self._active.add(key)
+
+            try:
+                _deliver(callbacks, args)
+            finally:
+                with self._lock:
+                    self._active.discard(key)
+                    if key in self._pending:
+                        self._push(key)
+                    elif not (self._pending or self._active):
+                        self._idle.notify_all()
+
+    def join(self):
+        """
+        Blocks until all of the currently queued signals have been delivered.
+        """
+        with self._lock:
+            while self._pending or self._active:
+                self._idle.wait()
+
+    def post(self, key, callbacks, args):
+        """
+        Queues the callbacks to be called with the inputted arguments.  If a
+        delivery for the key is already pending, its arguments are replaced.
+
+        :param      key       | <hashable>
+                    callbacks | [<Callback>, ..]
+                    args      | <tuple>
+        """
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                self._pending[key] = (callbacks, args, pending[2])
+                return
+
+            self._pending[key] = (callbacks, args, time.time() + self._window)
+
+            # the key is rescheduled once its current delivery completes
+            if key in self._active:
+                return
+
+            if not self._threads:
+                for i in range(self._workers):
+                    thread = threading.Thread(target=self._run,
+                                              name='CallbackQueue-{0}'.format(i))
+                    thread.daemon = True
+                    thread.start()
+                    self._threads.append(thread)
+
+            self._push(key)
+
+
+_defaultQueue = None
+_defaultQueueLock = threading.Lock()
+
+
+def defaultQueue():
+    """
+    Returns the shared queue used for queued delivery when a callback set
+    is not given one of its own.
+
+    :return     <CallbackQueue>
+    """
+    global _defaultQueue
+    if _defaultQueue is None:
+        with _defaultQueueLock:
+            if _defaultQueue is None:
+                _defaultQueue = CallbackQueue()
+    return _defaultQueue
+
+
+# ----------------------------------------------------------------------
 
 class Callback(object):
-    def __init__(self, slot):
+    def __init__(self, slot, expired=None, mode=DeliveryMode.Direct, loop=None):
         self._callback_func_ref = None
         self._callback_self_ref = None
+        self._callback_key = Callback.slotKey(slot)
+        self._mode = mode
+        self._loop = loop
 
         if inspect.ismethod(slot):
-            self._callback_func_ref = weakref.ref(slot.im_func)
-            self._callback_self_ref = weakref.ref(slot.im_self)
+            self._callback_func_ref = weakref.ref(slot.im_func, expired)
+            self._callback_self_ref = weakref.ref(slot.im_self, expired)
         else:
-            self._callback_func_ref = weakref.ref(slot)
+            self._callback_func_ref = weakref.ref(slot, expired)
 
     def __eq__(self, other):
         if isinstance(other, Callback):
-            ref_cmp = (other._callback_func_ref, other._callback_self_ref)
-
-        elif inspect.ismethod(other):
-            ref_cmp = (weakref.ref(other.im_func), weakref.ref(other.im_self))
+            return self._callback_key == other._callback_key
+        return self._callback_key == Callback.slotKey(other)
 
-        else:
-            ref_cmp = (weakref.ref(other), -1)
+    def __ne__(self, other):
+        return not self == other
 
-        return (self._callback_func_ref, self._callback_self_ref) == ref_cmp
+    def __hash__(self):
+        return hash(self._callback_key)
 
     def __call__(self, *args):
         """
         Calls this callback with the inputted arguments by accessing its stored
         callback function and self arguments.
-        
+
         :param      *args | <variant>
         """
         if self._callback_func_ref is None:
             return
 
         callback_func = self._callback_func_ref()
+        if callback_func is None:
+            return
 
         # call a reference with a pointer
         if self._callback_self_ref is not None:
@@ -55,7 +214,7 @@ class Callback(object):
     def isValid(self):
         """
         Checks to see if the callback pointers are still valid or not.
-        
+
         :return     <bool>
         """
         if self._callback_func_ref is not None and self._callback_func_ref():
@@ -63,103 +222,232 @@ class Callback(object):
                 return True
         return False
 
+    def key(self):
+        """
+        Returns the identity key for this callback's slot.
+
+        :return     (<int>, <int> || None)
+        """
+        return self._callback_key
+
+    def loop(self):
+        """
+        Returns the event loop this callback is scheduled on when it is
+        delivered asynchronously.
+
+        :return     <asyncio.AbstractEventLoop> || None
+        """
+        return self._loop
+
+    def mode(self):
+        """
+        Returns how this callback is delivered when its signal is emitted.
+
+        :return     <DeliveryMode>
+        """
+        return self._mode
+
+    @staticmethod
+    def slotKey(slot):
+        """
+        Returns the identity key for the inputted slot.  Keys are built from
+        object ids, so they stay cheap to compute and only remain meaningful
+        while the slot is alive -- which is guaranteed by the callback sets
+        pruning dead slots as soon as they are collected.
+
+        :param      slot | <callable>
+
+        :return     (<int>, <int> || None)
+        """
+        if inspect.ismethod(slot):
+            return id(slot.im_func), id(slot.im_self)
+        return id(slot), None
+
 
 # ----------------------------------------------------------------------
 
 class CallbackSet(object):
-    def __init__(self):
+    def __init__(self, queue=None):
         self._callbacks = {}
+        self._snapshots = {}
+        self._queue = queue
+
+    def _drop(self, signal, key):
+        """
+        Removes the slot for the given key from the signal.
+
+        :param      signal | <variant>
+                    key    | (<int>, <int> || None)
+        """
+        sig_calls = self._callbacks.get(signal)
+        if sig_calls is not None and sig_calls.pop(key, None) is not None:
+            self._snapshots.pop(signal, None)
+
+    def _expire(self, signal, key):
+        """
+        Removes the slot for the given key once one of its references has
+        been collected.
+
+        :param      signal | <variant>
+                    key    | (<int>, <int> || None)
+        """
+        sig_calls = self._callbacks.get(signal)
+        if sig_calls is None:
+            return
+
+        callback = sig_calls.get(key)
+        if callback is not None and not callback.isValid():
+            del sig_calls[key]
+            self._snapshots.pop(signal, None)
+
+    def _expiredCallback(self, signal, key):
+        """
+        Creates the weakref callback used to prune a slot from this set.  The
+        set itself is only weakly referenced so slots do not keep it alive.
+
+        :param      signal | <variant>
+                    key    | (<int>, <int> || None)
+
+        :return     <callable>
+        """
+        set_ref = weakref.ref(self)
+
+        def expired(ref):
+            callback_set = set_ref()
+            if callback_set is not None:
+                callback_set._expire(signal, key)
+
+        return expired
 
     def callbacks(self, signal):
         """
         Returns a list of the callbacks associated with a given key.
-        
+
         :param      signal | <variant>
-        
+
         :return     [<Callback>, ..]
         """
-        return self._callbacks.get(signal, [])
+        return list(self._callbacks.get(signal, {}).values())
 
     def clear(self, signal=None):
         """
         Clears either all the callbacks or the callbacks for a particular
         signal.
-        
+
         :param      signal | <variant> || None
         """
         if signal is not None:
             self._callbacks.pop(signal, None)
+            self._snapshots.pop(signal, None)
         else:
             self._callbacks.clear()
+            self._snapshots.clear()
 
-    def connect(self, signal, slot):
+    def connect(self, signal, slot, mode=DeliveryMode.Direct, loop=None):
         """
-        Creates a new connection between the inputted signal and slot.
-        
+        Creates a new connection between the inputted signal and slot.  The
+        mode determines whether the slot is called directly on the emitting
+        thread, queued to a worker thread pool, or scheduled on an asyncio
+        event loop (the current event loop, if no loop is given).
+
         :param      signal | <variant>
                     slot   | <callable>
-        
+                    mode   | <DeliveryMode>
+                    loop   | <asyncio.AbstractEventLoop> || None
+
         :return     <bool> | new connection created
         """
-        if self.isConnected(signal, slot):
+        if mode == DeliveryMode.Async and loop is None:
+            if asyncio is None:
+                raise RuntimeError('Async delivery requires asyncio.')
+            loop = asyncio.get_event_loop()
+
+        key = Callback.slotKey(slot)
+        sig_calls = self._callbacks.setdefault(signal, OrderedDict())
+        if key in sig_calls:
             return False
 
-        callback = Callback(slot)
-        self._callbacks.setdefault(signal, [])
-        self._callbacks[signal].append(callback)
+        sig_calls[key] = Callback(slot,
+                                  self._expiredCallback(signal, key),
+                                  mode=mode,
+                                  loop=loop)
+        self._snapshots.pop(signal, None)
         return True
 
     def disconnect(self, signal, slot):
         """
         Breaks the connection between the inputted signal and the given slot.
-        
+
         :param      signal | <variant>
                     slot   | <callable>
-        
+
         :return     <bool> | connection broken
         """
-        sig_calls = self._callbacks.get(signal, [])
-        for callback in sig_calls:
-            if callback == slot:
-                sig_calls.remove(callback)
-                return True
-        return False
+        sig_calls = self._callbacks.get(signal)
+        if sig_calls is None or sig_calls.pop(Callback.slotKey(slot), None) is None:
+            return False
+
+        self._snapshots.pop(signal, None)
+        return True
 
     def isConnected(self, signal, slot):
         """
         Returns if the given signal is connected to the inputted slot.
-        
+
         :param      signal | <variant>
                     slot   | <callable>
-        
+
         :return     <bool> | is connected
         """
-        sig_calls = self._callbacks.get(signal, [])
-        for callback in sig_calls:
-            if callback == slot:
-                return True
-        return False
+        return Callback.slotKey(slot) in self._callbacks.get(signal, {})
 
     def emit(self, signal, *args):
         """
         Emits the given signal with the inputted args.  This will go through
-        its list of connected callback slots and call them.
-        
+        its list of connected callback slots and call them.  The slots are
+        called from a cached tuple snapshot that is only rebuilt when the
+        connections for the signal change.  Queued slots are handed off to
+        the callback queue and asynchronous slots are scheduled on their
+        event loop, so neither blocks the emitting thread.  Asynchronous
+        slots whose event loop has been closed are dropped.
+
         :param      signal | <variant>
                     *args  | variables
         """
-        callbacks = self._callbacks.get(signal, [])
-        new_callbacks = []
+        try:
+            callbacks, queued = self._snapshots[signal]
+        except KeyError:
+            sig_calls = self._callbacks.get(signal)
+            if not sig_calls:
+                return
+
+            callbacks = tuple(c for c in sig_calls.values() if c.mode() != DeliveryMode.Queued)
+            queued = tuple(c for c in sig_calls.values() if c.mode() == DeliveryMode.Queued)
+            self._snapshots[signal] = (callbacks, queued)
+
         for callback in callbacks:
-            # clear out deleted pointers
-            if not callback.isValid():
+            if callback.mode() == DeliveryMode.Async:
+                try:
+                    callback.loop().call_soon_threadsafe(_deliver, (callback,), args)
+                except RuntimeError:
+                    # the event loop has been closed, so the slot can never
+                    # be delivered to again
+                    logger.debug('Dropping slot for closed event loop.')
+                    self._drop(signal, callback.key())
                 continue
 
-            new_callbacks.append(callback)
-
             try:
                 callback(*args)
             except StandardError:
                 logger.exception('Error occurred during callback.')
 
-        self._callbacks[signal] = new_callbacks
\ No newline at end of file
+        if queued:
+            (self._queue or defaultQueue()).post((self, signal), queued, args)
+
+    def queue(self):
+        """
+        Returns the queue used to deliver this set's queued callbacks.
+
+        :return     <CallbackQueue> || None
+        """
+        return self._queue
@@ -1,9 +1,19 @@
 """ Defines date methods and helpers for manipulating date information. """
 
+import array
+import bisect
+import calendar
 import datetime
+import itertools
 
+from projex import errors
 from projex.enum import enum
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # define global enumerations
 RepeatFlags = enum(  # Weekly Flags
                      'EveryMonday',
@@ -55,6 +65,9 @@ DaysOfWeek = {
     7: RepeatFlags.EverySunday
 }
 
+# mask of all of the weekly day flags (each flag is a distinct bit)
+AnyDays = sum(DaysOfWeek.values())
+
 DaysInMonth = {
     1: 31,
     2: 28,
@@ -71,6 +84,584 @@ DaysInMonth = {
 }
 
 
+def _asDays(dates):
+    """
+    Converts the inputted dates to an array of day precision datetimes.
+
+    :param      dates | <numpy.ndarray> || [<datetime.date>, ..]
+
+    :return     <numpy.ndarray> of datetime64[D]
+    """
+    if numpy is None:
+        raise errors.DependencyNotFoundError('numpy')
+    return numpy.asarray(dates, dtype='datetime64[D]')
+
+
+def _clampedDate(year, month, day):
+    """
+    Returns the date for the inputted day of the month, or the last day of
+    the month if the month is shorter.
+
+    :param      year  | <int>
+                month | <int>
+                day   | <int>
+
+    :return     <datetime.date>
+    """
+    return datetime.date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _isoYearStart(year):
+    """
+    Returns the first day (a Monday) of the inputted ISO calendar year.
+
+    :param      year | <int>
+
+    :return     <datetime.date>
+    """
+    jan4 = datetime.date(year, 1, 4)
+    return jan4 - datetime.timedelta(days=jan4.weekday())
+
+
+def _monthLengths(months):
+    """
+    Returns the number of days in each of the inputted months.
+
+    :param      months | <numpy.ndarray> of datetime64[M]
+
+    :return     <numpy.ndarray> of ints
+    """
+    starts = months.astype('datetime64[D]')
+    return ((months + 1).astype('datetime64[D]') - starts).astype(int)
+
+
+def _nthWeekday(year, month, weekday, nth):
+    """
+    Returns the nth (0-based) occurrence of the weekday within the month, or
+    the last occurrence if the month does not have that many.
+
+    :param      year    | <int>
+                month   | <int>
+                weekday | <int> | 0 for Monday
+                nth     | <int>
+
+    :return     <datetime.date>
+    """
+    day = 1 + (weekday - datetime.date(year, month, 1).weekday()) % 7 + 7 * nth
+    days = calendar.monthrange(year, month)[1]
+    while days < day:
+        day -= 7
+    return datetime.date(year, month, day)
+
+
+def _namedCandidates(date, today):
+    """
+    Returns the names that apply to the inputted date relative to today, in
+    order of preference.  The best name for a date is the first one that is
+    part of the requested options, or Sometime if none of them are.
+
+    :param      date  | <datetime.date>
+                today | <datetime.date>
+
+    :return     [<projex.dates.Names>, ..]
+    """
+    candidates = []
+
+    # look for today, yesterday and tomorrow
+    delta = (date - today).days
+    if delta == 0:
+        candidates.append(Names.Today)
+    elif delta == -1:
+        candidates.append(Names.Yesterday)
+    elif delta == 1:
+        candidates.append(Names.Tomorrow)
+
+    today_year, today_week, _ = today.isocalendar()
+    date_year, date_week, _ = date.isocalendar()
+
+    # look for same year options
+    if today_year == date_year:
+        # look for same month options
+        if today.month == date.month:
+            if today_week == date_week:
+                candidates.append(Names.ThisWeek)
+            elif today_week == date_week + 1:
+                candidates.append(Names.LastWeek)
+            elif today_week == date_week - 1:
+                candidates.append(Names.NextWeek)
+
+            candidates.append(Names.ThisMonth)
+        else:
+            if today.month == date.month + 1:
+                candidates.append(Names.LastMonth)
+            elif today.month == date.month - 1:
+                candidates.append(Names.NextMonth)
+
+            candidates.append(Names.ThisYear)
+
+    # look for last and next year options
+    elif today_year == date_year + 1:
+        candidates += [Names.LastYear, Names.Past]
+    elif today_year == date_year - 1:
+        candidates += [Names.NextYear, Names.Future]
+
+    # look for past and future dates
+    elif date < today:
+        candidates.append(Names.Past)
+    elif today < date:
+        candidates.append(Names.Future)
+
+    return candidates
+
+
+def _recurrence(first, mode, step, flags):
+    """
+    Returns the functions that define a recurrence as a sequence of periods.
+    The occurrences function returns the sorted dates for the kth period,
+    and the index function returns the period a date falls within (or the
+    last period that starts before it).  Every period after the first has
+    the same number of occurrences, which is returned as well.
+
+    :param      first | <datetime.date>
+                mode  | <RepeatMode>
+                step  | <int>
+                flags | <RepeatFlags>
+
+    :return     (<callable> occurrences, <callable> index, <int> per period)
+    """
+    step = max(1, step)
+
+    if mode == RepeatMode.Weekly:
+        # repeat for specific days of the week
+        if flags & AnyDays:
+            monday = first - datetime.timedelta(days=first.weekday())
+            offsets = [datetime.timedelta(days=day - 1)
+                       for day in sorted(DaysOfWeek) if flags & DaysOfWeek[day]]
+
+            def occurrences(k):
+                start = monday + datetime.timedelta(days=7 * step * k)
+                return [start + offset for offset in offsets if first <= start + offset]
+
+            def index(date):
+                return (date - monday).days // (7 * step)
+
+            return occurrences, index, len(offsets)
+
+        def occurrences(k):
+            return [first + datetime.timedelta(days=7 * step * k)]
+
+        def index(date):
+            return (date - first).days // (7 * step)
+
+    elif mode == RepeatMode.Monthly:
+        # repeat on the same day of the week, ie. the second tuesday
+        if flags & RepeatFlags.DayOfTheWeek:
+            nth = (first.day - 1) // 7
+
+            def occurrences(k):
+                year, month = divmod(first.year * 12 + first.month - 1 + k * step, 12)
+                return [_nthWeekday(year, month + 1, first.weekday(), nth)]
+
+        else:
+            def occurrences(k):
+                year, month = divmod(first.year * 12 + first.month - 1 + k * step, 12)
+                return [_clampedDate(year, month + 1, first.day)]
+
+        def index(date):
+            return ((date.year - first.year) * 12 + date.month - first.month) // step
+
+    elif mode == RepeatMode.Yearly:
+        def occurrences(k):
+            return [_clampedDate(first.year + k * step, first.month, first.day)]
+
+        def index(date):
+            return (date.year - first.year) // step
+
+    else:
+        raise ValueError('Invalid repeat mode: {0}'.format(mode))
+
+    return occurrences, index, 1
+
+
+class BusinessCalendar(object):
+    """
+    Calendar for business day math that takes both the working days of the
+    week and a set of holidays into account.  The cumulative number of
+    business days is precomputed per year into an array the first time a
+    year is used, so counting, offsetting and testing dates only needs a
+    couple of lookups afterwards.
+    
+    :usage      |>>> from projex import dates
+                |>>> cal = dates.BusinessCalendar.fromFile('holidays.txt')
+                |>>> cal.addBusinessDays(datetime.date.today(), 10)
+    
+    :param      workdays | <RepeatFlags> || None | defaults to Monday - Friday
+                holidays | [<datetime.date>, ..] || None
+    """
+    WeekDays = (RepeatFlags.EveryMonday |
+                RepeatFlags.EveryTuesday |
+                RepeatFlags.EveryWednesday |
+                RepeatFlags.EveryThursday |
+                RepeatFlags.EveryFriday)
+
+    def __init__(self, workdays=None, holidays=None):
+        if workdays is None:
+            workdays = BusinessCalendar.WeekDays
+
+        # weekly lookups are indexed by date.weekday() (Monday is 0)
+        self._workdays = workdays & AnyDays
+        self._weekly = [bool(workdays & DaysOfWeek[day]) for day in sorted(DaysOfWeek)]
+        self._weeklyCounts = [sum(self._weekly[:i]) for i in range(8)]
+        if not self._weeklyCounts[-1]:
+            raise ValueError('A business calendar needs at least one working day.')
+
+        self._holidays = set()
+        self._holidayOrdinals = []
+        self._years = {}
+
+        if holidays:
+            self.addHolidays(holidays)
+
+    def _countBefore(self, ordinal):
+        """
+        Returns the number of business days from the start of the calendar
+        up to, but not including, the given ordinal.
+
+        :param      ordinal | <int>
+
+        :return     <int>
+        """
+        offset, counts = self._year(datetime.date.fromordinal(ordinal).year)
+        return counts[ordinal - offset]
+
+    def _year(self, year):
+        """
+        Returns the first ordinal of the year and its cumulative business day
+        counts, building the counts the first time the year is requested.
+        The counts array has one more entry than the year has days, so the
+        last value is the count up to the start of the following year.
+
+        :param      year | <int>
+
+        :return     (<int> offset, <array.array> counts)
+        """
+        try:
+            return self._years[year]
+        except KeyError:
+            pass
+
+        offset = datetime.date(year, 1, 1).toordinal()
+        weeks, remainder = divmod(offset - 1, 7)
+        total = weeks * self._weeklyCounts[-1] + self._weeklyCounts[remainder]
+        total -= bisect.bisect_left(self._holidayOrdinals, offset)
+
+        length = daysInYear(datetime.date(year, 1, 1))
+        holidays = set(self._holidayOrdinals[bisect.bisect_left(self._holidayOrdinals, offset):
+                                             bisect.bisect_left(self._holidayOrdinals, offset + length)])
+
+        counts = array.array('l', [total])
+        weekday = (offset - 1) % 7
+        for ordinal in xrange(offset, offset + length):
+            if self._weekly[weekday] and ordinal not in holidays:
+                total += 1
+            counts.append(total)
+            weekday = (weekday + 1) % 7
+
+        self._years[year] = (offset, counts)
+        return offset, counts
+
+    def addBusinessDays(self, date, days):
+        """
+        Returns the date that is the given number of business days from the
+        inputted date.  Dates that are not business days are first rolled
+        forward to the next business day.
+
+        :param      date | <datetime.date>
+                    days | <int>
+
+        :return     <datetime.date>
+        """
+        target = self._countBefore(date.toordinal()) + days
+
+        # estimate the year from the average number of days per business
+        # day, then correct the guess
+        year = date.year + int(days * 7.0 / (self._weeklyCounts[-1] * 365.2425))
+        year = min(max(year, datetime.MINYEAR), datetime.MAXYEAR)
+        while True:
+            offset, counts = self._year(year)
+            if target < counts[0]:
+                year -= 1
+            elif counts[-1] <= target:
+                year += 1
+            else:
+                break
+
+            if not datetime.MINYEAR <= year <= datetime.MAXYEAR:
+                raise OverflowError('Business day is out of the date range.')
+
+        index = bisect.bisect_right(counts, target) - 1
+        return datetime.date.fromordinal(offset + index)
+
+    def addHoliday(self, date):
+        """
+        Adds the inputted date as a holiday for this calendar.
+
+        :param      date | <datetime.date>
+        """
+        self.addHolidays([date])
+
+    def addHolidays(self, dates):
+        """
+        Adds the inputted dates as holidays for this calendar.
+
+        :param      dates | [<datetime.date>, ..]
+        """
+        for date in dates:
+            if isinstance(date, datetime.datetime):
+                date = date.date()
+
+            # only holidays that fall on a working day change the counts
+            if date not in self._holidays:
+                self._holidays.add(date)
+                if self._weekly[date.weekday()]:
+                    bisect.insort(self._holidayOrdinals, date.toordinal())
+
+        self._years.clear()
+
+    def businessDaysBetween(self, start, end):
+        """
+        Returns the number of business days between the inputted dates,
+        including the start date but not the end date.  If the end date is
+        before the start date, the count will be negative.
+
+        :param      start | <datetime.date>
+                    end   | <datetime.date>
+
+        :return     <int>
+        """
+        return self._countBefore(end.toordinal()) - self._countBefore(start.toordinal())
+
+    def holidays(self):
+        """
+        Returns the holidays for this calendar in order.
+
+        :return     [<datetime.date>, ..]
+        """
+        return sorted(self._holidays)
+
+    def isBusinessDay(self, date):
+        """
+        Returns whether or not the inputted date is a business day for this
+        calendar.
+
+        :param      date | <datetime.date>
+
+        :return     <bool>
+        """
+        offset, counts = self._year(date.year)
+        index = date.toordinal() - offset
+        return counts[index + 1] != counts[index]
+
+    def loadHolidays(self, filename, format='%Y-%m-%d'):
+        """
+        Loads holidays from the inputted file.  The file should contain one
+        date per line, blank lines and lines starting with a '#' are ignored.
+
+        :param      filename | <str>
+                    format   | <str>
+        """
+        dates = []
+        with open(filename, 'r') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    dates.append(datetime.datetime.strptime(line, format).date())
+
+        self.addHolidays(dates)
+
+    def removeHoliday(self, date):
+        """
+        Removes the inputted date from the holidays for this calendar.
+
+        :param      date | <datetime.date>
+
+        :return     <bool> | removed
+        """
+        if date not in self._holidays:
+            return False
+
+        self._holidays.remove(date)
+        ordinal = date.toordinal()
+        index = bisect.bisect_left(self._holidayOrdinals, ordinal)
+        if index < len(self._holidayOrdinals) and self._holidayOrdinals[index] == ordinal:
+            self._holidayOrdinals.pop(index)
+
+        self._years.clear()
+        return True
+
+    def workdays(self):
+        """
+        Returns the working days of the week for this calendar.
+
+        :return     <RepeatFlags>
+        """
+        return self._workdays
+
+    @classmethod
+    def fromFile(cls, filename, workdays=None, format='%Y-%m-%d'):
+        """
+        Creates a new business calendar with the holidays from the inputted
+        file.
+
+        :sa         loadHolidays
+
+        :param      filename | <str>
+                    workdays | <RepeatFlags> || None
+                    format   | <str>
+
+        :return     <BusinessCalendar>
+        """
+        cal = cls(workdays)
+        cal.loadHolidays(filename, format)
+        return cal
+
+
+class DateContext(object):
+    """
+    Precomputes the date information relative to a single reference time, so
+    that many dates can be named or described without recalculating today,
+    the week and month boundaries or the current time for each one.  The
+    boundaries where a date's name can change are calculated once, and dates
+    are classified by a binary search over them.
+    
+    :usage      |>>> from projex import dates
+                |>>> context = dates.DateContext()
+                |>>> context.namedMany(record_dates)
+    
+    :param      reference | <datetime.datetime> || None
+    """
+    def __init__(self, reference=None):
+        if reference is None:
+            reference = datetime.datetime.now()
+        elif type(reference) == datetime.date:
+            reference = datetime.datetime.combine(reference, datetime.datetime.now().time())
+
+        self._reference = reference
+        self._today = today = reference.date()
+        self._allNames = Names.all()
+        self._results = {}
+
+        # collect every date where the named candidates can change -- the
+        # surrounding days, weeks, iso years and the months within them
+        one_day = datetime.timedelta(days=1)
+        one_week = datetime.timedelta(days=7)
+        monday = today - datetime.timedelta(days=today.weekday())
+        iso_year = today.isocalendar()[0]
+
+        bounds = set(today + one_day * i for i in range(-1, 3))
+        bounds.update(monday + one_week * i for i in range(-1, 3))
+
+        year_starts = [_isoYearStart(iso_year + i) for i in range(-1, 3)]
+        bounds.update(year_starts)
+
+        year, month = year_starts[0].year, year_starts[0].month
+        while datetime.date(year, month, 1) <= year_starts[-1]:
+            bounds.add(datetime.date(year, month, 1))
+            year, month = divmod(year * 12 + month, 12)
+            month += 1
+
+        self._bounds = sorted(bounds)
+        self._candidates = [_namedCandidates(self._bounds[0] - one_day, today)]
+        self._candidates += [_namedCandidates(bound, today) for bound in self._bounds]
+
+    def named(self, date, options=None):
+        """
+        Returns the best named option for the inputted date.
+
+        :sa         named
+
+        :param      date    | <datetime.date>
+                    options | <projex.dates.Names> || None
+
+        :return     <projex.dates.Names>
+        """
+        # map from Qt information
+        if type(date).__name__ in ('QDate', 'QDateTime', 'QTime'):
+            date = date.toPython()
+
+        if options is None:
+            options = self._allNames
+
+        # use the date information
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+
+        index = bisect.bisect_right(self._bounds, date)
+        try:
+            return self._results[(index, options)]
+        except KeyError:
+            result = Names.Sometime
+            for name in self._candidates[index]:
+                if name & options:
+                    result = name
+                    break
+
+            self._results[(index, options)] = result
+            return result
+
+    def namedMany(self, dates, options=None):
+        """
+        Returns the best named option for each of the inputted dates.
+
+        :param      dates   | [<datetime.date>, ..]
+                    options | <projex.dates.Names> || None
+
+        :return     [<projex.dates.Names>, ..]
+        """
+        return [self.named(date, options) for date in dates]
+
+    def pretty(self, source):
+        """
+        Returns the pretty description of the source relative to this
+        context's reference time.
+
+        :sa         pretty
+
+        :param      source | <datetime.datetime> || <datetime.date> || <datetime.time> || <datetime.timedelta>
+
+        :return     <str>
+        """
+        return _pretty(source, self._reference, self._reference)
+
+    def prettyMany(self, sources):
+        """
+        Returns the pretty descriptions for each of the inputted sources.
+
+        :param      sources | [<datetime.datetime>, ..]
+
+        :return     [<str>, ..]
+        """
+        return [self.pretty(source) for source in sources]
+
+    def reference(self):
+        """
+        Returns the reference time for this context.
+
+        :return     <datetime.datetime>
+        """
+        return self._reference
+
+    def today(self):
+        """
+        Returns the reference date for this context.
+
+        :return     <datetime.date>
+        """
+        return self._today
+
+
+# ------------------------------------------------------------------------------
+
 def addMonths(date, months):
     """
     Returns the new date based on the inputted months.
@@ -84,28 +675,31 @@ def addMonths(date, months):
     if type(date).__name__ in ('QDate', 'QDateTime', 'QTime'):
         date = date.toPython()
 
-    mult = months / abs(months)
-    years = mult * (abs(months) / 12)
-    months = mult * (abs(months) % 12)
+    # calculate the new month and year
+    year, month = divmod(date.year * 12 + date.month - 1 + months, 12)
 
-    # calculate the new month
-    month = date.month + months
-    if month < 1:
-        years -= 1
-        month = 12 - month
-
-    elif 12 < month:
-        years += 1
-        month %= 12
+    # calculate the new day
+    return _clampedDate(year, month + 1, date.day)
 
-    # calculate the new year
-    year = date.year + years
 
-    # calculate the new day
-    check = datetime.date(year, month, 1)
-    days = daysInMonth(check)
+def addMonthsMany(dates, months):
+    """
+    Returns the new dates based on adding the inputted months to each of the
+    given dates.  This is the array based version of the addMonths method --
+    days past the end of the new month are clamped to the last day of it.
+    
+    :param      dates  | <numpy.ndarray> || [<datetime.date>, ..]
+                months | <numpy.ndarray> || [<int>, ..] || <int>
+    
+    :return     <numpy.ndarray> of datetime64[D]
+    """
+    dates = _asDays(dates)
+    starts = dates.astype('datetime64[M]')
+    offsets = (dates - starts.astype('datetime64[D]')).astype(int)
 
-    return datetime.date(year, month, min(date.day, days))
+    targets = starts + numpy.asarray(months, dtype=int)
+    offsets = numpy.minimum(offsets, _monthLengths(targets) - 1)
+    return targets.astype('datetime64[D]') + offsets
 
 
 def addYears(date, years):
@@ -124,6 +718,42 @@ def addYears(date, years):
     return datetime.date(date.year + years, date.month, date.day)
 
 
+def countRepeating(first,
+                   repeatUntil,
+                   mode=RepeatMode.Weekly,
+                   step=1,
+                   flags=0,
+                   startAt=None):
+    """
+    Returns the number of repeating dates between the start and the
+    repeatUntil date (inclusive), without generating the dates in between.
+    The arguments are the same as for the iterRepeating method.
+    
+    :param      first       | <datetime.date>
+                repeatUntil | <datetime.date>
+                mode        | <RepeatMode>
+                step        | <int>
+                flags       | <RepeatFlags>
+                startAt     | <datetime.date> || None
+    
+    :return     <int>
+    """
+    start = max(first, startAt) if startAt is not None else first
+    if repeatUntil < start:
+        return 0
+
+    occurrences, index, per_period = _recurrence(first, mode, step, flags)
+    lo = index(start)
+    hi = index(repeatUntil)
+
+    if lo == hi:
+        return len([d for d in occurrences(lo) if start <= d <= repeatUntil])
+
+    count = len([d for d in occurrences(lo) if start <= d])
+    count += len([d for d in occurrences(hi) if d <= repeatUntil])
+    return count + (hi - lo - 1) * per_period
+
+
 def daysInMonth(date):
     """
     Returns the number of the days in the month for the given date.  This will
@@ -140,12 +770,25 @@ def daysInMonth(date):
     month = date.month
 
     # look for a leap year
-    if month == 2 and not date.year % 4:
+    if month == 2 and calendar.isleap(date.year):
         return 29
 
     return DaysInMonth.get(month, -1)
 
 
+def daysInMonthMany(dates):
+    """
+    Returns the number of days in the month for each of the given dates.
+    This is the array based version of the daysInMonth method.
+    
+    :param      dates | <numpy.ndarray> || [<datetime.date>, ..]
+    
+    :return     <numpy.ndarray> of ints
+    """
+    months = _asDays(dates).astype('datetime64[M]')
+    return _monthLengths(months)
+
+
 def daysInYear(date):
     """
     Returns the number of days in the year for the given date.
@@ -163,7 +806,7 @@ def daysInYear(date):
     else:
         year = date
 
-    if not year % 4:
+    if calendar.isleap(year):
         return 366
     return 365
 
@@ -210,15 +853,64 @@ def displayName(date, options=None, format='%b %d, %Y'):
         return date.strftime(format)
 
 
-def pretty(source, reference=None):
-    reference = reference or datetime.datetime.now()
+def iterRepeating(first,
+                  mode=RepeatMode.Weekly,
+                  step=1,
+                  flags=0,
+                  startAt=None,
+                  repeatUntil=None):
+    """
+    Generates the repeating dates from the inputted start date based on the
+    given mode.  The dates are calculated lazily, and when a startAt date is
+    supplied, the generator jumps straight to it rather than stepping from
+    the first date.  If no repeatUntil date is supplied, the generator does
+    not end.
+    
+    Weekly repeats will occur on the days of the week given by the flags,
+    or every step weeks from the first date if no days are flagged.  Monthly
+    repeats will occur on the same day of the month (the last day, for
+    shorter months), or on the same weekday of the month (ie. the second
+    Tuesday) with the DayOfTheWeek flag.
+    
+    :param      first       | <datetime.date>
+                mode        | <RepeatMode>
+                step        | <int> | value must be greater than 1
+                flags       | <RepeatFlags>
+                startAt     | <datetime.date> || None
+                repeatUntil | <datetime.date> || None
+    
+    :return     <generator>
+    """
+    occurrences, index, _ = _recurrence(first, mode, step, flags)
+    start = max(first, startAt) if startAt is not None else first
+    k = index(start)
+
+    while True:
+        for day in occurrences(k):
+            if day < start:
+                continue
+            elif repeatUntil is not None and repeatUntil < day:
+                return
+            yield day
+        k += 1
 
+
+def _pretty(source, reference, now):
+    """
+    Returns the pretty description of the source relative to the reference,
+    with the current time supplied so it is only looked up once.
+
+    :param      source      | <datetime.datetime> || <datetime.date> || <datetime.time> || <datetime.timedelta>
+                reference   | <datetime.datetime> || <datetime.date> || <datetime.time> || <datetime.timedelta>
+                now         | <datetime.datetime>
+
+    :return     <str>
+    """
     def make_dtime(value):
         if type(value) == datetime.datetime:
             return value
 
         elif type(value) == datetime.date:
-            now = datetime.datetime.now()
             return datetime.datetime(value.year,
                                      value.month,
                                      value.day,
@@ -227,16 +919,15 @@ def pretty(source, reference=None):
                                      now.second)
 
         elif type(value) == datetime.time:
-            today = datetime.date.today()
-            return datetime.datetime(today.year,
-                                     today.month,
-                                     today.day,
+            return datetime.datetime(now.year,
+                                     now.month,
+                                     now.day,
                                      value.hour,
                                      value.minute,
                                      value.second)
 
         elif type(value) == datetime.timedelta:
-            return datetime.datetime.now() + value
+            return now + value
 
         else:
             raise ValueError(source)
@@ -302,6 +993,35 @@ def pretty(source, reference=None):
         return ', '.join(parts[:2]) + ' ' + suffix
 
 
+def pretty(source, reference=None):
+    """
+    Returns a pretty description of the time between the source and the
+    reference, such as '2 days, 3 hours ago'.
+    
+    :param      source      | <datetime.datetime> || <datetime.date> || <datetime.time> || <datetime.timedelta>
+                reference   | <datetime.datetime> || None
+    
+    :return     <str>
+    """
+    now = datetime.datetime.now()
+    return _pretty(source, reference or now, now)
+
+
+def prettyMany(sources, reference=None):
+    """
+    Returns the pretty descriptions for each of the inputted sources, looking
+    up the current time only once for all of them.
+    
+    :sa         DateContext
+    
+    :param      sources     | [<datetime.datetime>, ..]
+                reference   | <datetime.datetime> || None
+    
+    :return     [<str>, ..]
+    """
+    return DateContext(reference).prettyMany(sources)
+
+
 def named(date, options=None):
     """
     Returns the best named option for the inputted date based on the inputted
@@ -323,80 +1043,26 @@ def named(date, options=None):
     if isinstance(date, datetime.datetime):
         date = date.date()
 
-    # grab today's information
-    today = datetime.date.today()
-    today_month = today.month
-    today_year, today_week, today_weekday = today.isocalendar()
-
-    # grab yesterday's information
-    yesterday = today + datetime.timedelta(days=-1)
-    tomorrow = today + datetime.timedelta(days=1)
-
-    # grab the date information
-    date_month = date.month
-    date_year, date_week, date_weekday = date.isocalendar()
-
-    # look for today
-    if today == date and Names.Today & options:
-        return Names.Today
-
-    # look for yesterday
-    elif yesterday == date and Names.Yesterday & options:
-        return Names.Yesterday
-
-    # look for tomorrow
-    elif tomorrow == date and Names.Tomorrow & options:
-        return Names.Tomorrow
-
-    # look for same year options
-    elif today_year == date_year:
-        # look for same month options
-        if today_month == date_month:
-            # look for this week
-            if today_week == date_week and Names.ThisWeek & options:
-                return Names.ThisWeek
-
-            # look for last week 
-            elif today_week == date_week + 1 and Names.LastWeek & options:
-                return Names.LastWeek
-
-            # look for next week
-            elif today_week == date_week - 1 and Names.NextWeek & options:
-                return Names.NextWeek
-
-            # look for this month
-            elif Names.ThisMonth & options:
-                return Names.ThisMonth
-
-        # look for last month options
-        elif today_month == date_month + 1 and Names.LastMonth & options:
-            return Names.LastMonth
-
-        # look for next month options
-        elif today_month == date_month - 1 and Names.NextMonth & options:
-            return Names.NextMonth
-
-        # look for this year options
-        elif Names.ThisYear & options:
-            return Names.ThisYear
-
-    # look for last year options
-    elif today_year == date_year + 1 and Names.LastYear & options:
-        return Names.LastYear
-
-    # look for next year options
-    elif today_year == date_year - 1 and Names.NextYear & options:
-        return Names.NextYear
-
-    # look for past dates
-    elif date < today and Names.Past & options:
-        return Names.Past
+    for name in _namedCandidates(date, datetime.date.today()):
+        if name & options:
+            return name
+    return Names.Sometime
 
-    # look for future dates
-    elif today < date and Names.Future & options:
-        return Names.Future
 
-    return Names.Sometime
+def namedMany(dates, options=None, reference=None):
+    """
+    Returns the best named option for each of the inputted dates.  The
+    reference information is only calculated once for all of the dates.
+    
+    :sa         DateContext
+    
+    :param      dates       | [<datetime.date>, ..]
+                options     | <projex.dates.Names> || None
+                reference   | <datetime.datetime> || None
+    
+    :return     [<projex.dates.Names>, ..]
+    """
+    return DateContext(reference).namedMany(dates, options)
 
 
 def repeating(first,
@@ -412,6 +1078,8 @@ def repeating(first,
     capped once the last date is reached, otherwise, the maximum number of
     results will be returned.
     
+    :sa         iterRepeating
+    
     :param      first       | <datetime.date>
                 mode        | <RepeatMode>
                 step        | <int> | value must be greater than 1
@@ -425,106 +1093,14 @@ def repeating(first,
     if repeatUntil is None and maximum is None:
         maximum = 100
 
-    # calculate the dates
-    step = max(1, step)
-    output = []
-
-    # create the start at information
-    if startAt is not None and first < startAt:
-        if mode == RepeatMode.Monthly:
-            curr = datetime.date(startAt.year, startAt.month, first.day)
-        elif mode == RepeatMode.Yearly:
-            curr = datetime.date(startAt.year, first.month, first.day)
-        else:
-            curr = first
-    else:
-        curr = first
-
-    if curr < first:
-        curr = first
-
-    # determine if any days are flagged
-    any_days = 0
-    for value in DaysOfWeek.values():
-        any_days |= value
-
-    # repeat on a daily basis
-    while True:
-        # increment daily
-        if mode == RepeatMode.Weekly:
-            # repeat for specific days
-            if flags & any_days:
-                start = curr + datetime.timedelta(days=1 - curr.isoweekday())
-                exit_loop = False
-
-                for i in range(7):
-                    day = start + datetime.timedelta(days=i)
-
-                    if day < first:
-                        continue
-
-                    elif repeatUntil is not None and repeatUntil < day:
-                        exit_loop = True
-                        break
+    dates = iterRepeating(first,
+                          mode=mode,
+                          step=step,
+                          flags=flags,
+                          startAt=startAt,
+                          repeatUntil=repeatUntil)
 
-                    flag = DaysOfWeek[day.isoweekday()]
-
-                    # skip this day of the week when repeating
-                    if not (flags & flag):
-                        continue
-
-                    if startAt is None or startAt <= day:
-                        output.append(day)
-
-                if exit_loop:
-                    break
-
-            else:
-                if repeatUntil is not None and repeatUntil < curr:
-                    break
-
-                if startAt is None or startAt <= curr:
-                    output.append(curr)
-
-            curr = curr + datetime.timedelta(days=7 * step)
-
-        # break when the end first is hit
-        if repeatUntil is not None and repeatUntil < curr:
-            break
-
-        # break when the maximum is hit
-        elif maximum is not None and len(output) == maximum:
-            break
-
-        # increment weekly
-        elif mode == RepeatMode.Weekly:
-            if startAt is None or startAt <= curr:
-                output.append(curr)
-
-            curr = curr + datetime.timedelta(days=step * 7)
-
-        # increment monthly
-        elif mode == RepeatMode.Monthly:
-            if startAt is None or startAt <= curr:
-                output.append(curr)
-
-            # approximate the delta
-            curr = addMonths(curr, step)
-
-            # check to see if we're repeating on the day of the week in
-            # the month, or the actual day of the month
-            if (flags & RepeatFlags.DayOfTheWeek) != 0:
-                shift = curr.isodayofweek() - first.isoweekday()
-                curr = curr + datetime.timedelta(days=shift)
-
-        # increment yearly
-        elif mode == RepeatMode.Yearly:
-            if startAt is None or startAt <= curr:
-                output.append(curr)
-
-            curr = addYears(curr, step)
-
-    return output
+    return list(itertools.islice(dates, maximum))
 
 
 def weekdays(start, end):
@@ -578,4 +1154,30 @@ def weekdays(start, end):
         weekends = int(round(total_days / 7.0) * 2)
         week_days = ((total_days - weekends) + remainder) * multiplier
 
-        return week_days
\ No newline at end of file
+        return week_days
+
+
+def weekdaysMany(starts, ends):
+    """
+    Returns the number of weekdays between each pair of the inputted start
+    and end dates.  This is the array based version of the weekdays method,
+    so both dates are included in the count, and the count is negative when
+    the end date is before the start date.
+    
+    :param      starts | <numpy.ndarray> || [<datetime.date>, ..]
+                ends   | <numpy.ndarray> || [<datetime.date>, ..]
+    
+    :return     <numpy.ndarray> of ints
+    """
+    starts = _asDays(starts)
+    ends = _asDays(ends)
+
+    forward = numpy.busday_count(starts, ends + 1)
+    backward = -numpy.busday_count(ends, starts + 1)
+    return numpy.where(ends < starts, backward, forward)
+
+
+# aliases for the array based functions under their numpy style names
+add_months_many = addMonthsMany
+days_in_month_many = daysInMonthMany
+weekdays_many = weekdaysMany
@@ -14,6 +14,8 @@ As an environment variable before import.  The variable would consist of the
 path to the root package or module, and the import term to use.
 """
 
+import importlib
+import imp
 import logging
 import os
 import re
@@ -23,17 +25,28 @@ from .text import nativestring as nstr
 
 logger = logging.getLogger(__name__)
 
+# matches $VAR, ${VAR} and %VAR% environment references
+ENVIRON_VAR_EXPR = re.compile(r'\$(\w+)|\$\{(\w+)\}|%(\w+)%')
+
 
 class EnvManager(object):
     """ Class to manage different paths are requirements. """
 
     _current = None
 
+    # maximum number of expanded strings to memoize per environment snapshot
+    ExpandCacheSize = 50000
+
     def __init__(self):
         self._loadedRequires = []
         self._issetup = False
         self._origpath = sys.path[:]  # duplicate the path
         self._addedpaths = []
+        self._expandSnapshot = None
+        self._environVersion = 0
+        self._pathIndex = None
+        self._pathIndexState = None
+        self._pathRefreshes = 0
 
     @staticmethod
     def _setup():
@@ -76,18 +89,177 @@ class EnvManager(object):
         :return     bool: success
         """
         # normalize the path
+        path = self._normpath(path)
+        return bool(path and self.appendPaths([path]))
+
+    def appendPaths(self, paths):
+        """
+        Appends the inputted paths to the end of the sys.path variable in a
+        single update, skipping any that are already in it.
+
+        :param      paths | [<str>, ..]
+
+        :return     [<str>, ..] | paths that were added
+        """
+        index = self._paths()
+        added = []
+        seen = set()
+        for path in paths:
+            if path and path not in index and path not in seen:
+                seen.add(path)
+                added.append(path)
+
+        if added:
+            self._updatePaths(sys.path + added)
+            self._addedpaths += added
+        return added
+
+    @staticmethod
+    def _normpath(path):
+        """
+        Normalizes the inputted path for use with the appendPath and pushPath
+        methods.
+
+        :param      path | <str>
+
+        :return     <str> || None
+        """
         path = os.path.normcase(nstr(path)).strip()
-        if path and path != '.' and path not in sys.path:
-            sys.path.append(path)
-            self._addedpaths.append(path)
-            return True
-        return False
+        if path and path != '.':
+            return path
+        return None
+
+    def _paths(self):
+        """
+        Returns the membership index for the sys.path.  The index is rebuilt
+        when the path looks modified outside of this manager -- rebound, or
+        a different length or first or last entry.  Entries replaced in the
+        middle of the path without changing its length are not detected.
+
+        :return     <set>
+        """
+        state = self._pathIndexState
+        if (self._pathIndex is None or state[0] is not sys.path or
+                state[1:] != self._pathState()[1:]):
+            self._pathIndex = set(sys.path)
+            self._pathIndexState = self._pathState()
+        return self._pathIndex
+
+    @staticmethod
+    def _pathState():
+        """
+        Returns a cheap snapshot of the sys.path used to tell whether the
+        path index is still valid.  The path list itself is held, so its id
+        cannot be reused by another list.
+
+        :return     (<list>, <int>, [<str>], [<str>])
+        """
+        return sys.path, len(sys.path), sys.path[:1], sys.path[-1:]
+
+    def _updatePaths(self, paths):
+        """
+        Replaces the contents of the sys.path in place with the inputted
+        paths, updating the index and refreshing the import caches once.
+
+        :param      paths | [<str>, ..]
+        """
+        sys.path[:] = paths
+        self._pathIndex = set(paths)
+        self._pathIndexState = self._pathState()
+        self.refreshImportCaches()
+
+    def _expandState(self, environ):
+        """
+        Returns the memoized expansion state for the current contents of the
+        inputted environment.  When the environment has changed since the
+        last expansion, the version is bumped and a new state is created.
+
+        :param      environ | <dict>
+
+        :return     (<dict> texts, <dict> variables)
+        """
+        snapshot = self._expandSnapshot
+        if snapshot is None or snapshot[0] is not environ or environ != snapshot[1]:
+            self._environVersion += 1
+            snapshot = (environ, dict(environ), {}, {})
+            self._expandSnapshot = snapshot
+
+        texts = snapshot[2]
+        if len(texts) > self.ExpandCacheSize:
+            texts.clear()
+
+        return texts, snapshot[3]
+
+    def _expandText(self, text, environ, variables, visiting):
+        """
+        Expands the variable references within the inputted text in a single
+        scan, resolving each referenced variable at most once.  Variables that
+        are not defined are left as they are.
+
+        :param      text        | <str>
+                    environ     | <dict>
+                    variables   | <dict> { <str> key: <str> value, .. }
+                    visiting    | <set> | variables currently being resolved
+
+        :return     (<str> output, <bool> cyclic)
+        """
+        cyclic = [False]
+
+        def replace(match):
+            key = match.group(1) or match.group(2) or match.group(3)
+            try:
+                return variables[key]
+            except KeyError:
+                pass
+
+            value = environ.get(key)
+            if not value:
+                return match.group(0)
+
+            elif key in visiting:
+                err = '%s environ variable causes an infinite loop.' % key
+                logger.warning(err)
+                cyclic[0] = True
+                return value
+
+            visiting.add(key)
+            try:
+                value, value_cyclic = self._expandText(value,
+                                                       environ,
+                                                       variables,
+                                                       visiting)
+            finally:
+                visiting.discard(key)
+
+            # values resolved around a loop depend on where the loop was
+            # entered, so only memoize clean resolutions
+            if value_cyclic:
+                cyclic[0] = True
+            else:
+                variables[key] = value
+            return value
+
+        output = ENVIRON_VAR_EXPR.sub(replace, nstr(text))
+        return os.path.expanduser(output), cyclic[0]
+
+    def environVersion(self):
+        """
+        Returns the version of the environment snapshot used for memoizing
+        the expandvars results.  The version changes whenever the expanded
+        environment is found to have been modified.
+
+        :return     <int>
+        """
+        return self._environVersion
 
     def expandvars(self, text, environ=None, cache=None):
         """
             Recursively expands the text variables, vs. the os.path \
-            method which only works at one level.  The cache value should be \
-            left blank as it is used to protect against recursion.
+            method which only works at one level.  Each referenced variable \
+            is resolved once per snapshot of the environment, and the \
+            expanded text is memoized until the environment changes.  The \
+            cache value is no longer used and only kept for backwards \
+            compatibility.
             
             :param      text    | <str>
                         environ | <dict> || None
@@ -102,48 +274,34 @@ class EnvManager(object):
         if not text:
             return ''
 
-        # check for circular dependencies
-        cache = cache or {}
-
-        # return the cleaned variable
-        output = nstr(text)
-        keys = re.findall('\$(\w+)|\${(\w+)\}|\%(\w+)\%', text)
-
-        for first, second, third in keys:
-            repl = ''
-            key = ''
-            if first:
-                repl = '$%s' % first
-                key = first
-            elif second:
-                repl = '${%s}' % second
-                key = second
-            elif third:
-                repl = '%%%s%%' % third
-                key = third
-            else:
-                continue
+        texts, variables = self._expandState(environ)
+        try:
+            return texts[text]
+        except KeyError:
+            pass
 
-            value = environ.get(key)
-            if value:
-                if key not in cache:
-                    cache[key] = value
-                    value = self.expandvars(value, environ, cache)
-                else:
-                    err = '%s environ variable causes an infinite loop.' % key
-                    logger.warning(err)
-                    value = cache[key]
-            else:
-                value = repl
+        output, cyclic = self._expandText(text, environ, variables, set())
+        if not cyclic:
+            texts[text] = output
+        return output
+
+    def hasPath(self, path):
+        """
+        Returns whether or not the inputted path is in the sys.path, using the
+        manager's path index rather than scanning the list.
 
-            output = output.replace(repl, value)
+        :param      path | <str>
 
-        return os.path.expanduser(output)
+        :return     <bool>
+        """
+        return path in self._paths()
 
     def pushPath(self, path):
         """
-        Pushes the inputted path at the front of the sys.path variable, making
-        it the first path python uses when importing a module.
+        Pushes the inputted path onto the list of paths added by this
+        manager.  The path is appended to the end of the sys.path variable,
+        so it does not take precedence over the existing import paths -- use
+        the pushPaths method to insert paths at the front.
         
         :param      path
         :type       str
@@ -151,12 +309,72 @@ class EnvManager(object):
         :return     bool: success
         """
         # normalize the path
-        path = os.path.normcase(nstr(path)).strip()
-        if path and path != '.' and path not in sys.path:
-            sys.path.append(path)
-            self._addedpaths.insert(0, path)
-            return True
-        return False
+        path = self._normpath(path)
+        if not path or path in self._paths():
+            return False
+
+        self._updatePaths(sys.path + [path])
+        self._addedpaths.insert(0, path)
+        return True
+
+    def pushPaths(self, paths, move=True):
+        """
+        Pushes the inputted paths to the front of the sys.path variable in a
+        single update, in the order given.  If move is True, paths that are
+        already in the sys.path are moved to the front as well, otherwise
+        they are left where they are.  When the paths are already at the
+        front, the sys.path is not modified at all.
+
+        :param      paths | [<str>, ..]
+                    move  | <bool>
+
+        :return     [<str>, ..] | paths that were added
+        """
+        index = self._paths()
+        front = []
+        seen = set()
+        for path in paths:
+            if path and path not in seen and (move or path not in index):
+                seen.add(path)
+                front.append(path)
+
+        added = [path for path in front if path not in index]
+        if front and sys.path[:len(front)] != front:
+            self._updatePaths(front + [p for p in sys.path if p not in seen])
+            self._addedpaths[:0] = added
+        return added
+
+    def pathStats(self):
+        """
+        Returns information about the cost of the current sys.path.  Every
+        import that is not already loaded checks each path entry in turn,
+        probing for a package folder and for each of the module suffixes,
+        so the number of file system checks a top-level import can make
+        grows with the length of the path.
+
+        :return     {<str> key: <int> value, ..}
+        """
+        paths = sys.path
+        probes = len(imp.get_suffixes()) + 1
+        stats = {
+            'length': len(paths),
+            'duplicates': len(paths) - len(set(paths)),
+            'missing': len([p for p in set(paths) if p and not os.path.exists(p)]),
+            'statsPerImport': len(paths) * probes,
+            'refreshes': self._pathRefreshes
+        }
+        logger.debug('sys.path stats: %s' % stats)
+        return stats
+
+    def refreshImportCaches(self):
+        """
+        Invalidates the import system's finder caches after the sys.path has
+        been modified, when supported by the running Python version.
+        """
+        self._pathRefreshes += 1
+        invalidate = getattr(importlib, 'invalidate_caches', None)
+        if invalidate is not None:
+            invalidate()
 
     def requires(self, *modules):
         """
@@ -276,7 +494,8 @@ class EnvManager(object):
                 # check if the user specified an import path
                 if path:
                     logger.info('Adding env manager path: %s' % path)
-                    sys.path.insert(0, path)
+                    if path not in sys.path:
+                        sys.path.insert(0, path)
 
                 logger.info('Loading env manager: %s.%s' % (module, clsname))
 
@@ -317,8 +536,7 @@ class EnvManager(object):
             return None
 
         basepath = os.path.normcase(basepath)
-        if basepath not in sys.path:
-            sys.path.insert(0, basepath)
+        EnvManager.current().pushPaths([basepath], move=False)
 
         logger.debug('Importing: %s' % package)
 
@@ -76,6 +76,11 @@ class AddonAlreadyExists(ProjexError):
 # D
 #------------------------------------------------------------------------------
 
+class DecryptionError(ProjexError):
+    """ Thrown when encrypted data is invalid or fails authentication. """
+    pass
+
+
 class DependencyNotFoundError(ProjexError):
     """ Thrown when a dependent module is attempted to be imported. """
 
@@ -7,6 +7,13 @@ printer wrapper while providing a queue based call to processing events.
 Similar to the logging handling system, except works with the unknown
 exceptions and printed values as well.
 
+Exception hooks are called on the thread that raised, before the traceback
+is printed, so they are free to use UI code.  Stream hooks are not called on
+the thread that printed -- writes are posted to a bounded queue and delivered
+from a background <HookDispatcher> thread, with consecutive writes to a
+stream batched into a single hook call.  Any pending writes are flushed when
+the process exits.
+
 :usage      |>>> from projex import hooks
             |>>> def email_error(cls, error, trace):
             |...    error = hooks.formatExcept(cls, error, trace)
@@ -22,12 +29,130 @@ exceptions and printed values as well.
             |>>> hooks.registerExcept(email_error)
 """
 
+import atexit
+import itertools
+import threading
 import weakref
 import sys
 import traceback
 
+from projex.enum import enum
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+QueuePolicy = enum('Block', 'Drop')
+
 _displayhooks = None
 _excepthooks = None
+_dispatcher = None
+
+
+class HookDispatcher(object):
+    """
+    Delivers stream hook events from a background thread.  Events are posted
+    to a bounded queue -- when the queue is full, the policy determines whether
+    the posting thread blocks until there is room or the event is dropped.
+    Consecutive writes to the same stream are joined into a single call to
+    each of its hooks.
+
+    :param      maxsize   | <int> | maximum number of queued events
+                policy    | <QueuePolicy>
+                batchSize | <int> | maximum number of events per batch
+    """
+    def __init__(self, maxsize=1000, policy=QueuePolicy.Block, batchSize=100):
+        self._queue = queue.Queue(maxsize)
+        self._policy = policy
+        self._batchSize = batchSize
+        self._dropped = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _process(self, events):
+        """
+        Delivers a batch of events, grouping consecutive stream writes.
+
+        :param      events | [(<StreamHooks>, <str>), ..]
+        """
+        for target, group in itertools.groupby(events, key=lambda x: x[0]):
+            try:
+                target.dispatch(''.join(text for _, text in group))
+            except StandardError:
+                traceback.print_exc(file=sys.__stderr__)
+
+    def _run(self):
+        """
+        Processes the queued events until the process exits.
+        """
+        while True:
+            events = [self._queue.get()]
+            while len(events) < self._batchSize:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._process(events)
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+
+    def dropped(self):
+        """
+        Returns the number of events that were dropped because the queue was
+        full.
+
+        :return     <int>
+        """
+        return self._dropped
+
+    def flush(self):
+        """
+        Blocks until all of the queued events have been delivered.
+        """
+        if self._thread is not None and not self.isDispatchThread():
+            self._queue.join()
+
+    def isDispatchThread(self):
+        """
+        Returns whether or not the current thread is this dispatcher's thread.
+
+        :return     <bool>
+        """
+        return threading.current_thread() is self._thread
+
+    def post(self, target, event):
+        """
+        Queues the event to be delivered.  Events posted from the dispatch
+        thread itself (for instance, a hook that prints) are ignored so hooks
+        never trigger one another.
+
+        :param      target | <StreamHooks>
+                    event  | <str>
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run,
+                                              name='HookDispatcher')
+                    thread.daemon = True
+                    thread.start()
+                    self._thread = thread
+                    atexit.register(self.flush)
+
+        elif self.isDispatchThread():
+            return
+
+        if self._policy == QueuePolicy.Drop:
+            try:
+                self._queue.put_nowait((target, event))
+            except queue.Full:
+                self._dropped += 1
+        else:
+            self._queue.put((target, event))
 
 
 class StreamHooks(object):
@@ -45,25 +170,70 @@ class StreamHooks(object):
         self.hooks = []
         self.stream = stream
 
-    def write(self, text):
-        new_hooks = []
-        for hook_ref in self.hooks:
+    def dispatch(self, text):
+        """
+        Calls the registered hooks with the inputted text, dropping any
+        references to hooks that no longer exist.
+
+        :param      text | <str>
+        """
+        expired = False
+        for hook_ref in list(self.hooks):
             hook = hook_ref()
             if hook:
                 hook(text)
-                new_hooks.append(hook_ref)
+            else:
+                expired = True
 
-        self.hooks = new_hooks
+        if expired:
+            self.hooks = [ref for ref in self.hooks if ref() is not None]
 
+    def write(self, text):
         # write to the original stream
         try:
             self.stream.write(text)
         except StandardError:
             pass
 
+        if self.hooks:
+            dispatcher().post(self, text)
+
 
 # ----------------------------------------------------------------------
 
+def _callExceptHooks(cls, error, trace):
+    """
+    Runs all of the registered exception hook methods, dropping any references
+    to hooks that no longer exist.
+
+    :param      cls     | <type>
+                error   | <str>
+                trace   | <traceback>
+    """
+    global _excepthooks
+    new_hooks = []
+
+    for hook_ref in _excepthooks:
+        hook = hook_ref()
+        if hook:
+            hook(cls, error, trace)
+            new_hooks.append(hook_ref)
+
+    _excepthooks = new_hooks
+
+
+def dispatcher():
+    """
+    Returns the dispatcher used to deliver stream hooks.
+
+    :return     <HookDispatcher>
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = HookDispatcher()
+    return _dispatcher
+
+
 def displayhook(value):
     """
     Runs all of the registered display hook methods with the given value.
@@ -87,24 +257,25 @@ def displayhook(value):
 
 def excepthook(cls, error, trace):
     """
-    Runs all of the registered exception hook methods with the given value.
-    Look at the sys.excepthook documentation for more information.
+    Runs all of the registered exception hook methods with the given value
+    on the raising thread.  Look at the sys.excepthook documentation for
+    more information.
     
     :param      cls     | <type>
                 error   | <str>
                 trace   | <traceback>
     """
-    global _excepthooks
-    new_hooks = []
+    if _excepthooks:
+        _callExceptHooks(cls, error, trace)
+    sys.__excepthook__(cls, error, trace)
 
-    for hook_ref in _excepthooks:
-        hook = hook_ref()
-        if hook:
-            hook(cls, error, trace)
-            new_hooks.append(hook_ref)
 
-    _excepthook = new_hooks
-    sys.__excepthook__(cls, error, trace)
+def flush():
+    """
+    Blocks until all of the pending stream hooks have run.
+    """
+    if _dispatcher is not None:
+        _dispatcher.flush()
 
 
 def formatExcept(cls, error, trace):
@@ -185,6 +356,19 @@ def registerStdOut(func):
         sys.stdout.hooks.append(ref)
 
 
+def setDispatcher(hookDispatcher):
+    """
+    Sets the dispatcher used to deliver stream hooks, flushing
+    the current one first.  Use this to configure the queue size, full queue
+    policy and batching.
+
+    :param      hookDispatcher | <HookDispatcher>
+    """
+    global _dispatcher
+    flush()
+    _dispatcher = hookDispatcher
+
+
 def setup():
     """
     Initializes the hook queues for the sys module.  This method will
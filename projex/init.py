@@ -107,8 +107,7 @@ def importfile(filename):
     pkg = packageFromPath(filename, includeModule=True)
     root = packageRootPath(filename)
 
-    if root not in sys.path:
-        sys.path.insert(0, root)
+    environ().pushPaths([root], move=False)
 
     __import__(pkg)
     return sys.modules[pkg]
@@ -157,11 +156,7 @@ def importmodules(package_or_toc, ignore=None, recurse=False, silent=None):
         # import from a directory
         elif os.path.isdir(package_or_toc):
             toc, paths = findmodules(package_or_toc, recurse=recurse)
-            for path in paths:
-                if path in sys.path:
-                    sys.path.remove(path)
-
-                sys.path.insert(0, path)
+            environ().pushPaths(list(reversed(paths)))
 
         # import a module by string
         else:
@@ -208,14 +203,13 @@ def importmodules(package_or_toc, ignore=None, recurse=False, silent=None):
                 except AttributeError:
                     paths = []
 
+            sub_paths = []
             for path in paths:
                 data = findmodules(path, recurse=recurse)
                 toc += data[0]
-                for sub_path in data[1]:
-                    if sub_path in sys.path:
-                        sys.path.remove(sub_path)
+                sub_paths[:0] = reversed(data[1])
 
-                    sys.path.insert(0, sub_path)
+            environ().pushPaths(sub_paths)
 
             setattr(package_or_toc, '__toc__', toc)
 
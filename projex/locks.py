@@ -4,10 +4,16 @@ Defines useful thread locks.  Credit for this code goes to:
 http://code.activestate.com/recipes/577803-reader-writer-lock-with-priority-for-writers/
 """
 
+import collections
 import datetime
 import logging
 import threading
 
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
 log = logging.getLogger(__name__)
 
 
@@ -65,24 +71,193 @@ class ReadWriteLock(object):
         self.__write_switch.release(self.__no_readers)
 
 
+class _AsyncAcquire(object):
+    """
+    Awaitable returned when acquiring an AsyncReadWriteLock.  If the awaiting
+    task is cancelled, the request is withdrawn from the queue, or released
+    again if it had already been granted, so the lock never leaks.
+    """
+    def __init__(self, lock, write):
+        self._lock = lock
+        self._write = write
+
+    def __await__(self):
+        waiter = self._lock._request(self._write)
+        if waiter is None:
+            return
+
+        try:
+            while not waiter.done():
+                waiter._asyncio_future_blocking = True
+                yield waiter
+        except BaseException:
+            self._lock._abandon(waiter, self._write)
+            raise
+
+    __iter__ = __await__
+
+
+class _AsyncRelease(object):
+    """ Awaitable returned from the asynchronous context exits. """
+    def __await__(self):
+        return iter(())
+
+
+class AsyncReadWriteLock(object):
+    """
+    Asyncio compatible version of the ReadWriteLock.  Multiple readers can
+    share the lock while a single writer holds it exclusively, and waiting
+    writers take priority over new readers.  The acquire methods return
+    awaitables, so this lock should be used with the `async with` form of
+    the ReadLocker and WriteLocker contexts.
+
+    :usage      |lock = AsyncReadWriteLock()
+                |
+                |async def lookup(key):
+                |   async with ReadLocker(lock):
+                |       return cache.get(key)
+    """
+    def __init__(self):
+        if asyncio is None:
+            raise RuntimeError('AsyncReadWriteLock requires asyncio.')
+
+        self.__readers = 0
+        self.__writing = False
+        self.__waiting_readers = collections.deque()
+        self.__waiting_writers = collections.deque()
+
+    def _abandon(self, waiter, write):
+        """
+        Withdraws a request whose awaiting task was interrupted.
+
+        :param      waiter | <asyncio.Future>
+                    write  | <bool>
+        """
+        if waiter.done() and not waiter.cancelled():
+            if write:
+                self.writer_release()
+            else:
+                self.reader_release()
+        else:
+            waiter.cancel()
+            queue = self.__waiting_writers if write else self.__waiting_readers
+            try:
+                queue.remove(waiter)
+            except ValueError:
+                pass
+            self._wake()
+
+    def _request(self, write):
+        """
+        Grants the lock immediately when possible, otherwise queues and
+        returns a future that is resolved once the lock is granted.
+
+        :param      write | <bool>
+
+        :return     <asyncio.Future> || None
+        """
+        if write:
+            if not (self.__writing or self.__readers):
+                self.__writing = True
+                return None
+            queue = self.__waiting_writers
+        else:
+            if not (self.__writing or self.__waiting_writers):
+                self.__readers += 1
+                return None
+            queue = self.__waiting_readers
+
+        waiter = asyncio.get_event_loop().create_future()
+        queue.append(waiter)
+        return waiter
+
+    def _wake(self):
+        """
+        Hands the lock off to the next waiting writer, or to all of the
+        waiting readers when no writers are queued.
+        """
+        if self.__writing:
+            return
+
+        elif self.__waiting_writers:
+            if self.__readers:
+                return
+
+            while self.__waiting_writers:
+                waiter = self.__waiting_writers.popleft()
+                if not waiter.done():
+                    self.__writing = True
+                    waiter.set_result(True)
+                    return
+
+        while self.__waiting_readers:
+            waiter = self.__waiting_readers.popleft()
+            if not waiter.done():
+                self.__readers += 1
+                waiter.set_result(True)
+
+    def reader_acquire(self):
+        return _AsyncAcquire(self, False)
+
+    def reader_release(self):
+        self.__readers -= 1
+        if not self.__readers:
+            self._wake()
+
+    def writer_acquire(self):
+        return _AsyncAcquire(self, True)
+
+    def writer_release(self):
+        self.__writing = False
+        self._wake()
+
+
+def _checkSync(lock):
+    """
+    Raises a TypeError if the inputted lock can only be acquired
+    asynchronously, as a plain `with` statement would not acquire it.
+
+    :param      lock | <ReadWriteLock> || <AsyncReadWriteLock>
+    """
+    if isinstance(lock, AsyncReadWriteLock):
+        raise TypeError('An AsyncReadWriteLock must be acquired with '
+                        '`async with`, not `with`.')
+
+
 class ReadLocker(object):
     def __init__(self, lock):
         self._lock = lock
 
     def __enter__(self):
+        _checkSync(self._lock)
         self._lock.reader_acquire()
 
     def __exit__(self, *args):
         self._lock.reader_release()
 
+    def __aenter__(self):
+        return self._lock.reader_acquire()
+
+    def __aexit__(self, *args):
+        self._lock.reader_release()
+        return _AsyncRelease()
+
 
 class WriteLocker(object):
     def __init__(self, lock, delay=None):
         self._lock = lock
 
     def __enter__(self):
+        _checkSync(self._lock)
         start = datetime.datetime.now()
         self._lock.writer_acquire()
 
     def __exit__(self, *args):
-        self._lock.writer_release()
\ No newline at end of file
+        self._lock.writer_release()
+
+    def __aenter__(self):
+        return self._lock.writer_acquire()
+
+    def __aexit__(self, *args):
+        self._lock.writer_release()
+        return _AsyncRelease()
\ No newline at end of file
@@ -132,6 +132,39 @@ def render(text,
         logger.debug('mako is not installed.')
         return text if default is None else default
 
+    templ = compileText(text, templatePaths, silent=silent)
+    if templ is None:
+        return text if default is None else default
+
+    try:
+        output = templ.render(**scope(options))
+    except StandardError:
+        if raiseErrors:
+            raise
+        output = text if default is None else default
+        if not silent:
+            logger.exception('Error rendering mako text')
+        return output
+
+    return output
+
+
+def compileText(text, templatePaths=None, silent=False):
+    """
+    Compiles the inputted text to a mako template.  Compiled templates can
+    be rendered any number of times, from any thread, with a scope
+    generated by the scope method.
+
+    :param      text          | <str>
+                templatePaths | [<str>, ..] || None
+                silent        | <bool>
+
+    :return     <mako.template.Template> || None
+    """
+    if not mako:
+        logger.debug('mako is not installed.')
+        return None
+
     if templatePaths is None:
         templatePaths = []
 
@@ -144,44 +177,37 @@ def render(text,
 
     templatePaths += basetempls
 
-    # update the default options
-    scope = dict(os.environ)
+    try:
+        if templatePaths:
+            lookup = mako.lookup.TemplateLookup(directories=templatePaths)
+            return mako.template.Template(text, lookup=lookup)
+        else:
+            return mako.template.Template(text)
+    except StandardError:
+        if not silent:
+            logger.exception('Error compiling mako text')
+        return None
 
-    scope['projex_text'] = projex.text
-    scope['date'] = date
-    scope['datetime'] = datetime
-    scope.update(_macros)
 
-    if options is not None:
-        scope.update(options)
+def scope(options=None):
+    """
+    Returns the variables that templates are rendered with, which are the
+    environment variables and registered macros along with the inputted
+    options.
 
-    if templatePaths:
-        lookup = mako.lookup.TemplateLookup(directories=templatePaths)
-        try:
-            templ = mako.template.Template(text, lookup=lookup)
-        except StandardError:
-            output = text if default is None else default
-            if not silent:
-                logger.exception('Error compiling mako text')
-            return output
-    else:
-        try:
-            templ = mako.template.Template(text)
-        except StandardError:
-            output = text if default is None else default
-            if not silent:
-                logger.exception('Error compiling mako text')
-            return output
+    :param      options | <dict> || None
 
-    try:
-        output = templ.render(**scope)
-    except StandardError:
-        if raiseErrors:
-            raise
-        output = text if default is None else default
-        if not silent:
-            logger.exception('Error rendering mako text')
-        return output
+    :return     <dict>
+    """
+    output = dict(os.environ)
+
+    output['projex_text'] = projex.text
+    output['date'] = date
+    output['datetime'] = datetime
+    output.update(_macros)
+
+    if options is not None:
+        output.update(options)
 
     return output
 
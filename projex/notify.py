@@ -2,11 +2,15 @@
 
 import base64
 import datetime
+import mimetypes
 import os
 import re
 import socket
 import smtplib
 import logging
+import threading
+import time
+import uuid
 
 import projex.text
 
@@ -38,6 +42,11 @@ logger = logging.getLogger(__name__)
 
 from projex import errors
 
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
 NOTIFY_SERVER = os.getenv('PROJEX_NOTIFY_SERVER', 'localhost')
 NOTIFY_SERVER_MSX = os.getenv('PROJEX_NOTIFY_SERVER_MSX', 'False') == 'True'
 NOTIFY_IM_DOMAIN_SENDER = os.getenv('PROJEX_NOTIFY_IM_DOMAIN_SENDER', '')
@@ -100,25 +109,416 @@ def connectMSExchange(server):
     return True, ''
 
 
-def sendEmail(sender,
-              recipients,
-              subject,
-              body,
-              attachments=None,
-              cc=None,
-              bcc=None,
-              contentType='text/html',
-              server=None,
-              useMSExchange=None,
-              encoding='utf-8',
-              raiseErrors=False):
+class StreamingMessage(object):
     """
-    Sends an email from the inputted email address to the
-    list of given recipients with the inputted subject and
-    body.  This will also attach the inputted list of
-    attachments to the email.  The server value will default 
-    to mail.<sender_domain> and you can use a ':' to specify 
-    a port for the server.
+    Email message whose file attachments are read and base64 encoded in
+    chunks while the message is being sent, rather than being loaded into
+    memory up front.  The MIME structure is generated as usual, using small
+    placeholders in place of the file payloads, and the files are streamed
+    in when the placeholders are reached.  This keeps memory use constant
+    regardless of the size of the attachments.
+    """
+    ChunkSize = 57 * 1024  # multiple of 57 bytes, which encode to full lines
+
+    def __init__(self, message=None):
+        self._message = message
+        self._files = {}
+
+    def __getitem__(self, key):
+        return self._message[key]
+
+    def __setitem__(self, key, value):
+        self._message[key] = value
+
+    def _encodeFile(self, filename):
+        """
+        Yields the base64 encoded contents of the inputted file as CRLF
+        separated lines, reading a chunk of the file at a time.
+
+        :param      filename | <str>
+
+        :return     <generator>
+        """
+        prefix = ''
+        with open(nstr(filename), 'rb') as f:
+            while True:
+                data = f.read(self.ChunkSize)
+                if not data:
+                    break
+
+                encoded = base64.b64encode(data)
+                lines = [encoded[i:i + 76] for i in xrange(0, len(encoded), 76)]
+                yield prefix + '\r\n'.join(lines)
+                prefix = '\r\n'
+
+    def chunks(self):
+        """
+        Yields the data for this message as it should be sent to an email
+        server for the DATA command -- with CRLF line endings and dot
+        stuffing already applied.
+
+        :return     <generator>
+        """
+        text = self._message.as_string()
+        if not self._files:
+            yield smtplib.quotedata(text)
+            return
+
+        tokens = '|'.join(re.escape(token) for token in self._files)
+        for section in re.split('({0})'.format(tokens), text):
+            filename = self._files.get(section)
+            if filename is not None:
+                for chunk in self._encodeFile(filename):
+                    yield chunk
+            elif section:
+                yield smtplib.quotedata(section)
+
+    def files(self):
+        """
+        Returns the files that are streamed into this message.
+
+        :return     [<str>, ..]
+        """
+        return self._files.values()
+
+    def message(self):
+        """
+        Returns the MIME structure for this message.
+
+        :return     <email.message.Message>
+        """
+        return self._message
+
+    def placeholder(self, filename):
+        """
+        Returns a placeholder payload that will be replaced by the encoded
+        contents of the inputted file when this message is sent.
+
+        :param      filename | <str>
+
+        :return     <str>
+        """
+        token = '<projex-stream-{0}>'.format(uuid.uuid4().hex)
+        self._files[token] = filename
+        return token
+
+    def setMessage(self, message):
+        """
+        Sets the MIME structure for this message.
+
+        :param      message | <email.message.Message>
+        """
+        self._message = message
+
+    def validate(self):
+        """
+        Makes sure that each of the files for this message can be read,
+        raising an IOError if one cannot, so that a missing file is found
+        before any data is sent to the server.
+        """
+        for filename in self._files.values():
+            with open(nstr(filename), 'rb'):
+                pass
+
+
+class SMTPPool(object):
+    """
+    Pool of authenticated connections to an email server.  Connections are
+    returned to the pool after a message is sent and reused by the next send,
+    so bursts of email only pay for connecting (and for the MS Exchange NTLM
+    handshake) once.  Connections that have sat idle for longer than the idle
+    timeout are closed rather than reused, and socket operations on a
+    connection give up after the socket timeout.
+
+    :usage      |>>> import projex.notify
+                |>>> pool = projex.notify.SMTPPool('mail.server.com:25')
+                |>>> pool.send('me@domain.com', ['you@domain.com'], msg)
+    """
+    def __init__(self,
+                 server=None,
+                 useMSExchange=None,
+                 maxConnections=4,
+                 idleTimeout=60,
+                 timeout=60):
+        if server is None:
+            server = NOTIFY_SERVER
+        if useMSExchange is None:
+            useMSExchange = NOTIFY_SERVER_MSX
+
+        self._server = nstr(server)
+        self._useMSExchange = useMSExchange
+        self._maxConnections = maxConnections
+        self._idleTimeout = idleTimeout
+        self._timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _close(self, connection):
+        """
+        Closes the inputted connection, ignoring any errors from a connection
+        that the server has already dropped.
+
+        :param      connection | <smtplib.SMTP>
+        """
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def _connect(self):
+        """
+        Creates a new connection to the email server.
+
+        :return     <smtplib.SMTP>
+        """
+        connection = smtplib.SMTP(self._server, timeout=self._timeout)
+
+        # connect to a microsoft exchange server if specified
+        if self._useMSExchange:
+            success, response = connectMSExchange(connection)
+            if not success:
+                logger.debug('Could not connect to MS Exchange: ' + response)
+
+        return connection
+
+    def _sendStream(self, connection, sender, recipients, msg):
+        """
+        Sends a streaming message through the inputted connection, writing
+        its data to the server a chunk at a time.
+
+        :param      connection  | <smtplib.SMTP>
+                    sender      | <str>
+                    recipients  | [<str>, ..]
+                    msg         | <StreamingMessage>
+        """
+        # check the files before the server is waiting on the message data
+        msg.validate()
+
+        connection.ehlo_or_helo_if_needed()
+
+        code, response = connection.mail(sender)
+        if code != 250:
+            connection.rset()
+            raise smtplib.SMTPSenderRefused(code, response, sender)
+
+        refused = {}
+        for recipient in recipients:
+            code, response = connection.rcpt(recipient)
+            if code not in (250, 251):
+                refused[recipient] = (code, response)
+
+        if len(refused) == len(recipients):
+            connection.rset()
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+        code, response = connection.docmd('data')
+        if code != 354:
+            connection.rset()
+            raise smtplib.SMTPDataError(code, response)
+
+        # the server cannot take any other command until the data is
+        # finished, so drop the connection if the data fails part way
+        try:
+            last = ''
+            for chunk in msg.chunks():
+                connection.send(chunk)
+                last = chunk or last
+
+            connection.send('.\r\n' if last.endswith('\r\n') else '\r\n.\r\n')
+        except Exception:
+            connection.close()
+            raise
+
+        code, response = connection.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, response)
+
+        return refused
+
+    def acquire(self):
+        """
+        Returns an idle connection from the pool, or a new connection if none
+        are available.
+
+        :return     <smtplib.SMTP>
+        """
+        with self._lock:
+            while self._idle:
+                connection, released = self._idle.pop()
+                if time.time() - released < self._idleTimeout:
+                    return connection
+                self._close(connection)
+
+        return self._connect()
+
+    def close(self):
+        """
+        Closes all of the idle connections in this pool.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for connection, _ in idle:
+            self._close(connection)
+
+    def release(self, connection, broken=False):
+        """
+        Returns the connection to the pool.  Connections over the pool limit
+        are closed instead.  Broken connections are dropped without sending
+        QUIT, as the server may still be waiting on an earlier command.
+
+        :param      connection | <smtplib.SMTP>
+                    broken     | <bool>
+        """
+        if broken:
+            connection.close()
+            return
+
+        with self._lock:
+            if len(self._idle) < self._maxConnections:
+                self._idle.append((connection, time.time()))
+                return
+
+        self._close(connection)
+
+    def send(self, sender, recipients, msg):
+        """
+        Sends the message using a pooled connection.  If the server dropped
+        a reused connection, the message is sent again on a new one.
+
+        :param      sender      | <str>
+                    recipients  | [<str>, ..]
+                    msg         | <email.message.Message> || <StreamingMessage>
+        """
+        streaming = isinstance(msg, StreamingMessage)
+        if not streaming:
+            data = msg.as_string()
+
+        for attempt in range(2):
+            connection = self.acquire()
+            try:
+                if streaming:
+                    self._sendStream(connection, sender, recipients, msg)
+                else:
+                    connection.sendmail(sender, recipients, data)
+            except smtplib.SMTPServerDisconnected:
+                self.release(connection, broken=True)
+                if attempt:
+                    raise
+            except Exception:
+                self.release(connection, broken=True)
+                raise
+            else:
+                self.release(connection)
+                return
+
+    def server(self):
+        """
+        Returns the server this pool connects to.
+
+        :return     <str>
+        """
+        return self._server
+
+
+class EmailQueue(object):
+    """
+    Sends email from a background thread so that callers never wait on the
+    email server.  Messages that fail to send are retried with an exponential
+    backoff before the failure is logged.
+
+    :usage      |>>> import projex.notify
+                |>>> emails = projex.notify.EmailQueue()
+                |>>> emails.post('me@domain.com', ['you@domain.com'],
+                |...             'Build Failed', 'See the log for details')
+    """
+    def __init__(self, pool=None, retries=3, backoff=1.0, maxBackoff=60):
+        self._pool = pool
+        self._retries = retries
+        self._backoff = backoff
+        self._maxBackoff = maxBackoff
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        """
+        Sends the queued messages until the process exits.
+        """
+        while True:
+            args, kwds = self._queue.get()
+            try:
+                self._send(args, kwds)
+            finally:
+                self._queue.task_done()
+
+    def _send(self, args, kwds):
+        """
+        Sends a single message, retrying on failure.
+
+        :param      args | <tuple>
+                    kwds | <dict>
+        """
+        kwds['raiseErrors'] = True
+        if self._pool is not None:
+            kwds['pool'] = self._pool
+
+        for attempt in range(self._retries + 1):
+            try:
+                sendEmail(*args, **kwds)
+            except Exception, err:
+                if attempt == self._retries:
+                    logger.error('Failed to send email: {0}'.format(err))
+                    return
+
+                delay = min(self._backoff * 2 ** attempt, self._maxBackoff)
+                logger.debug('Retrying email in {0}s: {1}'.format(delay, err))
+                time.sleep(delay)
+            else:
+                return
+
+    def join(self):
+        """
+        Blocks until all of the queued messages have been processed.
+        """
+        self._queue.join()
+
+    def post(self, *args, **kwds):
+        """
+        Queues a message to be sent.  The arguments are the same as for the
+        sendEmail method.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='EmailQueue')
+                self._thread.daemon = True
+                self._thread.start()
+
+        self._queue.put((args, kwds))
+
+
+# ----------------------------------------------------------------------
+
+_pools = {}
+_poolsLock = threading.Lock()
+
+
+def createEmail(sender,
+                recipients,
+                subject,
+                body,
+                attachments=None,
+                cc=None,
+                bcc=None,
+                contentType='text/html',
+                encoding='utf-8',
+                stream=False):
+    """
+    Creates the MIME message for the inputted email information.  This will
+    attach the inputted list of attachments to the email, as well as any
+    local images referenced from the body.  When streaming, the attachment
+    files are not read here -- they are encoded as the message is sent.
     
     :param      sender          <str>
     :param      recipients      <list> [ <str>, .. ]
@@ -128,43 +528,15 @@ def sendEmail(sender,
     :param      cc              <list> [ <str>, .. ]
     :param      bcc             <list> [ <str>, .. ]
     :param      contentType     <str>
-    :param      server          <str>
+    :param      encoding        <str>
+    :param      stream          <bool>
     
-    :return     <bool> success
+    :return     <email.mime.multipart.MIMEMultipart> || <StreamingMessage>
     """
-    if attachments is None:
-        attachments = []
-    if cc is None:
-        cc = []
-    if bcc is None:
-        bcc = []
-
-    if server is None:
-        server = NOTIFY_SERVER
-    if useMSExchange is None:
-        useMSExchange = NOTIFY_SERVER_MSX
-
-    # normalize the data
-    sender = nstr(sender)
-    recipients = map(nstr, recipients)
-
-    # make sure we have valid information
-    if not isEmail(sender):
-        err = errors.NotifyError('%s is not a valid email address' % sender)
-        logger.error(err)
-        return False
-
-    # make sure there are recipients
-    if not recipients:
-        err = errors.NotifyError('No recipients were supplied.')
-        logger.error(err)
-        return False
-
-    # build the server domain
-    if not server:
-        err = errors.NotifyError('No email server specified')
-        logger.error(err)
-        return False
+    attachments = list(attachments or [])
+    streaming = StreamingMessage() if stream else None
+    cc = cc or []
+    bcc = bcc or []
 
     # create the email
     msg = MIMEMultipart(_subtype='related')
@@ -193,9 +565,15 @@ def sendEmail(sender,
             bodyhtml = bodyhtml.replace(filename, cid)
 
             # add the image to the attachments
-            fp = open(nstr(filename), 'rb')
-            msgImage = MIMEImage(fp.read())
-            fp.close()
+            if streaming:
+                mimetype = mimetypes.guess_type(filename)[0] or 'image/png'
+                msgImage = MIMEBase(*mimetype.split('/', 1))
+                msgImage['Content-Transfer-Encoding'] = 'base64'
+                msgImage.set_payload(streaming.placeholder(filename))
+            else:
+                fp = open(nstr(filename), 'rb')
+                msgImage = MIMEImage(fp.read())
+                fp.close()
 
             # add the msg image to the msg
             content_id = '<%s>' % os.path.basename(filename)
@@ -212,12 +590,16 @@ def sendEmail(sender,
 
     # include attachments
     for attach in attachments:
-        fp = open(nstr(attach), 'rb')
         txt = MIMEBase('application', 'octet-stream')
-        txt.set_payload(fp.read())
-        fp.close()
+        if streaming:
+            txt['Content-Transfer-Encoding'] = 'base64'
+            txt.set_payload(streaming.placeholder(attach))
+        else:
+            fp = open(nstr(attach), 'rb')
+            txt.set_payload(fp.read())
+            fp.close()
+            encode_base64(txt)
 
-        encode_base64(txt)
         attachment = 'attachment; filename="%s"' % os.path.basename(attach)
         txt.add_header('Content-Disposition', attachment)
         eattach.append(txt)
@@ -228,29 +610,92 @@ def sendEmail(sender,
     for attach in eattach:
         msg.attach(attach)
 
-    # create the connection to the email server
-    try:
-        smtp_server = smtplib.SMTP(nstr(server))
-    except socket.gaierror, err:
+    if streaming:
+        streaming.setMessage(msg)
+        streaming.validate()
+        return streaming
+    return msg
+
+
+def sendEmail(sender,
+              recipients,
+              subject,
+              body,
+              attachments=None,
+              cc=None,
+              bcc=None,
+              contentType='text/html',
+              server=None,
+              useMSExchange=None,
+              encoding='utf-8',
+              raiseErrors=False,
+              pool=None):
+    """
+    Sends an email from the inputted email address to the
+    list of given recipients with the inputted subject and
+    body.  This will also attach the inputted list of
+    attachments to the email.  The server value will default 
+    to mail.<sender_domain> and you can use a ':' to specify 
+    a port for the server.  Connections to the server are
+    pooled and reused between calls, and attachments are
+    streamed to the server rather than loaded into memory.
+    
+    :param      sender          <str>
+    :param      recipients      <list> [ <str>, .. ]
+    :param      subject         <str>
+    :param      body            <str>
+    :param      attachments     <list> [ <str>, .. ]
+    :param      cc              <list> [ <str>, .. ]
+    :param      bcc             <list> [ <str>, .. ]
+    :param      contentType     <str>
+    :param      server          <str>
+    :param      pool            <SMTPPool> || None
+    
+    :return     <bool> success
+    """
+    if pool is None:
+        pool = smtpPool(server, useMSExchange)
+
+    # normalize the data
+    sender = nstr(sender)
+    recipients = map(nstr, recipients)
+
+    # make sure we have valid information
+    if not isEmail(sender):
+        err = errors.NotifyError('%s is not a valid email address' % sender)
         logger.error(err)
-        if raiseErrors:
-            raise
         return False
-    except Exception, err:
+
+    # make sure there are recipients
+    if not recipients:
+        err = errors.NotifyError('No recipients were supplied.')
         logger.error(err)
-        if raiseErrors:
-            raise
         return False
 
-    # connect to a microsoft exchange server if specified
-    if useMSExchange:
-        success, response = connectMSExchange(smtp_server)
-        if not success:
-            logger.debug('Could not connect to MS Exchange: ' + response)
+    # build the server domain
+    if not pool.server():
+        err = errors.NotifyError('No email server specified')
+        logger.error(err)
+        return False
+
+    msg = createEmail(sender,
+                      recipients,
+                      subject,
+                      body,
+                      attachments=attachments,
+                      cc=cc,
+                      bcc=bcc,
+                      contentType=contentType,
+                      encoding=encoding,
+                      stream=True)
 
     try:
-        smtp_server.sendmail(sender, recipients, msg.as_string())
-        smtp_server.close()
+        pool.send(sender, recipients, msg)
+    except socket.gaierror, err:
+        logger.error(err)
+        if raiseErrors:
+            raise
+        return False
     except Exception, err:
         logger.error(err)
         if raiseErrors:
@@ -260,6 +705,23 @@ def sendEmail(sender,
     return True
 
 
+def sendEmails(messages, server=None, useMSExchange=None, raiseErrors=False):
+    """
+    Sends multiple emails over a shared server connection.  Each message is
+    a dictionary of the keyword arguments for the sendEmail method.
+    
+    :param      messages        <list> [ <dict>, .. ]
+    :param      server          <str>
+    :param      useMSExchange   <bool> || None
+    :param      raiseErrors     <bool>
+    
+    :return     <list> [ <bool> success, .. ]
+    """
+    pool = smtpPool(server, useMSExchange)
+    return [sendEmail(raiseErrors=raiseErrors, pool=pool, **message)
+            for message in messages]
+
+
 def sendJabber(sender,
                password,
                receivers,
@@ -341,4 +803,27 @@ def isEmail(address):
     :return     <bool> success
     """
     check = re.compile('^[\w\-_\.]+@\w+\.\w+$|^.*\<[\w\-_\.]+@\w+\.\w+\>$')
-    return check.match(nstr(address)) is not None
\ No newline at end of file
+    return check.match(nstr(address)) is not None
+
+
+def smtpPool(server=None, useMSExchange=None):
+    """
+    Returns the shared connection pool for the inputted server.
+    
+    :param      server          <str> || None
+    :param      useMSExchange   <bool> || None
+    
+    :return     <SMTPPool>
+    """
+    if server is None:
+        server = NOTIFY_SERVER
+    if useMSExchange is None:
+        useMSExchange = NOTIFY_SERVER_MSX
+
+    key = (nstr(server), useMSExchange)
+    with _poolsLock:
+        try:
+            return _pools[key]
+        except KeyError:
+            pool = _pools[key] = SMTPPool(server, useMSExchange)
+            return pool
@@ -361,10 +361,7 @@ class Plugin(object):
             base_path = os.path.normpath(projex.packageRootPath(path))
 
             # make sure it is at the front of the path
-            if base_path in sys.path:
-                sys.path.remove(base_path)
-
-            sys.path.insert(0, base_path)
+            projex.environ().pushPaths([base_path])
             processed = ['__init__']
 
             # load support for registries
@@ -604,10 +601,7 @@ class PluginProxy(Plugin):
         package = projex.packageFromPath(module_path)
         path = os.path.normpath(projex.packageRootPath(module_path))
 
-        if path in sys.path:
-            sys.path.remove(path)
-
-        sys.path.insert(0, path)
+        projex.environ().pushPaths([path])
 
         try:
             __import__(package)
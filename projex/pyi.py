@@ -1,18 +1,158 @@
-""" 
+"""
 Defines helper methods for the PyInstaller utility
 """
 
+import ast
+import hashlib
+import json
+import logging
 import os
 import projex
 import sys
+import tempfile
+
+log = logging.getLogger(__name__)
+
+IGNORE_FOLDERS = ('.svn', '.git', '.hg')
+
+# in memory results for the collections run in this process
+_collectCache = {}
+
+
+def _cacheFile(basepath, exclude, processPlugins):
+    """
+    Returns the file used to store the collected results for the inputted
+    options between runs.
+
+    :param      basepath       | <str>
+                exclude        | [<str>, ..]
+                processPlugins | <bool>
+
+    :return     <str>
+    """
+    key = json.dumps([basepath, sorted(exclude), processPlugins])
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(tempfile.gettempdir(), 'projex-pyi', digest + '.json')
+
+
+def _loadCache(basepath, exclude, processPlugins):
+    """
+    Returns the previously collected results for the inputted options if
+    none of the folders (or plugin files) that they were collected from
+    have been modified since.
 
+    :param      basepath       | <str>
+                exclude        | [<str>, ..]
+                processPlugins | <bool>
 
-def collect(basepath, exclude=None, processPlugins=True):
+    :return     ([<str> pkg, ..], [(<str> path, <str> relpath), ..]) || None
     """
-    Collects all the packages associated with the inputted filepath.
-    
-    :param      module | <module>
-    
+    key = (basepath, tuple(sorted(exclude)), processPlugins)
+    data = _collectCache.get(key)
+    if data is None:
+        try:
+            with open(_cacheFile(basepath, exclude, processPlugins), 'r') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    # the folder mtimes change whenever an entry is added, removed or renamed
+    for path, mtime in data['stamps']:
+        try:
+            if os.stat(path).st_mtime != mtime:
+                return None
+        except OSError:
+            return None
+
+    _collectCache[key] = data
+    return list(data['imports']), [tuple(x) for x in data['datas']]
+
+
+def _recurse(filename):
+    """
+    Returns the __recurse__ value defined by the inputted plugins file.  The
+    source is parsed rather than imported, and the module is only imported
+    when the value is not a literal.
+
+    :param      filename | <str>
+
+    :return     <variant>
+    """
+    with open(filename, 'r') as f:
+        source = f.read()
+
+    try:
+        tree = ast.parse(source, filename)
+    except SyntaxError:
+        tree = None
+
+    if tree is not None:
+        recurse = False
+        for node in tree.body:
+            if not isinstance(node, ast.Assign):
+                continue
+            elif not any(isinstance(x, ast.Name) and x.id == '__recurse__' for x in node.targets):
+                continue
+
+            try:
+                recurse = ast.literal_eval(node.value)
+            except ValueError:
+                break
+        else:
+            return recurse
+
+    # fallback to importing the plugins module
+    package = projex.packageFromPath(filename) + '.__plugins__'
+    pkgpath = projex.packageRootPath(filename)
+
+    projex.environ().pushPaths([pkgpath], move=False)
+
+    __import__(package)
+    pkg = sys.modules[package]
+
+    return getattr(pkg, '__recurse__', False)
+
+
+def _saveCache(basepath, exclude, processPlugins, stamps, imports, datas):
+    """
+    Stores the collected results for the inputted options.
+
+    :param      basepath       | <str>
+                exclude        | [<str>, ..]
+                processPlugins | <bool>
+                stamps         | [(<str> path, <float> mtime), ..]
+                imports        | [<str>, ..]
+                datas          | [(<str>, <str>), ..]
+    """
+    key = (basepath, tuple(sorted(exclude)), processPlugins)
+    data = {'stamps': stamps, 'imports': list(imports), 'datas': list(datas)}
+    _collectCache[key] = data
+
+    filename = _cacheFile(basepath, exclude, processPlugins)
+    try:
+        folder = os.path.dirname(filename)
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        with open(filename, 'w') as f:
+            json.dump(data, f)
+    except (IOError, OSError):
+        log.debug('Could not write the collection cache: {0}'.format(filename))
+
+
+def collect(basepath, exclude=None, processPlugins=True, cache=True):
+    """
+    Collects all the packages associated with the inputted filepath.  The
+    folders are walked once from the top down, so the package for each
+    folder is derived from its parent rather than looked up from disk.
+    When caching, the results are reused until one of the walked folders
+    or plugin files is modified.
+
+    :param      basepath       | <str>
+                exclude        | [<str>, ..] || None | data extensions to skip
+                processPlugins | <bool>
+                cache          | <bool>
+
     :return     ([<str> pkg, ..], [(<str> path, <str> relpath), ..] data)
     """
     if exclude is None:
@@ -26,58 +166,60 @@ def collect(basepath, exclude=None, processPlugins=True):
     basepath = os.path.abspath(basepath)
     baselen = len(basepath) - len(basename)
 
+    if cache:
+        results = _loadCache(basepath, exclude, processPlugins)
+        if results is not None:
+            return results
+
     plugfiles = []
+    stamps = []
+
+    # the package and nearest recursive plugin for each folder to be walked
+    state = {basepath: (projex.packageFromPath(basepath), None)}
 
     for root, folders, files in os.walk(basepath):
-        if '.svn' in root or '.git' in root:
-            continue
+        folders[:] = [x for x in folders if x not in IGNORE_FOLDERS]
+        package, recursive = state.pop(root)
+        stamps.append(root)
 
         # mark the plugins file for load
         plugdata = None
         if processPlugins and '__plugins__.py' in files:
             filename = os.path.join(root, '__plugins__.py')
-            package = projex.packageFromPath(filename) + '.__plugins__'
-            pkgpath = projex.packageRootPath(filename)
-
-            if pkgpath not in sys.path:
-                sys.path.insert(0, pkgpath)
-
-            # import the plugins module
-            __import__(package)
-            pkg = sys.modules[package]
-
-            recurse = getattr(pkg, '__recurse__', False)
-            plugdata = {'recurse': recurse,
+            plugdata = {'recurse': _recurse(filename),
                         'packages': [],
                         'path': root}
 
             plugfiles.append(plugdata)
+            if recursive is None and plugdata['recurse']:
+                recursive = plugdata
 
         # look for any recursion plugins
         else:
-            for data in plugfiles:
-                if data['recurse'] and root.startswith(data['path']):
-                    plugdata = data
-                    break
+            plugdata = recursive
+
+        for folder in folders:
+            folderpath = os.path.join(root, folder)
+            if os.path.isfile(os.path.join(folderpath, '__init__.py')):
+                subpackage = package + '.' + folder if package else folder
+            else:
+                subpackage = ''
 
-        if plugdata is not None:
-            packages = plugdata['packages']
+            state[folderpath] = (subpackage, recursive)
 
             # include package plugins
-            for folder in folders:
-                pkgpath = os.path.join(root, folder, '__init__.py')
-                if os.path.exists(pkgpath):
-                    packages.append(projex.packageFromPath(pkgpath))
+            if plugdata is not None and subpackage:
+                plugdata['packages'].append(subpackage)
 
         for file_ in files:
             module, ext = os.path.splitext(file_)
 
             # look for python modules
             if ext == '.py':
-                package_path = projex.packageFromPath(os.path.join(root, file_))
-                if not package_path:
+                if not package:
                     continue
 
+                package_path = package
                 if module != '__init__':
                     package_path += '.' + module
 
@@ -100,16 +242,24 @@ def collect(basepath, exclude=None, processPlugins=True):
         packages = plugdata['packages']
 
         plugs = ',\n'.join(map(lambda x: "r'{0}'".format(x), packages))
-        data = [
+        data = '\n'.join([
             '__recurse__ = {0}'.format(plugdata['recurse']),
             '__toc__ = [{0}]'.format(plugs)
-        ]
+        ])
 
-        # write the data to the system
-        f = open(fname, 'w')
-        f.write('\n'.join(data))
-        f.close()
+        # only write the data when it has changed, to keep the file stamps
+        with open(fname, 'r') as f:
+            changed = f.read() != data
 
-    return imports, datas
+        if changed:
+            with open(fname, 'w') as f:
+                f.write(data)
 
+        stamps.append(fname)
+
+    if cache:
+        stamps = [(path, os.stat(path).st_mtime) for path in stamps]
+        _saveCache(basepath, exclude, processPlugins, stamps, imports, datas)
+
+    return imports, datas
 
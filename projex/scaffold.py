@@ -4,6 +4,8 @@ import logging
 import os
 import re
 import tempfile
+import threading
+import time
 import zipfile
 
 from collections import OrderedDict
@@ -13,8 +15,38 @@ import projex.text
 from projex import makotext
 from .text import nativestring as nstr
 
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
 logger = logging.getLogger(__name__)
 
+# buffer size used when writing the rendered files
+WRITE_SIZE = 64 * 1024
+
+
+def _render(templ, text, scope):
+    """
+    Renders the compiled template with the inputted scope.  If the template
+    could not be compiled or rendered, the original text is returned, the
+    same as the makotext.render method.
+
+    :param      templ | <mako.template.Template> || None
+                text  | <str>
+                scope | <dict>
+
+    :return     <str>
+    """
+    if templ is None:
+        return text
+
+    try:
+        return templ.render(**scope)
+    except StandardError:
+        logger.exception('Error rendering mako text')
+        return text
+
 # ----------------------------------------------------------------------
 
 
@@ -132,6 +164,7 @@ class Scaffold(object):
         self._source = ''
         self._properties = OrderedDict()
         self._templates = {}
+        self._buildTimings = []
 
     def addProperty(self, prop):
         """
@@ -150,33 +183,45 @@ class Scaffold(object):
         """
         self._templates[template.name] = template
 
-    def build(self, outpath, structure=None):
+    def build(self, outpath, structure=None, workers=4, dryRun=False):
         """
-        Builds this scaffold out to the given filepath with the 
-        chosen structure.
-        
+        Builds this scaffold out to the given filepath with the
+        chosen structure.  The folders are created first, then each distinct
+        template is read and compiled once and the files are rendered and
+        written from a pool of worker threads.  A dry run renders every
+        file without writing anything and logs the time spent on each
+        template.
+
         :param      outpath   | <str>
                     structure | <xml.etree.ElementTree.Element> || None
+                    workers   | <int>
+                    dryRun    | <bool>
 
         :return     <bool> | success
         """
         if not os.path.exists(outpath):
             return False
 
-        opts = {'scaffold': self}
+        scope = makotext.scope({'scaffold': self})
 
         if structure is not None:
             xstruct = structure
         else:
             xstruct = self.structure()
 
-        if zipfile.is_zipfile(self.source()):
-            zfile = zipfile.ZipFile(self.source(), 'r')
-        else:
-            zfile = None
-            base = os.path.dirname(self.source())
+        # collect the folders and files to create, rendering each distinct
+        # name once
+        names = {}
+        folders = []
+        files = OrderedDict()
+
+        def render_name(text):
+            try:
+                return names[text]
+            except KeyError:
+                names[text] = _render(makotext.compileText(text), text, scope)
+                return names[text]
 
-        # build the structure information
         # noinspection PyShadowingNames
         def build_level(root, xlevel):
             # ignore the entry
@@ -185,47 +230,124 @@ class Scaffold(object):
 
             # create a folder
             if xlevel.tag == 'folder':
-                name = makotext.render(xlevel.get('name'), opts)
-                dirname = os.path.join(root, name)
-                if not os.path.exists(dirname):
-                    os.mkdir(dirname)
+                dirname = os.path.join(root, render_name(xlevel.get('name')))
+                folders.append(dirname)
 
                 for xchild in xlevel:
                     build_level(dirname, xchild)
 
-            # create a file
+            # create a file, the last entry for a path wins
             elif xlevel.tag == 'file':
-                name = makotext.render(xlevel.get('name'), opts)
-                fname = os.path.join(root, name)
-
-                # create from a template
-                templ = xlevel.get('templ')
-                if templ:
-                    if zfile:
-                        templ_str = zfile.read('templ/{0}'.format(templ))
+                fname = os.path.join(root, render_name(xlevel.get('name')))
+                files.pop(fname, None)
+                files[fname] = xlevel.get('templ') or ''
+
+        for xlevel in xstruct:
+            build_level(outpath, xlevel)
+
+        if not dryRun:
+            for dirname in folders:
+                if not os.path.exists(dirname):
+                    os.mkdir(dirname)
+
+        # read and compile each template once
+        templates = {'': (None, '')}
+        timings = OrderedDict()
+        if zipfile.is_zipfile(self.source()):
+            zfile = zipfile.ZipFile(self.source(), 'r')
+            read = lambda x: zfile.read('templ/{0}'.format(x))
+        else:
+            zfile = None
+            base = os.path.dirname(self.source())
+            read = lambda x: open(os.path.join(base, 'templ', x), 'r').read()
+
+        try:
+            for templ in files.values():
+                if templ in templates:
+                    continue
+
+                start = time.time()
+                templ_str = read(templ)
+                templates[templ] = (makotext.compileText(templ_str), templ_str)
+                timings[templ] = [0, time.time() - start, 0.0]
+        finally:
+            if zfile:
+                zfile.close()
+
+        # render and write the files from a pool of workers
+        jobs = queue.Queue()
+        lock = threading.Lock()
+        errors = []
+
+        def work():
+            while True:
+                job = jobs.get()
+                if job is None:
+                    break
+
+                fname, templ = job
+                try:
+                    if templ:
+                        start = time.time()
+                        compiled, templ_str = templates[templ]
+                        rendered = _render(compiled, templ_str, scope)
+                        rendered = rendered.replace('\r\n', '\r')
+
+                        with lock:
+                            timing = timings[templ]
+                            timing[0] += 1
+                            timing[2] += time.time() - start
                     else:
-                        templ_path = os.path.join(base, 'templ', templ)
-                        templ_str = open(templ_path, 'r').read()
+                        rendered = ''
 
-                    rendered = makotext.render(templ_str, opts)
-                    rendered = rendered.replace('\r\n', '\r')
+                    if not dryRun:
+                        with open(fname, 'w', WRITE_SIZE) as f:
+                            f.write(rendered)
+                except StandardError as err:
+                    with lock:
+                        errors.append(err)
 
-                    f = open(fname, 'w')
-                    f.write(rendered)
-                    f.close()
+        threads = []
+        for i in range(max(1, min(workers, len(files)))):
+            thread = threading.Thread(target=work)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
 
-                # create a blank file
-                else:
-                    f = open(fname, 'w')
-                    f.close()
+        for job in files.items():
+            jobs.put(job)
 
-        for xlevel in xstruct:
-            build_level(outpath, xlevel)
+        for thread in threads:
+            jobs.put(None)
+
+        for thread in threads:
+            thread.join()
+
+        self._buildTimings = [(templ, count, compiled, rendered)
+                              for templ, (count, compiled, rendered) in timings.items()]
+
+        if dryRun:
+            logger.info('Dry run of {0}: {1} folders, {2} files'.format(self.name(), len(folders), len(files)))
+            for templ, count, compiled, rendered in self._buildTimings:
+                logger.info('  {0:<40} {1:>5} files  compile {2:.3f}s  render {3:.3f}s'.format(templ,
+                                                                                             count,
+                                                                                             compiled,
+                                                                                             rendered))
+
+        if errors:
+            raise errors[0]
 
-        if zfile:
-            zfile.close()
         return True
 
+    def buildTimings(self):
+        """
+        Returns the time spent on each template during the last build, in
+        the order the templates were first used.
+
+        :return     [(<str> templ, <int> files, <float> compile secs, <float> render secs), ..]
+        """
+        return list(self._buildTimings)
+
     def description(self):
         """
         Returns the description associated with this scaffold.
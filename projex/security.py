@@ -6,7 +6,10 @@ the PyCrypto module.
 
 import base64
 import hashlib
+import hmac
 import logging
+import multiprocessing
+import multiprocessing.pool
 import os.path
 import random
 import struct
@@ -14,6 +17,7 @@ import struct
 logger = logging.getLogger(__name__)
 
 import projex.text
+from projex import errors
 from .text import nativestring as nstr
 
 
@@ -32,24 +36,493 @@ except ImportError:
     Random = None
     RSA = None
 
+BLOCK_SIZE = 16
+FILE_HEADER = struct.Struct('<Q')
+FILE_MAC_SIZE = hashlib.sha256().digest_size
+
+# segmented files: magic, original size, segment size, segment count, followed
+# by an index entry of iv, offset and encrypted length for each segment
+SEGMENT_MAGIC = b'PROJEXS1'
+SEGMENT_HEADER = struct.Struct('<8sQII')
+SEGMENT_ENTRY = struct.Struct('<16sQI')
+
+# default number of PBKDF2 iterations used when deriving keys from passwords
+KDF_ITERATIONS = 100000
+
+_inplace = None
+_kdfcache = {}
+_random = None
+
+
+def _inplaceSupported():
+    """
+    Returns whether or not the installed AES implementation can encrypt into
+    a preallocated output buffer (supported by PyCryptodome).
+
+    :return     <bool>
+    """
+    global _inplace
+    if _inplace is None:
+        try:
+            cipher = AES.new(b'\0' * BLOCK_SIZE, AES.MODE_ECB)
+            cipher.encrypt(bytearray(BLOCK_SIZE), output=bytearray(BLOCK_SIZE))
+        except TypeError:
+            _inplace = False
+        else:
+            _inplace = True
+    return _inplace
+
+
+def _randomSource():
+    """
+    Returns the shared random source used to generate IVs.
+
+    :return     <Crypto.Random._UserFriendlyRNG.RNGFile>
+    """
+    global _random
+    if _random is None:
+        _random = Random.new()
+    return _random
+
+
+def _readfull(input, view):
+    """
+    Reads from the input until the inputted buffer view is full, or the end
+    of the input is reached.
+
+    :param      input | <file>
+                view  | <memoryview>
+
+    :return     <int> | number of bytes read
+    """
+    total = 0
+    size = len(view)
+    while total < size:
+        count = input.readinto(view[total:])
+        if not count:
+            break
+        total += count
+    return total
+
+
+def _cryptSegment(task):
+    """
+    Encrypts or decrypts a single segment of a segmented file.  This is run
+    from the worker pool, so each call opens its own file handles and writes
+    its result directly to its place in the output file.
+
+    :param      task | (<bool> encrypt,
+                        <str> infile, <int> offset, <int> length,
+                        <str> outfile, <int> offset, <int> length,
+                        <str> key, <str> iv)
+    """
+    encrypt, infile, in_offset, in_length, outfile, out_offset, out_length, key, iv = task
+
+    with open(infile, 'rb') as input:
+        input.seek(in_offset)
+        data = input.read(in_length)
+
+    cipher = AES.new(key, AES.MODE_CBC, iv)
+    if encrypt:
+        padding = out_length - len(data)
+        data = cipher.encrypt(data + chr(padding) * padding)
+    else:
+        data = cipher.decrypt(data)
+
+    with open(outfile, 'r+b') as output:
+        output.seek(out_offset)
+        output.write(data[:out_length])
+
+
+def _readSegmentIndex(input):
+    """
+    Reads the header and segment index from a segmented file.
+
+    :param      input | <file>
+
+    :return     (<int> size, <int> segment size, [(<str> iv, <int> offset, <int> length), ..])
+    """
+    header = input.read(SEGMENT_HEADER.size)
+    if len(header) != SEGMENT_HEADER.size:
+        raise errors.DecryptionError('Invalid segmented file header.')
+
+    magic, size, segment_size, count = SEGMENT_HEADER.unpack(header)
+    if magic != SEGMENT_MAGIC:
+        raise errors.DecryptionError('Not a segmented encrypted file.')
+
+    data = input.read(SEGMENT_ENTRY.size * count)
+    if len(data) != SEGMENT_ENTRY.size * count:
+        raise errors.DecryptionError('Invalid segmented file index.')
+
+    index = [SEGMENT_ENTRY.unpack_from(data, i * SEGMENT_ENTRY.size) for i in xrange(count)]
+    return size, segment_size, index
+
+
+def _segmentKey(key, segment):
+    """
+    Derives the key for an individual segment from the file key.
+
+    :param      key     | <str>
+                segment | <int>
+
+    :return     <str>
+    """
+    digest = hmac.new(key, struct.pack('<Q', segment), hashlib.sha256).digest()
+    return digest[:len(key)]
+
+
+def _segmentPool(workers, processes):
+    """
+    Creates the worker pool used to process segments.
+
+    :param      workers   | <int> || None
+                processes | <bool>
+
+    :return     <multiprocessing.pool.Pool>
+    """
+    workers = workers or multiprocessing.cpu_count()
+    if processes:
+        return multiprocessing.Pool(workers)
+    return multiprocessing.pool.ThreadPool(workers)
+
+
+# ----------------------------------------------------------------------
+#                               CLASSES
+# ----------------------------------------------------------------------
+
+class Cipher(object):
+    """
+    Encryption session for encrypting and decrypting many values with the
+    same key.  The key can be supplied directly, or derived from a password
+    and salt using PBKDF2 -- derived keys are cached by salt, so creating
+    sessions for the same password is cheap after the first one.  The random
+    source used for the IVs is shared and reused for every value.
+    Values are compatible with the encrypt and decrypt functions.
+
+    :usage      |>>> from projex.security import Cipher
+                |>>> cipher = Cipher(password='secret', salt='app')
+                |>>> token = cipher.encrypt('value')
+                |>>> cipher.decrypt(token)
+                |'value'
+
+    :param      key         | <str> || None
+                password    | <str> || None
+                salt        | <str> || None
+                iterations  | <int>
+                bits        | <int>  | 16 or 32 bits
+    """
+    def __init__(self,
+                 key=None,
+                 password=None,
+                 salt=None,
+                 iterations=KDF_ITERATIONS,
+                 bits=32):
+        if key is None and password is not None:
+            key = deriveKey(password, salt or '', iterations, bits)
+        elif key is None:
+            key = ENCRYPT_KEY
+
+        self._key = key
+        self._random = _randomSource()
+
+    def check(self, a, b):
+        """
+        Checks to see if the two values are equal to each other, in constant
+        time.  If either value is encrypted with this session's key, it is
+        decrypted before being compared.
+
+        :param      a | <str>
+                    b | <str>
+
+        :return     <bool>
+        """
+        a = projex.text.toBytes(a) or b''
+        b = projex.text.toBytes(b) or b''
+
+        if hmac.compare_digest(a, b):
+            return True
+
+        for plain, encrypted in ((a, b), (b, a)):
+            try:
+                decrypted = self.decrypt(encrypted)
+            except (TypeError, ValueError, IndexError):
+                continue
+
+            if hmac.compare_digest(plain, decrypted):
+                return True
+        return False
+
+    def decrypt(self, text):
+        """
+        Decrypts the inputted text.
+
+        :param      text | <str>
+
+        :return     <str>
+        """
+        text = base64.b64decode(text)
+        cipher = AES.new(self._key, AES.MODE_CBC, text[:BLOCK_SIZE])
+        return unpad(cipher.decrypt(text[BLOCK_SIZE:]))
+
+    def encrypt(self, text):
+        """
+        Encrypts the inputted text.
+
+        :param      text | <str>
+
+        :return     <str>
+        """
+        iv = self._random.read(BLOCK_SIZE)
+        cipher = AES.new(self._key, AES.MODE_CBC, iv)
+        return base64.b64encode(iv + cipher.encrypt(pad(text, len(self._key))))
+
+    def key(self):
+        """
+        Returns the key for this session.
+
+        :return     <str>
+        """
+        return self._key
+
+
+class FileCipher(object):
+    """
+    Streaming AES (CBC mode) encryption engine for files.  Data is read into
+    a preallocated buffer a chunk at a time and, when supported by the AES
+    implementation, encrypted into a second preallocated buffer, so the
+    buffers are reused for every chunk and every file processed by the same
+    instance.  Only the final block is padded.
+
+    The encrypted format is the original size as an unsigned 64-bit integer,
+    followed by the 16 byte IV and the encrypted data.  In authenticated mode,
+    an HMAC-SHA256 of all of that is appended, and it is verified before any
+    data is decrypted.
+
+    :param      key          | <str> || None
+                chunk        | <int> | must be divisible by 16
+                authenticate | <bool>
+    """
+    def __init__(self, key=None, chunk=64 * 1024, authenticate=False):
+        if chunk % BLOCK_SIZE:
+            raise ValueError('The chunk size must be divisible by 16.')
+
+        self._key = key if key is not None else ENCRYPT_KEY
+        self._chunk = chunk
+        self._authenticate = authenticate
+        self._buffer = bytearray(chunk + BLOCK_SIZE)
+        self._output = bytearray(chunk + BLOCK_SIZE)
+
+    def _crypt(self, func, size):
+        """
+        Encrypts or decrypts the first size bytes of the read buffer.
+
+        :param      func | <callable> | cipher encrypt or decrypt method
+                    size | <int>
+
+        :return     <memoryview> || <str>
+        """
+        if _inplaceSupported():
+            out = memoryview(self._output)[:size]
+            func(memoryview(self._buffer)[:size], output=out)
+            return out
+        return func(memoryview(self._buffer)[:size].tobytes())
+
+    def _mac(self, header):
+        """
+        Creates the message authentication code generator for a file.
+
+        :param      header | <str>
+
+        :return     <hmac.HMAC>
+        """
+        mac_key = hmac.new(self._key, b'projex.security.mac', hashlib.sha256)
+        mac = hmac.new(mac_key.digest(), digestmod=hashlib.sha256)
+        mac.update(header)
+        return mac
+
+    def decrypt(self, input, output):
+        """
+        Decrypts the data from the input stream to the output stream.  In
+        authenticated mode, the input needs to be a seekable file.
+
+        :param      input   | <file>
+                    output  | <file>
+        """
+        header = input.read(FILE_HEADER.size + BLOCK_SIZE)
+        if len(header) != FILE_HEADER.size + BLOCK_SIZE:
+            raise errors.DecryptionError('Invalid encrypted file header.')
+
+        remaining = FILE_HEADER.unpack(header[:FILE_HEADER.size])[0]
+        iv = header[FILE_HEADER.size:]
+        limit = None
+
+        if self._authenticate:
+            start = input.tell()
+            input.seek(-FILE_MAC_SIZE, os.SEEK_END)
+            limit = input.tell() - start
+            signature = input.read(FILE_MAC_SIZE)
+            input.seek(start)
+
+            mac = self._mac(header)
+            view = memoryview(self._buffer)[:self._chunk]
+            unread = limit
+            while unread > 0:
+                count = _readfull(input, view[:min(unread, self._chunk)])
+                if not count:
+                    break
+                mac.update(view[:count])
+                unread -= count
+
+            if limit < 0 or not hmac.compare_digest(mac.digest(), signature):
+                raise errors.DecryptionError('Encrypted file failed authentication.')
+
+            input.seek(start)
+
+        cipher = AES.new(self._key, AES.MODE_CBC, iv)
+        view = memoryview(self._buffer)[:self._chunk]
+        while remaining > 0:
+            size = self._chunk if limit is None else min(self._chunk, limit)
+            count = _readfull(input, view[:size])
+            if not count:
+                break
+
+            if limit is not None:
+                limit -= count
+
+            data = self._crypt(cipher.decrypt, count)
+            output.write(data[:min(count, remaining)])
+            remaining -= count
+
+    def decryptFiles(self, filenames, outdir=None):
+        """
+        Decrypts each of the inputted files, reusing this instance's buffers.
+
+        :param      filenames | [<str>, ..]
+                    outdir    | <str> || None
+
+        :return     [<str> outfile, ..]
+        """
+        output = []
+        for filename in filenames:
+            outfile = os.path.splitext(filename)[0]
+            if outdir:
+                outfile = os.path.join(outdir, os.path.basename(outfile))
+            self.decryptFile(filename, outfile)
+            output.append(outfile)
+        return output
+
+    def decryptFile(self, filename, outfile=None):
+        """
+        Decrypts the inputted file.  If no output file is supplied, the file
+        extension is stripped from the inputted filename.
+
+        :param      filename | <str>
+                    outfile  | <str> || None
+        """
+        if not outfile:
+            outfile = os.path.splitext(filename)[0]
+
+        with open(filename, 'rb') as input:
+            with open(outfile, 'wb') as output:
+                self.decrypt(input, output)
+
+    def encrypt(self, input, output, size=None):
+        """
+        Encrypts the data from the input stream to the output stream.  The
+        size of the input is needed for the header -- if it is not supplied,
+        it is looked up from the input's file descriptor.
+
+        :param      input   | <file>
+                    output  | <file>
+                    size    | <int> || None
+        """
+        if size is None:
+            size = os.fstat(input.fileno()).st_size
+
+        iv = _randomSource().read(BLOCK_SIZE)
+        header = FILE_HEADER.pack(size) + iv
+        cipher = AES.new(self._key, AES.MODE_CBC, iv)
+        mac = self._mac(header) if self._authenticate else None
+
+        output.write(header)
+
+        buff = self._buffer
+        view = memoryview(buff)[:self._chunk]
+        remaining = size
+        while True:
+            count = _readfull(input, view)
+            remaining -= count
+
+            # only the final block is padded
+            final = count < self._chunk or remaining <= 0
+            if final:
+                padding = BLOCK_SIZE - count % BLOCK_SIZE
+                buff[count:count + padding] = chr(padding) * padding
+                count += padding
+
+            data = self._crypt(cipher.encrypt, count)
+            if mac is not None:
+                mac.update(data)
+            output.write(data)
+
+            if final:
+                break
+
+        if mac is not None:
+            output.write(mac.digest())
+
+    def encryptFiles(self, filenames, outdir=None):
+        """
+        Encrypts each of the inputted files, reusing this instance's buffers.
+
+        :param      filenames | [<str>, ..]
+                    outdir    | <str> || None
+
+        :return     [<str> outfile, ..]
+        """
+        output = []
+        for filename in filenames:
+            outfile = filename + '.enc'
+            if outdir:
+                outfile = os.path.join(outdir, os.path.basename(outfile))
+            self.encryptFile(filename, outfile)
+            output.append(outfile)
+        return output
+
+    def encryptFile(self, filename, outfile=None):
+        """
+        Encrypts the inputted file.  If no output file is supplied, the
+        '.enc' extension is added to the inputted filename.
+
+        :param      filename | <str>
+                    outfile  | <str> || None
+        """
+        if not outfile:
+            outfile = filename + '.enc'
+
+        with open(filename, 'rb') as input:
+            with open(outfile, 'wb') as output:
+                self.encrypt(input, output, os.path.getsize(filename))
+
+
 # ----------------------------------------------------------------------
 #                              FUNCTIONS
 # ---------------------------------------------------------------------
 
 
-def check(a, b):
+def check(a, b, key=None):
     """
-    Checks to see if the two values are equal to each other.
+    Checks to see if the two values are equal to each other, in constant
+    time.  If either value is encrypted with the given key, it is decrypted
+    before being compared.
     
-    :param      a | <str>
-                b | <str>
+    :param      a   | <str>
+                b   | <str>
+                key | <str> || None
     
     :return     <bool>
     """
-    aencrypt = encrypt(a)
-    bencrypt = encrypt(b)
-
-    return a == b or a == bencrypt or aencrypt == b
+    return Cipher(key).check(a, b)
 
 
 def decodeBase64(text, encoding='utf-8'):
@@ -65,6 +538,38 @@ def decodeBase64(text, encoding='utf-8'):
     return projex.text.toUnicode(base64.b64decode(text), encoding)
 
 
+def deriveKey(password, salt, iterations=KDF_ITERATIONS, bits=32):
+    """
+    Derives an encryption key from the inputted password and salt using
+    PBKDF2 (HMAC-SHA256).  Results are cached by salt, so deriving the same
+    key again does not repeat the work.  The password itself is not kept,
+    only a digest of it.
+    
+    :param      password    | <str>
+                salt        | <str>
+                iterations  | <int>
+                bits        | <int>  | 16 or 32 bits
+    
+    :return     <str>
+    """
+    if bits not in (16, 32):
+        raise StandardError('Invalid key size')
+
+    password = projex.text.toBytes(password) or b''
+    salt = projex.text.toBytes(salt) or b''
+
+    cache_key = (salt, hashlib.sha256(password).digest(), iterations, bits)
+    try:
+        return _kdfcache[cache_key]
+    except KeyError:
+        if len(_kdfcache) > 256:
+            _kdfcache.clear()
+
+        key = hashlib.pbkdf2_hmac('sha256', password, salt, iterations, bits)
+        _kdfcache[cache_key] = key
+        return key
+
+
 def decrypt(text, key=None):
     """
     Decrypts the inputted text using the inputted key.
@@ -77,47 +582,147 @@ def decrypt(text, key=None):
     if key is None:
         key = ENCRYPT_KEY
 
-    bits = len(key)
     text = base64.b64decode(text)
-    iv = text[:16]
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    return unpad(cipher.decrypt(text[16:]))
+    cipher = AES.new(key, AES.MODE_CBC, text[:BLOCK_SIZE])
+    return unpad(cipher.decrypt(text[BLOCK_SIZE:]))
+
+
+def decryptrange(filename, offset, length, key=None):
+    """
+    Decrypts a range of bytes from a segmented file, as created by the
+    encryptsegments function, without processing the rest of the file.  Only
+    the cipher blocks that overlap the range are read and decrypted.
+    
+    :param      filename | <str>
+                offset   | <int>
+                length   | <int>
+                key      | <str> || None
+    
+    :return     <str>
+    """
+    if offset < 0 or length < 0:
+        raise ValueError('The offset and length must not be negative.')
 
+    if key is None:
+        key = ENCRYPT_KEY
 
-def decryptfile(filename, key=None, outfile=None, chunk=64 * 1024):
+    output = []
+    with open(filename, 'rb') as input:
+        size, segment_size, index = _readSegmentIndex(input)
+        end = min(offset + length, size)
+
+        while offset < end:
+            segment = offset // segment_size
+            iv, segment_offset, _ = index[segment]
+
+            # decrypt the blocks overlapping the range, using the previous
+            # cipher block as the iv for anything past the first block
+            start = offset - segment * segment_size
+            stop = min(end - segment * segment_size, segment_size)
+            first = start // BLOCK_SIZE
+            last = (stop + BLOCK_SIZE - 1) // BLOCK_SIZE
+
+            if first:
+                input.seek(segment_offset + (first - 1) * BLOCK_SIZE)
+                iv = input.read(BLOCK_SIZE)
+            else:
+                input.seek(segment_offset)
+
+            data = input.read((last - first) * BLOCK_SIZE)
+            cipher = AES.new(_segmentKey(key, segment), AES.MODE_CBC, iv)
+            data = cipher.decrypt(data)
+
+            skip = start - first * BLOCK_SIZE
+            output.append(data[skip:skip + stop - start])
+            offset += stop - start
+
+    return b''.join(output)
+
+
+def decryptsegments(filename,
+                    key=None,
+                    outfile=None,
+                    workers=None,
+                    processes=False):
+    """
+    Decrypts a segmented file, as created by the encryptsegments function,
+    decrypting its segments in parallel.  If no output file is supplied, the
+    file extension is stripped from the inputted filename.
+    
+    :param      filename  | <str>
+                key       | <str> || None
+                outfile   | <str> || None
+                workers   | <int> || None | defaults to the number of cpus
+                processes | <bool> | use a process pool vs. a thread pool
+    """
+    if key is None:
+        key = ENCRYPT_KEY
+
+    if not outfile:
+        outfile = os.path.splitext(filename)[0]
+
+    with open(filename, 'rb') as input:
+        size, segment_size, index = _readSegmentIndex(input)
+
+    with open(outfile, 'wb') as output:
+        output.truncate(size)
+
+    tasks = []
+    for segment, (iv, offset, length) in enumerate(index):
+        out_offset = segment * segment_size
+        out_length = min(segment_size, size - out_offset)
+        tasks.append((False, filename, offset, length,
+                      outfile, out_offset, out_length,
+                      _segmentKey(key, segment), iv))
+
+    pool = _segmentPool(workers, processes)
+    try:
+        pool.map(_cryptSegment, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def decryptfile(filename,
+                key=None,
+                outfile=None,
+                chunk=64 * 1024,
+                authenticate=False):
     """
     Decrypts a file using AES (CBC mode) with the given key.  If no
-    file is supplied, then the inputted file will be modified in place.
+    output file is supplied, then the file extension will be stripped from
+    the inputted filename.
     The chunk value will be the size with which the function uses to
-    read and encrypt the file.  Larger chunks can be faster for some files
+    read and decrypt the file.  Larger chunks can be faster for some files
     and machines.  The chunk MUST be divisible by 16.
     
     :param      text    | <str>
                 key     | <str>
                 outfile | <str> || None
                 chunk   | <int>
+                authenticate | <bool>
     """
-    if key is None:
-        key = ENCRYPT_KEY
+    FileCipher(key, chunk, authenticate).decryptFile(filename, outfile)
 
-    if not outfile:
-        outfile = os.path.splitext(filename)[0]
-
-    with open(filename, 'rb') as input:
-        origsize = struct.unpack('<Q', input.read(struct.calcsize('Q')))[0]
-        iv = input.read(16)
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-
-        with open(outfile, 'wb') as output:
-            while True:
-                data = input.read(chunk)
-                if len(data) == 0:
-                    break
 
-                data = cipher.decrypt(data)
-                data = unpad(data)
-                output.write(data)
-                output.truncate(origsize)
+def decryptfiles(filenames,
+                 key=None,
+                 outdir=None,
+                 chunk=64 * 1024,
+                 authenticate=False):
+    """
+    Decrypts multiple files with the same key, reusing the read and decrypt
+    buffers between them.
+    
+    :param      filenames    | [<str>, ..]
+                key          | <str>
+                outdir       | <str> || None
+                chunk        | <int>
+                authenticate | <bool>
+    
+    :return     [<str> outfile, ..]
+    """
+    return FileCipher(key, chunk, authenticate).decryptFiles(filenames, outdir)
 
 
 def encodeBase64(text, encoding='utf-8'):
@@ -147,17 +752,21 @@ def encrypt(text, key=None):
     if key is None:
         key = ENCRYPT_KEY
 
-    bits = len(key)
-    text = pad(text, bits)
-    iv = Random.new().read(16)
+    text = pad(text, len(key))
+    iv = _randomSource().read(BLOCK_SIZE)
     cipher = AES.new(key, AES.MODE_CBC, iv)
     return base64.b64encode(iv + cipher.encrypt(text))
 
 
-def encryptfile(filename, key=None, outfile=None, chunk=64 * 1024):
+def encryptfile(filename,
+                key=None,
+                outfile=None,
+                chunk=64 * 1024,
+                authenticate=False):
     """
     Encrypts a file using AES (CBC mode) with the given key.  If no
-    file is supplied, then the inputted file will be modified in place.
+    output file is supplied, then the '.enc' extension is added to the
+    inputted filename.
     The chunk value will be the size with which the function uses to
     read and encrypt the file.  Larger chunks can be faster for some files
     and machines.  The chunk MUST be divisible by 16.
@@ -166,29 +775,93 @@ def encryptfile(filename, key=None, outfile=None, chunk=64 * 1024):
                 key     | <str>
                 outfile | <str> || None
                 chunk   | <int>
+                authenticate | <bool>
+    """
+    FileCipher(key, chunk, authenticate).encryptFile(filename, outfile)
+
+
+def encryptfiles(filenames,
+                 key=None,
+                 outdir=None,
+                 chunk=64 * 1024,
+                 authenticate=False):
+    """
+    Encrypts multiple files with the same key, reusing the read and encrypt
+    buffers between them.
+    
+    :param      filenames    | [<str>, ..]
+                key          | <str>
+                outdir       | <str> || None
+                chunk        | <int>
+                authenticate | <bool>
+    
+    :return     [<str> outfile, ..]
+    """
+    return FileCipher(key, chunk, authenticate).encryptFiles(filenames, outdir)
+
+
+def encryptsegments(filename,
+                    key=None,
+                    outfile=None,
+                    segmentSize=4 * 1024 * 1024,
+                    workers=None,
+                    processes=False):
+    """
+    Encrypts a file into a segmented container, encrypting its segments in
+    parallel.  The file is split into fixed size segments that are each
+    encrypted using AES (CBC mode) with their own IV and a key derived from
+    the given key, and a header indexes where each segment is stored.  This
+    allows the file to be decrypted in parallel, and byte ranges to be
+    decrypted on their own with the decryptrange function.  If no output
+    file is supplied, then the '.enc' extension is added to the inputted
+    filename.  The segment size MUST be divisible by 16.
+    
+    :param      filename    | <str>
+                key         | <str> || None
+                outfile     | <str> || None
+                segmentSize | <int>
+                workers     | <int> || None | defaults to the number of cpus
+                processes   | <bool> | use a process pool vs. a thread pool
     """
     if key is None:
         key = ENCRYPT_KEY
 
+    if segmentSize % BLOCK_SIZE:
+        raise ValueError('The segment size must be divisible by 16.')
+
     if not outfile:
         outfile = filename + '.enc'
 
-    iv = Random.new().read(16)
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    filesize = os.path.getsize(filename)
-
-    with open(filename, 'rb') as input:
-        with open(outfile, 'wb') as output:
-            output.write(struct.pack('<Q', filesize))
-            output.write(iv)
-
-            while True:
-                data = input.read(chunk)
-                if len(data) == 0:
-                    break
-
-                data = pad(data, len(key))
-                output.write(cipher.encrypt(data))
+    size = os.path.getsize(filename)
+    count = max(1, (size + segmentSize - 1) // segmentSize)
+    offset = SEGMENT_HEADER.size + SEGMENT_ENTRY.size * count
+
+    rand = _randomSource()
+    index = []
+    tasks = []
+    for segment in xrange(count):
+        in_offset = segment * segmentSize
+        in_length = min(segmentSize, size - in_offset)
+        length = (in_length + BLOCK_SIZE - 1) // BLOCK_SIZE * BLOCK_SIZE
+
+        iv = rand.read(BLOCK_SIZE)
+        index.append(SEGMENT_ENTRY.pack(iv, offset, length))
+        tasks.append((True, filename, in_offset, in_length,
+                      outfile, offset, length,
+                      _segmentKey(key, segment), iv))
+        offset += length
+
+    with open(outfile, 'wb') as output:
+        output.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, size, segmentSize, count))
+        output.write(b''.join(index))
+        output.truncate(offset)
+
+    pool = _segmentPool(workers, processes)
+    try:
+        pool.map(_cryptSegment, tasks)
+    finally:
+        pool.close()
+        pool.join()
 
 
 def generateKey(password, bits=32):
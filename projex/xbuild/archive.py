@@ -0,0 +1,228 @@
+"""
+Defines the zip archive writer used to package builds.  Files are read and
+compressed on a pool of worker threads (zlib releases the interpreter lock
+while it works) and the compressed members are written to the archive in
+order from the calling thread.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+log = logging.getLogger(__name__)
+
+# compressed data larger than this is spooled to disk by the workers
+SPOOL_SIZE = 8 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+
+class _Member(object):
+    """
+    Compresses a single file for the archive.  The compressed data is kept
+    in a spooled temporary file until it is written to the archive.
+    """
+    def __init__(self, filename, arcname):
+        self.filename = filename
+        self.arcname = arcname
+        self.data = None
+        self.size = 0
+        self.crc = 0
+        self.error = None
+        self.finished = threading.Event()
+
+    def compress(self, compression, level):
+        """
+        Reads and compresses the file for this member.
+
+        :param      compression | <int> | zipfile.ZIP_DEFLATED || zipfile.ZIP_STORED
+                    level       | <int>
+        """
+        try:
+            if compression == zipfile.ZIP_DEFLATED:
+                compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            else:
+                compressor = None
+
+            self.data = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+            with open(self.filename, 'rb') as f:
+                for block in iter(lambda: f.read(READ_SIZE), b''):
+                    self.size += len(block)
+                    self.crc = zlib.crc32(block, self.crc)
+                    if compressor is not None:
+                        block = compressor.compress(block)
+                    self.data.write(block)
+
+            if compressor is not None:
+                self.data.write(compressor.flush())
+
+            self.crc &= 0xffffffff
+        except (IOError, OSError) as err:
+            self.error = err
+        finally:
+            self.finished.set()
+
+
+def _work(jobs, compression, level):
+    """
+    Compresses members from the job queue until a None job is received.
+
+    :param      jobs        | <Queue.Queue>
+                compression | <int>
+                level       | <int>
+    """
+    while True:
+        member = jobs.get()
+        if member is None:
+            break
+        member.compress(compression, level)
+
+
+def _dateTime(seconds, utc=False):
+    """
+    Returns the zip date time tuple for the inputted timestamp, clamped to
+    the earliest date a zip file can store.
+
+    :param      seconds | <float>
+                utc     | <bool>
+
+    :return     (<int> year, <int> month, <int> day, <int> hour, <int> minute, <int> second)
+    """
+    if utc:
+        value = time.gmtime(seconds)
+    else:
+        value = time.localtime(seconds)
+    return max(tuple(value[:6]), (1980, 1, 1, 0, 0, 0))
+
+
+def _writeMember(zfile, member, compression, timestamp=None):
+    """
+    Writes the pre-compressed member to the zip file.
+
+    :param      zfile       | <zipfile.ZipFile>
+                member      | <_Member>
+                compression | <int>
+                timestamp   | <float> || None
+    """
+    stat = os.stat(member.filename)
+    if timestamp is None:
+        date_time = _dateTime(stat.st_mtime)
+    else:
+        date_time = _dateTime(timestamp, utc=True)
+
+    zinfo = zipfile.ZipInfo(member.arcname, date_time)
+    zinfo.external_attr = (stat.st_mode & 0xFFFF) << 16
+    zinfo.compress_type = compression
+    zinfo.file_size = member.size
+    zinfo.compress_size = member.data.tell()
+    zinfo.CRC = member.crc
+    zinfo.header_offset = zfile.fp.tell()
+
+    # the member is written through the private ZipFile internals (fp,
+    # _writecheck, _didModify, filelist and NameToInfo) as used by
+    # ZipFile.write, which only support Python 2.7's zipfile (tested on
+    # 2.7.18) -- Python 3 also tracks the end of the members in start_dir
+    # and would need this reviewed before the module is ported
+    zfile._writecheck(zinfo)
+    zfile._didModify = True
+
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    zfile.fp.write(zinfo.FileHeader(zip64))
+
+    member.data.seek(0)
+    shutil.copyfileobj(member.data, zfile.fp, READ_SIZE)
+
+    zfile.filelist.append(zinfo)
+    zfile.NameToInfo[zinfo.filename] = zinfo
+
+
+def writeZip(outfile,
+             entries,
+             workers=4,
+             timestamp=None,
+             compression=zipfile.ZIP_DEFLATED,
+             level=6):
+    """
+    Writes the inputted entries to a new zip file.  Up to twice the number
+    of workers are compressed ahead of the member that is being written, so
+    only a bounded amount of compressed data is held at once.
+
+    :param      outfile     | <str>
+                entries     | [(<str> filename, <str> arcname), ..]
+                workers     | <int>
+                timestamp   | <float> || None | utc time used for every
+                                                entry, for reproducible
+                                                archives
+                compression | <int>
+                level       | <int> | zlib compression level
+
+    :return     (<int> files, <int> bytes, <int> compressed bytes, <float> seconds)
+    """
+    start = time.time()
+    workers = max(1, workers)
+    jobs = queue.Queue()
+    threads = []
+    for i in range(workers):
+        thread = threading.Thread(target=_work, args=(jobs, compression, level))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    count = 0
+    size = 0
+    compressed = 0
+    pending = []
+
+    def flush(member):
+        member.finished.wait()
+        try:
+            if member.error is not None:
+                raise member.error
+            _writeMember(zfile, member, compression, timestamp)
+            log.debug('Archived %s', member.arcname)
+        finally:
+            if member.data is not None:
+                member.data.close()
+
+    zfile = zipfile.ZipFile(outfile, 'w', compression, allowZip64=True)
+    try:
+        for filename, arcname in entries:
+            member = _Member(filename, arcname)
+            jobs.put(member)
+            pending.append(member)
+
+            if len(pending) >= workers * 2:
+                member = pending.pop(0)
+                flush(member)
+                count += 1
+                size += member.size
+                compressed += zfile.filelist[-1].compress_size
+
+        for member in pending:
+            flush(member)
+            count += 1
+            size += member.size
+            compressed += zfile.filelist[-1].compress_size
+        pending = []
+    finally:
+        for thread in threads:
+            jobs.put(None)
+
+        # release any compressed data that was not written
+        for member in pending:
+            member.finished.wait()
+            if member.data is not None:
+                member.data.close()
+
+        zfile.close()
+
+    return count, size, compressed, time.time() - start
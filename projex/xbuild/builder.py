@@ -2,6 +2,7 @@
 Defines the builder class for building versions.
 """
 
+import copy
 import logging
 import os
 import projex
@@ -11,15 +12,24 @@ import re
 import shutil
 import subprocess
 import sys
+import threading
 import time
 import zipfile
 
 from xml.etree import ElementTree
 from projex.enum import enum
+from projex.xbuild import archive
+from projex.xbuild import cache as build_cache
+from projex.xbuild import process
 from projex.xbuild import templ
 from projex.xbuild import errors
 from projex.text import nativestring as nstr
 
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
 try:
     import yaml
 except ImportError:
@@ -27,6 +37,9 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+# loaded builders by build file, see Builder.fromFile
+_configCache = {}
+
 wrap_str = lambda x: map(lambda y: "r'{0}'".format(y.replace('\\', '/')), x)
 
 os.environ.setdefault('PYTHON', 'python')
@@ -35,24 +48,107 @@ os.environ.setdefault('NSIS_EXE', 'makensis.exe')
 os.environ.setdefault('SIGNTOOL', 'signtool')
 
 
-def cmdexec(cmd):
-    proc = subprocess.Popen(cmd,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            shell=True)
+def cmdexec(cmd, timeout=None, logfile=None):
+    """
+    Executes the inputted shell command, streaming its output to the log as
+    it runs.
+    
+    :sa         projex.xbuild.process.Process
+    
+    :param      cmd     | <str>
+                timeout | <float> || None | seconds before the command is killed
+                logfile | <str> || None | file to capture the output to
+    
+    :return     <int> | exit code
+    """
+    return process.Process(cmd, timeout=timeout, logfile=logfile).run()
+
+
+def _environStamp():
+    """
+    Returns a digest of the current environment, which is used to expand
+    the variables within build files.
+    
+    :return     <int>
+    """
+    return hash(tuple(sorted(os.environ.items())))
+
+
+def _fileStamp(filename):
+    """
+    Returns the modification time and size for the inputted file.
+    
+    :param      filename | <str>
+    
+    :return     (<float> mtime, <int> size) || None
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+def loadConfig(filename):
+    """
+    Loads the data from the inputted build file.  The format is determined
+    from the first characters of the file, so each file is only read and
+    parsed once, and yaml files are loaded with the C based loader when
+    it is available.
+    
+    :param      filename | <str>
+    
+    :return     (<xml.etree.ElementTree.Element> || None, <dict> || None)
+    """
+    with open(filename, 'rb') as f:
+        text = f.read()
+
+    # xml files will start with a tag, after an optional byte order mark
+    head = text.lstrip('\xef\xbb\xbf \t\r\n')
+    if head.startswith('<'):
+        try:
+            return ElementTree.fromstring(head), None
+        except StandardError:
+            return None, None
+
+    if yaml is None:
+        log.warning('Could not process yaml builder!')
+        return None, None
 
-    result = proc.poll()
-    while result is None:
-        info, err = proc.communicate()
+    try:
+        return None, yaml.load(text, Loader=getattr(yaml, 'CLoader', yaml.Loader))
+    except StandardError:
+        return None, None
+
+
+def loadEnvironment(filename):
+    """
+    Returns the environment variables defined by the inputted build file,
+    from its <environment> xml section or its environment yaml section.
+    Values are expanded against the current environment.
+    
+    :param      filename | <str>
+    
+    :return     {<str> key: <str> value, ..}
+    """
+    xml, ydata = loadConfig(filename)
+
+    env = {}
+    if xml is not None:
+        xenv = xml.find('environment')
+        if xenv is not None:
+            for xentry in xenv:
+                k, v = (xentry.tag, xentry.text)
+                env[k] = os.path.expandvars(v)
 
-        if info:
-            log.info(info)
-        if err:
-            log.error(err)
+    elif type(ydata) == dict:
+        for k, v in ydata.get('environment', {}).items():
+            if v is None:
+                v = ''
 
-        result = proc.poll()
+            env[k] = os.path.expandvars(v)
 
-    return result
+    return env
 
 
 def _mkpath(filepath, text, **opts):
@@ -62,6 +158,300 @@ def _mkpath(filepath, text, **opts):
     return os.path.abspath(path)
 
 
+class BuildStep(object):
+    """
+    Defines a single step of a build.  The inputs and files of a step are
+    used to key it within the build cache, so a cached step only runs again
+    once one of them changes, otherwise its outputs are restored.
+    
+    :param      name     | <str>
+                callback | <callable> | returns False on failure
+                inputs   | <variant> | json serializable options for the key
+                files    | [<str>, ..] | files or folders the step reads
+                outputs  | [<str>, ..] | files or folders the step writes
+                cached   | <bool>
+                depends  | [<str>, ..] | names of steps that must run first
+    """
+    Status = enum('Pending', 'Running', 'Built', 'Cached', 'Failed', 'Skipped')
+
+    def __init__(self, name, callback, inputs=None, files=None, outputs=None, cached=True, depends=None):
+        self._name = name
+        self._callback = callback
+        self._inputs = inputs
+        self._files = [os.path.abspath(f) for f in files or [] if f]
+        self._outputs = [os.path.abspath(f) for f in outputs or [] if f]
+        self._cached = cached
+        self._depends = list(depends or [])
+        self._status = BuildStep.Status.Pending
+        self._elapsed = 0
+
+    def __call__(self):
+        return self._callback()
+
+    def depends(self):
+        """
+        Returns the names of the steps that must run before this step, in
+        addition to the ones found from its files and outputs.
+        
+        :return     [<str>, ..]
+        """
+        return self._depends
+
+    def elapsed(self):
+        """
+        Returns the number of seconds this step took to run.
+        
+        :return     <float>
+        """
+        return self._elapsed
+
+    def files(self):
+        """
+        Returns the files and folders that this step reads.
+        
+        :return     [<str>, ..]
+        """
+        return self._files
+
+    def inputs(self):
+        """
+        Returns the options that this step is keyed by.
+        
+        :return     <variant>
+        """
+        return self._inputs
+
+    def isCached(self):
+        """
+        Returns whether or not this step can be skipped when its inputs
+        have not changed.
+        
+        :return     <bool>
+        """
+        return self._cached
+
+    def name(self):
+        """
+        Returns the name of this step.
+        
+        :return     <str>
+        """
+        return self._name
+
+    def outputs(self):
+        """
+        Returns the files and folders that this step generates.
+        
+        :return     [<str>, ..]
+        """
+        return self._outputs
+
+    def setElapsed(self, seconds):
+        """
+        Sets the number of seconds this step took to run.
+        
+        :param      seconds | <float>
+        """
+        self._elapsed = seconds
+
+    def setStatus(self, status):
+        """
+        Sets the status of this step.
+        
+        :param      status | <BuildStep.Status>
+        """
+        self._status = status
+
+    def status(self):
+        """
+        Returns the status of this step.
+        
+        :return     <BuildStep.Status>
+        """
+        return self._status
+
+
+class BuildScheduler(object):
+    """
+    Runs build steps in dependency order, running independent steps at the
+    same time on a bounded number of worker threads.  A step depends on each
+    earlier step that writes to a path it reads or writes.  Paths within the
+    ignored folders (the builder's own build folders) are left out of the
+    files that a step reads, unless the step asks for them directly.
+    
+    :param      steps       | [<BuildStep>, ..]
+                jobs        | <int> | maximum number of steps to run at once
+                ignorePaths | [<str>, ..] || None
+                keepGoing   | <bool> | keep running steps that do not depend
+                                       on a failed step
+    """
+    def __init__(self, steps, jobs=1, ignorePaths=None, keepGoing=False):
+        self._steps = list(steps)
+        self._jobs = max(1, jobs)
+        self._ignorePaths = [os.path.normcase(os.path.abspath(p)) for p in ignorePaths or [] if p]
+        self._keepGoing = keepGoing
+        self._elapsed = 0
+
+    def _contains(self, folder, path):
+        """
+        Returns whether or not the path is the folder or is within it.
+        
+        :param      folder | <str>
+                    path   | <str>
+        
+        :return     <bool>
+        """
+        folder = os.path.normcase(folder)
+        path = os.path.normcase(path)
+        return path == folder or path.startswith(folder.rstrip(os.path.sep) + os.path.sep)
+
+    def _reads(self, step, path):
+        """
+        Returns whether or not the inputted step reads from the given path.
+        
+        :param      step | <BuildStep>
+                    path | <str>
+        
+        :return     <bool>
+        """
+        for filename in step.files():
+            if self._contains(path, filename):
+                return True
+            elif self._contains(filename, path):
+                # paths in the ignored folders are not part of the files
+                # unless they are explicitly requested
+                if not any(self._contains(ignored, path) and not self._contains(ignored, filename)
+                           for ignored in self._ignorePaths):
+                    return True
+        return False
+
+    def dependencies(self):
+        """
+        Returns the names of the steps that each step depends on.
+        
+        :return     {<str> name: set(<str> name, ..), ..}
+        """
+        output = {}
+        for i, step in enumerate(self._steps):
+            depends = output[step.name()] = set(step.depends())
+            for prev in self._steps[:i]:
+                for path in prev.outputs():
+                    writes = any(self._contains(path, out) or self._contains(out, path)
+                                 for out in step.outputs())
+                    if writes or self._reads(step, path):
+                        depends.add(prev.name())
+                        break
+        return output
+
+    def elapsed(self):
+        """
+        Returns the total number of seconds the last run took.
+        
+        :return     <float>
+        """
+        return self._elapsed
+
+    def report(self):
+        """
+        Returns the timing report for the last run.
+        
+        :return     <str>
+        """
+        lines = ['{0:<16}{1:<10}{2:>10}'.format('Step', 'Status', 'Time (s)')]
+        for step in self._steps:
+            lines.append('{0:<16}{1:<10}{2:>10.2f}'.format(step.name(),
+                                                           BuildStep.Status[step.status()],
+                                                           step.elapsed()))
+        lines.append('{0:<26}{1:>10.2f}'.format('Total', self._elapsed))
+        return '\n'.join(lines)
+
+    def run(self, runner):
+        """
+        Runs the steps for this scheduler with the inputted runner.  Once a
+        step fails no new steps are started, unless the scheduler keeps
+        going, in which case only the steps that depend on the failed step
+        are held back.  Steps that do not run are marked as skipped.
+        
+        :param      runner | <callable> | runner(step) -> <bool> success
+        
+        :return     <bool> | success
+        """
+        start = time.time()
+        depends = self.dependencies()
+        pending = list(self._steps)
+        finished = set()
+        unfinished = set()
+        results = queue.Queue()
+        running = 0
+        failed = False
+
+        def work(step):
+            begin = time.time()
+            try:
+                success = runner(step)
+            except StandardError:
+                log.exception('Error occurred during {0}.'.format(step.name()))
+                success = False
+
+            step.setElapsed(time.time() - begin)
+            results.put((step, success))
+
+        for step in self._steps:
+            step.setStatus(BuildStep.Status.Pending)
+
+        while pending or running:
+            # start any steps whose dependencies have finished
+            if self._keepGoing or not failed:
+                for step in list(pending):
+                    if depends[step.name()] & unfinished:
+                        pending.remove(step)
+                        unfinished.add(step.name())
+                        step.setStatus(BuildStep.Status.Skipped)
+                        continue
+
+                    if running >= self._jobs:
+                        break
+
+                    if depends[step.name()].issubset(finished):
+                        pending.remove(step)
+                        running += 1
+                        step.setStatus(BuildStep.Status.Running)
+                        if self._jobs == 1:
+                            work(step)
+                        else:
+                            thread = threading.Thread(target=work, args=(step,))
+                            thread.daemon = True
+                            thread.start()
+
+            if not running:
+                break
+
+            step, success = results.get()
+            running -= 1
+            if success:
+                finished.add(step.name())
+                if step.status() == BuildStep.Status.Running:
+                    step.setStatus(BuildStep.Status.Built)
+            else:
+                step.setStatus(BuildStep.Status.Failed)
+                unfinished.add(step.name())
+                failed = True
+
+        for step in pending:
+            step.setStatus(BuildStep.Status.Skipped)
+
+        self._elapsed = time.time() - start
+        return not failed
+
+    def steps(self):
+        """
+        Returns the steps for this scheduler.
+        
+        :return     [<BuildStep>, ..]
+        """
+        return self._steps
+
+
 class Builder(object):
     Options = enum('GenerateRevision',
                    'GenerateDocs',
@@ -72,6 +462,18 @@ class Builder(object):
                    'GenerateZipFile',
                    'Signed', )
 
+    # the settings that change the generated outputs, which key the build cache
+    StateKeys = ('_name', '_version', '_revision', '_license', '_environment', '_options',
+                 '_ignoreFileTypes', '_language', '_company', '_companyUrl', '_author',
+                 '_authorEmail', '_certificate', '_signcmd', '_distributionPath', '_sourcePath',
+                 '_outputPath', '_buildPath', '_licenseFile', '_runtime', '_resourcePath',
+                 '_specfile', '_hookPaths', '_hiddenImports', '_executableData',
+                 '_executableExcludes', '_executableName', '_executableCliName',
+                 '_executablePath', '_productName', '_executableOptions', '_installName',
+                 '_installPath', '_installerOptions', '_installDirectories', '_doxfile',
+                 '_revisionFilename', '_distributionName', '_keywords', '_brief',
+                 '_description', '_dependencies', '_classifiers')
+
     _plugins = {}
 
     def __init__(self):
@@ -98,6 +500,12 @@ class Builder(object):
         self._sourcePath = ''
         self._outputPath = ''
         self._buildPath = ''
+        self._cachePath = ''
+        self._scheduler = None
+        self._commandTimeout = 0
+        self._artifactPath = ''
+        self._artifactSize = 0
+        self._configFiles = []
         self._licenseFile = ''
 
         # set executable options
@@ -158,6 +566,28 @@ class Builder(object):
         self._dependencies = []
         self._classifiers = []
 
+    def artifactPath(self):
+        """
+        Returns the path to the artifact store for this builder.  Pointing
+        several builders or machines at the same store lets them reuse each
+        other's outputs.  By default, the XBUILD_ARTIFACTS environment
+        variable is used if it is defined, otherwise the cache path.
+        
+        :return     <str>
+        """
+        if self._artifactPath:
+            return self._artifactPath
+        return os.environ.get('XBUILD_ARTIFACTS') or self.cachePath()
+
+    def artifactSize(self):
+        """
+        Returns the maximum size in bytes for the artifact store before the
+        least recently used artifacts are evicted.
+        
+        :return     <int> | 0 for no limit
+        """
+        return int(self._artifactSize or 0)
+
     def author(self):
         """
         Returns the author associated with this builder.
@@ -182,12 +612,18 @@ class Builder(object):
         """
         return self._brief
 
-    def build(self):
+    def build(self, clean=False, jobs=1):
         """
-        Builds this object into the desired output information.
+        Builds this object into the desired output information.  Steps whose
+        inputs have not changed since the last build are skipped and their
+        outputs are restored from the build cache, and steps that do not
+        depend on one another are run at the same time.
+        
+        :param      clean | <bool> | remove previous build information first
+                    jobs  | <int> | maximum number of steps to run at once
+        
+        :return     <bool> | success
         """
-        signed = bool(self.options() & Builder.Options.Signed)
-
         # remove previous build information
         buildpath = self.buildPath()
         if not buildpath:
@@ -198,49 +634,187 @@ class Builder(object):
             log.info('SET {0}={1}'.format(key, value))
             os.environ[key] = value
 
-        if os.path.exists(buildpath):
-            shutil.rmtree(buildpath)
+        if clean:
+            for path in (buildpath, self.cachePath()):
+                if os.path.exists(path):
+                    shutil.rmtree(path)
 
         # generate the build path for the installer
-        os.makedirs(buildpath)
+        if not os.path.exists(buildpath):
+            os.makedirs(buildpath)
 
         # create the output path
         outpath = self.outputPath()
         if not os.path.exists(outpath):
             os.makedirs(outpath)
 
-        # copy license information
-        src = self.licenseFile()
-        if src and os.path.exists(src):
-            targ = os.path.join(buildpath, 'license.txt')
-            shutil.copyfile(src, targ)
+        store = build_cache.ArtifactStore(self.artifactPath(), self.artifactSize())
+        cache = build_cache.BuildCache(self.cachePath(), store)
+        scheduler = BuildScheduler(self.buildSteps(), jobs, self.ignorePaths())
+        self._scheduler = scheduler
+        try:
+            success = scheduler.run(lambda step: self.runStep(step, cache))
+        finally:
+            cache.save()
+            store.evict()
+
+        stats = store.stats()
+        log.info('Build timings:\n{0}'.format(scheduler.report()))
+        log.info('Artifact store: {0} hits, {1} misses ({2:.0%} hit rate)'.format(stats['hits'],
+                                                                                 stats['misses'],
+                                                                                 stats['hitRate']))
+        return success
+
+    def buildState(self):
+        """
+        Returns the configuration of this builder that affects every build
+        step.  This includes the settings that change the generated outputs
+        (see Builder.StateKeys), the build tool environment variables and
+        the templates used to generate files.  Absolute paths are made
+        relative to the source root (and files outside of it are keyed by
+        their contents), so the same project checked out in different
+        locations, or on different machines, shares its state.
+        Locations that do not change the outputs, such as the cache and
+        artifact paths, are not included.
+        
+        :return     {<str> key: <variant> value, ..}
+        """
+        root = self.sourcePath()
+        if os.path.isfile(root):
+            root = os.path.dirname(root)
+        root = os.path.abspath(root) if root else ''
+
+        def relative(value):
+            if isinstance(value, dict):
+                return dict((relative(k), relative(v)) for k, v in value.items())
+            elif isinstance(value, (list, tuple)):
+                return [relative(v) for v in value]
+            elif root and isinstance(value, basestring) and os.path.isabs(value):
+                try:
+                    path = os.path.relpath(value, root).replace('\\', '/')
+                except ValueError:
+                    path = '..'
+
+                # files outside of the project, such as the installer images,
+                # are keyed by their contents rather than their location
+                if path.startswith('..') and os.path.isfile(value):
+                    return build_cache.digestFile(value)
+                return path
+            return value
+
+        state = dict((key, relative(getattr(self, key))) for key in Builder.StateKeys)
+        state['__environ__'] = dict((key, os.environ.get(key, ''))
+                                    for key in ('PYTHON', 'PYINSTALLER', 'NSIS_EXE', 'SIGNTOOL'))
+        state['__templates__'] = build_cache.digestFile(os.path.splitext(templ.__file__)[0] + '.py')
+        return state
+
+    def buildSteps(self):
+        """
+        Returns the steps required to build this object based on its options.
+        
+        :return     [<BuildStep>, ..]
+        """
+        options = self.options()
+        signed = bool(options & Builder.Options.Signed)
+        buildpath = self.buildPath()
+        srcpath = self.sourcePath()
+
+        if os.path.isfile(srcpath):
+            basepath = os.path.dirname(srcpath)
+        else:
+            basepath = srcpath
+
+        steps = [BuildStep('license',
+                           lambda: self.generateLicenseFile(buildpath),
+                           outputs=[os.path.join(buildpath, 'license.txt')],
+                           cached=False)]
 
         # generate revision information
-        if self.options() & Builder.Options.GenerateRevision:
-            self.generateRevision()
+        if options & Builder.Options.GenerateRevision:
+            steps.append(BuildStep('revision',
+                                   self.generateRevision,
+                                   outputs=[os.path.join(srcpath, self.revisionFilename())],
+                                   cached=False))
+
+        # generate the plugin table of contents used by the setup and executable
+        if options & (Builder.Options.GenerateSetupFile | Builder.Options.GenerateExecutable):
+            steps.append(BuildStep('plugins',
+                                   lambda: self.generatePlugins(os.path.normpath(basepath)),
+                                   outputs=[basepath],
+                                   cached=False))
 
         # generate documentation information
-        if self.options() & Builder.Options.GenerateDocs:
-            self.generateDocumentation(buildpath)
+        if options & Builder.Options.GenerateDocs:
+            steps.append(BuildStep('docs',
+                                   lambda: self.generateDocumentation(buildpath),
+                                   files=[srcpath],
+                                   outputs=[os.path.join(buildpath, 'docs')]))
 
         # generate setup file
-        if self.options() & Builder.Options.GenerateSetupFile:
-            setuppath = os.path.join(self.sourcePath(), '..')
-            egg = (self.options() & Builder.Options.GenerateEgg) != 0
-            self.generateSetupFile(setuppath, egg=egg)
+        if options & Builder.Options.GenerateSetupFile:
+            setuppath = os.path.abspath(os.path.join(srcpath, '..'))
+            egg = (options & Builder.Options.GenerateEgg) != 0
+            outputs = [os.path.join(setuppath, 'setup.py'), os.path.join(setuppath, 'MANIFEST.in')]
+            if egg:
+                outputs.append(os.path.join(setuppath, 'dist'))
+
+            steps.append(BuildStep('setup',
+                                   lambda: self.generateSetupFile(setuppath, egg=egg),
+                                   inputs={'egg': egg},
+                                   files=[srcpath],
+                                   outputs=outputs))
 
         # generate executable information
-        if self.options() & Builder.Options.GenerateExecutable:
-            if not self.generateExecutable(signed=signed):
-                return
+        if options & Builder.Options.GenerateExecutable:
+            files = [srcpath, self.specfile(), self.runtime()] + self.hookPaths()
+            files += [data[0] for typ, data in self.executableData() if typ == 'tree']
+            steps.append(BuildStep('executable',
+                                   lambda: self.generateExecutable(signed=signed),
+                                   inputs={'signed': signed},
+                                   files=files,
+                                   outputs=[self.distributionPath()]))
 
         # generate zipfile information
-        if self.options() & Builder.Options.GenerateZipFile:
-            self.generateZipFile(self.outputPath())
+        if options & Builder.Options.GenerateZipFile:
+            if os.path.isfile(srcpath):
+                files = [srcpath]
+            else:
+                files = [os.path.join(srcpath, '..')]
+
+            outfile = os.path.join(self.outputPath(), self.installName() + '.zip')
+            steps.append(BuildStep('zip',
+                                   lambda: self.generateZipFile(self.outputPath()),
+                                   files=files,
+                                   outputs=[outfile]))
 
         # generate installer information
-        if self.options() & Builder.Options.GenerateInstaller:
-            self.generateInstaller(buildpath, signed=signed)
+        if options & Builder.Options.GenerateInstaller:
+            installerfile = os.path.join(self.outputPath(), self.installName())
+            installerfile += '-{0}.exe'.format(sys.platform)
+
+            files = [srcpath, self.distributionPath(), self.licenseFile(),
+                     os.path.join(buildpath, 'license.txt'), os.path.join(buildpath, 'docs')]
+            for key in ('pre_section_plugins', 'post_section_plugins',
+                        'install_section_plugins', 'uninstall_section_plugins'):
+                files += self.installerOption(key, [])
+
+            steps.append(BuildStep('installer',
+                                   lambda: self.generateInstaller(buildpath, signed=signed),
+                                   inputs={'signed': signed},
+                                   files=files,
+                                   outputs=[os.path.join(buildpath, 'autogen.nsi'), installerfile]))
+
+        return steps
+
+    def buildTimings(self):
+        """
+        Returns the status and timing for each step of the last build.
+        
+        :return     [(<str> name, <BuildStep.Status>, <float> seconds), ..]
+        """
+        if self._scheduler is None:
+            return []
+        return [(step.name(), step.status(), step.elapsed()) for step in self._scheduler.steps()]
 
     def buildPath(self):
         """
@@ -250,6 +824,17 @@ class Builder(object):
         """
         return self._buildPath
 
+    def cachePath(self):
+        """
+        Returns the path where the build cache for this builder is stored.
+        By default, this will be a folder within the build path.
+        
+        :return     <str>
+        """
+        if self._cachePath:
+            return self._cachePath
+        return os.path.join(self.buildPath(), '.cache')
+
     def classifiers(self):
         """
         Returns the classifiers associated with this builder.
@@ -266,6 +851,15 @@ class Builder(object):
         """
         return self._certificate
 
+    def commandTimeout(self):
+        """
+        Returns the number of seconds external commands are allowed to run
+        for before they are killed.  A value of 0 means no timeout.
+        
+        :return     <float>
+        """
+        return float(self._commandTimeout or 0)
+
     def company(self):
         """
         Returns the company associated with this builder.
@@ -282,6 +876,15 @@ class Builder(object):
         """
         return self._companyUrl
 
+    def configFiles(self):
+        """
+        Returns the additional files that were read to configure this
+        builder, such as the source for its package.
+        
+        :return     [<str>, ..]
+        """
+        return self._configFiles
+
     def dependencies(self):
         """
         Returns the dependencies associated with this builder.
@@ -409,6 +1012,13 @@ class Builder(object):
 
     # noinspection PyMethodMayBeStatic
     def generatePlugins(self, basepath):
+        """
+        Generates the plugin table of contents files within the base path.
+        
+        :param      basepath | <str>
+        
+        :return     <bool> | success
+        """
         for root, folders, files in os.walk(basepath):
             plugs = []
 
@@ -433,24 +1043,37 @@ class Builder(object):
             # generate the table of contents
             toc.sort()
             text = '__toc__ = [{0}]'.format(',\n'.join(toc).strip())
-            f = open(os.path.join(root, '__plugins__.py'), 'w')
+
+            # only rewrite changed files, as other build steps may be reading them
+            filename = os.path.join(root, '__plugins__.py')
+            with open(filename, 'r') as f:
+                if f.read() == text:
+                    continue
+
+            f = open(filename, 'w')
             f.write(text)
             f.close()
 
+        return True
+
     # noinspection PyMethodMayBeStatic
     def generateDocumentation(self, outpath='.'):
         """
         Generates the documentation for this builder in the output path.
         
         :param      outpath | <str>
+        
+        :return     <bool> | success
         """
-        pass
+        return True
 
     def generateExecutable(self, outpath='.', signed=False):
         """
         Generates the executable for this builder in the output path.
         
         :param      outpath | <str>
+        
+        :return     <bool> | success
         """
         if not (self.runtime() or self.specfile()):
             return True
@@ -526,7 +1149,7 @@ class Builder(object):
             f.close()
 
         cmd = os.path.expandvars(self.executableOption('cmd'))
-        success = cmdexec(cmd.format(spec=specfile)) == 0
+        success = self.runCommand(cmd.format(spec=specfile), 'executable') == 0
         if signed:
             binfile = os.path.join(opts['distpath'],
                                    opts['product'],
@@ -537,11 +1160,14 @@ class Builder(object):
 
     def generateRevision(self):
         """
-        Generates the revision file for this builder.
+        Generates the revision file for this builder.  Sources that are not
+        under version control are skipped without failing the build.
+        
+        :return     <bool> | success
         """
         revpath = self.sourcePath()
         if not os.path.exists(revpath):
-            return
+            return True
 
         # determine the revision location
         revfile = os.path.join(revpath, self.revisionFilename())
@@ -557,7 +1183,7 @@ class Builder(object):
                 proc = subprocess.Popen(args, stdout=subprocess.PIPE)
                 mode = 'git'
             except WindowsError:
-                return
+                return True
 
         # process SVN revision
         rev = None
@@ -577,12 +1203,16 @@ class Builder(object):
             except IOError:
                 pass
 
+        return True
+
     # noinspection PyTypeChecker
     def generateInstaller(self, outpath='.', signed=False):
         """
         Generates the installer for this builder.
         
         :param      outpath | <str>
+        
+        :return     <bool> | success
         """
         log.info('Generating Installer....')
 
@@ -697,18 +1327,40 @@ class Builder(object):
 
         # run the installer
         cmd = os.path.expandvars(self.installerOption('cmd'))
-        success = cmdexec(cmd.format(script=outfile))
+        if self.runCommand(cmd.format(script=outfile), 'installer') != 0:
+            log.error('Failed to compile the installer: {0}'.format(outfile))
+            return False
 
         # sign the installer
         if signed:
             self.sign(installerfile)
 
         log.info('Executing installer...')
-        cmdexec(installerfile)
+        self.runCommand(installerfile, 'install')
+        return True
+
+    def generateLicenseFile(self, outpath='.'):
+        """
+        Copies the license file for this builder to the output path.
+        
+        :param      outpath | <str>
+        
+        :return     <bool> | success
+        """
+        src = self.licenseFile()
+        if src and os.path.exists(src):
+            targ = os.path.join(outpath, 'license.txt')
+            shutil.copyfile(src, targ)
+        return True
 
     def generateSetupFile(self, outpath='.', egg=False):
         """
-        Generates the setup file for this builder.
+        Generates the setup file for this builder, and optionally its egg.
+        
+        :param      outpath | <str>
+                    egg     | <bool>
+        
+        :return     <bool> | success
         """
         outpath = os.path.abspath(outpath)
         outfile = os.path.join(outpath, 'setup.py')
@@ -768,11 +1420,24 @@ class Builder(object):
         if egg:
             cmd = 'cd {0} && $PYTHON setup.py bdist_egg'.format(outpath)
             cmd = os.path.expandvars(cmd)
-            cmdexec(cmd)
+            if self.runCommand(cmd, 'egg') != 0:
+                log.error('Failed to build the egg for {0}.'.format(self.name()))
+                return False
 
-    def generateZipFile(self, outpath='.'):
+        return True
+
+    def generateZipFile(self, outpath='.', workers=4, timestamp=None):
         """
-        Generates the zip file for this builder.
+        Generates the zip file for this builder.  Files are compressed on a
+        pool of worker threads.  When no timestamp is given, the
+        SOURCE_DATE_EPOCH environment variable is used if it is defined, so
+        that identical sources produce identical archives.
+        
+        :param      outpath   | <str>
+                    workers   | <int>
+                    timestamp | <float> || None
+        
+        :return     <bool> | success
         """
         fname = self.installName() + '.zip'
         outfile = os.path.abspath(os.path.join(outpath, fname))
@@ -785,37 +1450,52 @@ class Builder(object):
                 log.warning('Could not remove zipfile: %s', outfile)
                 return False
 
-        # generate the zip file
-        zfile = zipfile.ZipFile(outfile, 'w')
+        if timestamp is None and os.environ.get('SOURCE_DATE_EPOCH'):
+            timestamp = float(os.environ['SOURCE_DATE_EPOCH'])
 
         # zip up all relavent fields from the code base
+        entries = []
         if os.path.isfile(self.sourcePath()):
-            zfile.write(self.sourcePath(), os.path.basename(self.sourcePath()))
+            entries.append((self.sourcePath(), os.path.basename(self.sourcePath())))
         else:
             basepath = os.path.abspath(os.path.join(self.sourcePath(), '..'))
-            baselen = len(basepath) + 1
+            ignored = set(os.path.normcase(path) for path in self.ignorePaths())
+            ignoreTypes = set(self.ignoreFileTypes())
+
             for root, folders, filenames in os.walk(basepath):
-                # ignore hidden folders
-                if '.svn' in root or '.git' in root:
-                    continue
+                # ignore hidden folders and the folders generated by this builder
+                folders[:] = sorted(f for f in folders
+                                    if f not in build_cache.IGNORE_FOLDERS and
+                                    os.path.normcase(os.path.join(root, f)) not in ignored)
 
                 # ignore setuptools build info
-                part = root[baselen:].split(os.path.sep)[0]
-                if part in ('build', 'dist') or part.endswith('.egg-info'):
-                    continue
+                if root == basepath:
+                    folders[:] = [f for f in folders
+                                  if f not in ('build', 'dist') and not f.endswith('.egg-info')]
 
                 # include files
-                for filename in filenames:
-                    ext = os.path.splitext(filename)[1]
-                    if ext in self.ignoreFileTypes():
+                arcroot = os.path.relpath(root, basepath).replace('\\', '/')
+                for filename in sorted(filenames):
+                    if os.path.splitext(filename)[1] in ignoreTypes:
                         continue
 
-                    arcroot = root[baselen:].replace('\\', '/')
-                    arcname = os.path.join(arcroot, filename)
-                    log.info('Archiving %s...', arcname)
-                    zfile.write(os.path.join(root, filename), arcname)
-
-        zfile.close()
+                    if arcroot == '.':
+                        arcname = filename
+                    else:
+                        arcname = arcroot + '/' + filename
+                    entries.append((os.path.join(root, filename), arcname))
+
+        count, size, compressed, seconds = archive.writeZip(outfile,
+                                                            entries,
+                                                            workers=workers,
+                                                            timestamp=timestamp)
+
+        log.info('Archived {0} files ({1:.1f} MB to {2:.1f} MB) in {3:.2f}s, {4:.1f} MB/s'.format(
+            count,
+            size / 1048576.0,
+            compressed / 1048576.0,
+            seconds,
+            size / 1048576.0 / max(seconds, 0.001)))
         return True
 
     def hiddenImports(self):
@@ -845,6 +1525,16 @@ class Builder(object):
         """
         return self._ignoreFileTypes
 
+    def ignorePaths(self):
+        """
+        Returns the folders that this builder generates, which are not part
+        of the inputs for any of its build steps.
+        
+        :return     [<str>, ..]
+        """
+        paths = (self.buildPath(), self.cachePath(), self.distributionPath(), self.outputPath())
+        return [os.path.abspath(path) for path in paths if path]
+
     def installName(self):
         """
         Returns the name for the installer this builder will generate.
@@ -1240,6 +1930,57 @@ class Builder(object):
         """
         return self._revisionFilename
 
+    def runCommand(self, cmd, name):
+        """
+        Runs the inputted external command, streaming its output to the log
+        and capturing it to a log file within the build path.
+        
+        :param      cmd  | <str>
+                    name | <str> | name for the log file
+        
+        :return     <int> | exit code
+        """
+        logfile = None
+        if self.buildPath():
+            logfile = os.path.join(self.buildPath(), 'logs', name + '.log')
+
+        return cmdexec(cmd, timeout=self.commandTimeout() or None, logfile=logfile)
+
+    def runStep(self, step, cache=None):
+        """
+        Runs the inputted build step.  When a cache is provided and the step
+        was last run with the same inputs, its outputs are restored from the
+        cache instead.
+        
+        :param      step  | <BuildStep>
+                    cache | <projex.xbuild.cache.BuildCache> || None
+        
+        :return     <bool> | success
+        """
+        key = None
+        if cache is not None and step.isCached():
+            ignore = lambda x: (os.path.splitext(x)[1] in self.ignoreFileTypes() or
+                                x in ('__plugins__.py', self.revisionFilename()))
+            files = [cache.treeDigest(path, ignore, self.ignorePaths()) for path in step.files()]
+            key = cache.key(step.name(), step.inputs(), files, self.buildState())
+
+            if cache.restore(step.name(), key, step.outputs()):
+                log.info('Skipping {0}, nothing has changed.'.format(step.name()))
+                step.setStatus(BuildStep.Status.Cached)
+                return True
+
+        # only an explicit False is a failure, as overridden generators may
+        # return nothing -- a step that produced none of its outputs is not
+        # cached, as the artifact store will not record missing outputs
+        log.info('Running {0}...'.format(step.name()))
+        if step() is False:
+            log.error('Failed to build {0}.'.format(step.name()))
+            return False
+
+        if key is not None:
+            cache.record(step.name(), key, step.outputs())
+        return True
+
     def runtime(self):
         """
         Returns the runtime script for this executable.
@@ -1248,6 +1989,22 @@ class Builder(object):
         """
         return self._runtime
 
+    def setArtifactPath(self, path):
+        """
+        Sets the path to the artifact store for this builder.
+        
+        :param      path | <str>
+        """
+        self._artifactPath = path
+
+    def setArtifactSize(self, size):
+        """
+        Sets the maximum size in bytes for the artifact store.
+        
+        :param      size | <int> | 0 for no limit
+        """
+        self._artifactSize = size
+
     def setAuthor(self, author):
         """
         Returns the author associated with this builder.
@@ -1280,6 +2037,14 @@ class Builder(object):
         """
         self._buildPath = buildPath
 
+    def setCachePath(self, path):
+        """
+        Sets the path where the build cache for this builder is stored.
+        
+        :param      path | <str>
+        """
+        self._cachePath = path
+
     def setCertificate(self, cert):
         """
         Sets the signing certificate file for this builder.
@@ -1296,6 +2061,15 @@ class Builder(object):
         """
         self._classifiers = classifiers
 
+    def setCommandTimeout(self, seconds):
+        """
+        Sets the number of seconds external commands are allowed to run for
+        before they are killed.  A value of 0 means no timeout.
+        
+        :param      seconds | <float>
+        """
+        self._commandTimeout = seconds
+
     def setCompany(self, company):
         """
         Returns the company associated with this builder.
@@ -1627,7 +2401,7 @@ class Builder(object):
 
         # let the previous process finish fully, or we might get some file errors
         time.sleep(2)
-        return cmdexec(sign.format(filename=filename, cert=cert)) == 0
+        return self.runCommand(sign.format(filename=filename, cert=cert), 'sign') == 0
 
     def specfile(self):
         """
@@ -1712,42 +2486,36 @@ class Builder(object):
     @staticmethod
     def fromFile(filename):
         """
-        Parses the inputted xml file information and generates a builder
-        for it.
+        Parses the inputted xml or yaml file information and generates a
+        builder for it.  Loaded builders are cached in memory, and reused
+        until the build file, any of the files read while loading it or the
+        environment changes.
         
         :param      filename | <str>
         
         :return     <Builder> || None
         """
-        xdata = None
-        ydata = None
-
-        # try parsing an XML file
-        try:
-            xdata = ElementTree.parse(filename).getroot()
-        except StandardError:
-            xdata = None
+        filename = os.path.abspath(filename)
+        environ = _environStamp()
 
-        if xdata is None:
-            # try parsing a yaml file
-            if yaml:
-                with open(filename, 'r') as f:
-                    text = f.read()
+        cached = _configCache.get(filename)
+        if cached is not None:
+            cls, state, stamps, cached_environ = cached
+            if cached_environ == environ and all(_fileStamp(f) == stamp for f, stamp in stamps):
+                builder = cls.__new__(cls)
+                builder.__dict__.update(copy.deepcopy(state))
+                return builder
 
-                try:
-                    ydata = yaml.load(text)
-                except StandardError:
-                    return None
-            else:
-                log.warning('Could not process yaml builder!')
+        xdata, ydata = loadConfig(filename)
+        builder = None
 
         # load a yaml definition
         if type(ydata) == dict:
             typ = ydata.get('type')
             module = ydata.get('module')
-            builder = Builder.plugin(typ, module)
-            if builder:
-                return builder.fromYaml(ydata, os.path.dirname(filename))
+            builder_cls = Builder.plugin(typ, module)
+            if builder_cls:
+                builder = builder_cls.fromYaml(ydata, os.path.dirname(filename))
             else:
                 log.warning('Could not find builder: {0}'.format(typ))
 
@@ -1755,13 +2523,20 @@ class Builder(object):
         elif xdata is not None:
             typ = xdata.get('type')
             module = xdata.get('module')
-            builder = Builder.plugin(typ, module)
-            if builder:
-                return builder.fromXml(xdata, os.path.dirname(filename))
+            builder_cls = Builder.plugin(typ, module)
+            if builder_cls:
+                builder = builder_cls.fromXml(xdata, os.path.dirname(filename))
             else:
                 log.warning('Could not find builder: {0}'.format(typ))
 
-        return None
+        if builder is not None:
+            files = [filename] + builder.configFiles()
+            _configCache[filename] = (type(builder),
+                                      copy.deepcopy(builder.__dict__),
+                                      [(f, _fileStamp(f)) for f in files],
+                                      environ)
+
+        return builder
 
 
 # ----------------------------------------------------------------------
@@ -1774,6 +2549,9 @@ class PackageBuilder(Builder):
 
         # set build information from the package
         filepath = getattr(pkg, '__file__', '')
+        if filepath:
+            self._configFiles.append(os.path.splitext(filepath)[0] + '.py')
+
         if '__init__' in filepath:
             srcpath = os.path.dirname(filepath)
             product = pkg.__name__
@@ -1912,39 +2690,219 @@ Builder.register(ApplicationBuilder)
 Builder.register(SignedApplicationBuilder)
 
 
-def build_cmd():
-    if len(sys.argv) < 2:
-        print 'usage: projex/xbuild/builder [buildfile] (--no-remote)'
-        sys.exit(0)
-
-    xml = None
-    ydata = None
-
-    # load environment settings
+def _buildFile(filename, clean=False, jobs=1, remote=True):
+    """
+    Builds the inputted build file.  This is run within the worker processes
+    of a batch build.  The environment from the build file is applied first,
+    the same as for a single build, and restored afterwards to keep the
+    builds that share a worker from affecting one another.  If the build
+    file requires a different python, it is built in a separate process
+    with that python, and no step timings are available for it.
+    
+    :param      filename | <str>
+                clean    | <bool>
+                jobs     | <int>
+                remote   | <bool> | allow building with another python
+    
+    :return     (<str> filename, <bool> success, [(<str>, <BuildStep.Status>, <float>), ..], <float> seconds)
+    """
+    start = time.time()
+    environ = dict(os.environ)
+    timings = []
     try:
-        xml = ElementTree.parse(sys.argv[1]).getroot()
+        env = loadEnvironment(filename)
+        for k, v in env.items():
+            os.environ[k] = v
+
+        # run this build in another environment
+        if remote and 'PYTHON' in env and env['PYTHON'] != sys.executable:
+            cmd = '{0} {1} {2} --no-remote'.format(env['PYTHON'], __file__, filename)
+            if clean:
+                cmd += ' --clean'
+            if jobs != 1:
+                cmd += ' --jobs {0}'.format(jobs)
+            log.info('Building {0} with {1}...'.format(filename, env['PYTHON']))
+            success = cmdexec(cmd) == 0
+            return filename, success, timings, time.time() - start
+
+        builder = Builder.fromFile(filename)
+        success = bool(builder and builder.build(clean=clean, jobs=jobs))
+        if builder:
+            timings = builder.buildTimings()
     except StandardError:
-        with open(sys.argv[1], 'r') as f:
+        log.exception('Error occurred while building {0}.'.format(filename))
+        success = False
+    finally:
+        for key in set(os.environ) - set(environ):
+            del os.environ[key]
+        for key, value in environ.items():
+            if os.environ.get(key) != value:
+                os.environ[key] = value
+
+    return filename, success, timings, time.time() - start
+
+
+def _requirementName(requirement):
+    """
+    Returns the distribution name from a setuptools requirement string.
+    
+    :param      requirement | <str>
+    
+    :return     <str>
+    """
+    match = re.match(r'\s*([\w.\-]+)', requirement or '')
+    return match.group(1).lower() if match else ''
+
+
+def buildMany(filenames, processes=None, jobs=1, clean=False, remote=True):
+    """
+    Builds all of the inputted build files, sharing one pool of worker
+    processes between them.  The files are parsed once up front to order
+    the builds by their package dependencies, so a builder whose
+    dependencies include the distribution name of another builder in the
+    batch is only built after it succeeds.  Builds that do not depend on a
+    failed build still run, and a summary of the timings and cache hits is
+    logged at the end.
+    
+    :param      filenames | [<str>, ..]
+                processes | <int> || None | defaults to the number of cpus
+                jobs      | <int> | maximum number of steps per build
+                clean     | <bool>
+                remote    | <bool> | allow builds to run with the python
+                                     from their environment
+    
+    :return     [(<str> filename, <bool> success, [(<str>, <BuildStep.Status>, <float>), ..], <float> seconds), ..]
+    """
+    import multiprocessing
+
+    filenames = [os.path.abspath(filename) for filename in filenames]
+    results = {}
+
+    # parse the build files to determine their dependencies
+    names = {}
+    requires = {}
+    for filename in filenames:
+        builder = Builder.fromFile(filename)
+        if builder is None:
+            log.error('Could not load builder: {0}'.format(filename))
+            results[filename] = (filename, False, [], 0)
+            continue
+
+        for name in (builder.name(), builder.distributionName()):
+            if name:
+                names[name.lower()] = filename
+        # dependencies loaded from xml settings are a ';' separated string
+        dependencies = builder.dependencies()
+        if isinstance(dependencies, basestring):
+            dependencies = dependencies.split(';')
+
+        requires[filename] = set(_requirementName(dep) for dep in dependencies)
+
+    pool = multiprocessing.Pool(processes or multiprocessing.cpu_count())
+
+    def runner(filename):
+        result = pool.apply(_buildFile, (filename, clean, jobs, remote))
+        results[filename] = result
+        return result[1]
+
+    steps = []
+    for filename in filenames:
+        if filename not in requires:
+            continue
+
+        depends = [names[name] for name in requires[filename]
+                   if name in names and names[name] != filename]
+        steps.append(BuildStep(filename,
+                               (lambda x: lambda: runner(x))(filename),
+                               cached=False,
+                               depends=depends))
+
+    scheduler = BuildScheduler(steps, processes or multiprocessing.cpu_count(), keepGoing=True)
+    try:
+        scheduler.run(lambda step: step())
+    finally:
+        pool.close()
+        pool.join()
+
+    skipped = set(step.name() for step in scheduler.steps()
+                  if step.status() == BuildStep.Status.Skipped)
+    for filename in skipped:
+        results[filename] = (filename, False, [], 0)
+
+    # generate the summary
+    lines = ['{0:<32}{1:<10}{2:>8}{3:>8}{4:>10}'.format('Build', 'Status', 'Steps', 'Cached', 'Time (s)')]
+    hits = 0
+    total = 0
+    for filename in filenames:
+        _, success, timings, seconds = results[filename]
+        cached = sum(1 for _, status, _ in timings if status == BuildStep.Status.Cached)
+        hits += cached
+        total += len(timings)
+
+        if success:
+            status = 'Built'
+        elif filename in skipped:
+            status = 'Skipped'
+        else:
+            status = 'Failed'
+
+        lines.append('{0:<32}{1:<10}{2:>8}{3:>8}{4:>10.2f}'.format(os.path.basename(filename)[:31],
+                                                                   status,
+                                                                   len(timings),
+                                                                   cached,
+                                                                   seconds))
+
+    lines.append('{0} of {1} builds succeeded, {2} of {3} steps cached, {4:.2f}s total'.format(
+        sum(1 for result in results.values() if result[1]),
+        len(filenames),
+        hits,
+        total,
+        scheduler.elapsed()))
+    log.info('Batch build summary:\n{0}'.format('\n'.join(lines)))
+
+    return [results[filename] for filename in filenames]
+
+
+def build_cmd():
+    # collect the build files and options
+    filenames = []
+    opts = {'--jobs': 1, '--processes': 0}
+    args = iter(sys.argv[1:])
+    for arg in args:
+        key, _, value = arg.partition('=')
+        key = {'-j': '--jobs', '-p': '--processes'}.get(key, key)
+        if key in opts:
             try:
-                ydata = yaml.load(f.read())
-            except StandardError:
-                ydata = None
+                opts[key] = int(value or next(args))
+            except (StopIteration, ValueError):
+                print 'invalid {0} value'.format(key)
+                sys.exit(1)
+        elif not arg.startswith('-'):
+            filenames.append(arg)
+
+    if not filenames:
+        print 'usage: projex/xbuild/builder [buildfile] (buildfile ..) (--no-remote) (--clean) ' \
+              '(--jobs N) (--processes N) (--watch)'
+        sys.exit(0)
 
-    env = {}
-    if xml is not None:
-        xenv = xml.find('environment')
-        if xenv is not None:
-            for xentry in xenv:
-                k, v = (xentry.tag, xentry.text)
-                env[k] = os.path.expandvars(v)
+    jobs = opts['--jobs']
+    clean = '--clean' in sys.argv
 
-    elif type(ydata) == dict:
-        for k, v in ydata.get('environment', {}).items():
-            if v is None:
-                v = ''
+    # build multiple files with a shared process pool
+    if len(filenames) > 1:
+        if '--watch' in sys.argv:
+            print '--watch can only be used with a single build file'
+            sys.exit(1)
 
-            env[k] = os.path.expandvars(v)
+        results = buildMany(filenames,
+                            processes=opts['--processes'] or None,
+                            jobs=jobs,
+                            clean=clean,
+                            remote='--no-remote' not in sys.argv)
+        sys.exit(0 if all(result[1] for result in results) else 1)
 
+    # load environment settings
+    env = loadEnvironment(filenames[0])
     for k, v in env.items():
         os.environ[k] = v
 
@@ -1952,16 +2910,26 @@ def build_cmd():
     if '--no-remote' not in sys.argv and \
        'PYTHON' in env and \
        env['PYTHON'] != sys.executable:
-        cmd = '{0} {1} {2} --no-remote'.format(env['PYTHON'], __file__, sys.argv[1])
+        cmd = '{0} {1} {2} --no-remote'.format(env['PYTHON'], __file__, filenames[0])
+        if clean:
+            cmd += ' --clean'
+        if jobs != 1:
+            cmd += ' --jobs {0}'.format(jobs)
+        if '--watch' in sys.argv:
+            cmd += ' --watch'
         log.info('starting remote python process...')
         log.info(cmd)
         result = cmdexec(cmd)
         sys.exit(result)
+    elif '--watch' in sys.argv:
+        # rebuild as the files change
+        from projex.xbuild import watch
+        watch.BuildWatcher(filenames[0], jobs=jobs).watch(clean=clean)
+        sys.exit(0)
     else:
         # create the builder
-        builder = Builder.fromFile(sys.argv[1])
-        if builder:
-            builder.build()
+        builder = Builder.fromFile(filenames[0])
+        if builder and builder.build(clean=clean, jobs=jobs):
             sys.exit(0)
         sys.exit(1)
 
@@ -0,0 +1,573 @@
+"""
+Defines the build step cache used for incremental builds.  Each build step
+is keyed by a digest of its inputs, and the files it produces are kept in a
+content addressed artifact store so unchanged steps can be skipped and their
+outputs restored instead of being regenerated.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# folders that never contribute to a build's inputs
+IGNORE_FOLDERS = ('.svn', '.git', '.hg')
+
+
+def _replace(src, dst):
+    """
+    Moves the source file over the destination file.  Windows will not rename
+    over an existing file, so the destination is removed first there.
+
+    :param      src | <str>
+                dst | <str>
+    """
+    try:
+        os.rename(src, dst)
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+def digestFile(filename, blocksize=1024 * 1024):
+    """
+    Returns the content digest for the inputted file.
+
+    :param      filename  | <str>
+                blocksize | <int>
+
+    :return     <str>
+    """
+    sha = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def walkFiles(path, ignore=None, ignorePaths=None):
+    """
+    Returns the files under the inputted path in a stable order, pruning
+    version control folders and any of the ignored paths from the walk.
+
+    :param      path        | <str>
+                ignore      | <callable> || None | filter on file names
+                ignorePaths | [<str>, ..] || None
+
+    :return     [<str>, ..]
+    """
+    if os.path.isfile(path):
+        return [path]
+
+    ignorePaths = set(os.path.normcase(os.path.abspath(p)) for p in ignorePaths or [] if p)
+    output = []
+    for root, folders, files in os.walk(path):
+        folders[:] = sorted(f for f in folders
+                            if f not in IGNORE_FOLDERS and
+                            os.path.normcase(os.path.join(root, f)) not in ignorePaths)
+
+        for filename in sorted(files):
+            if ignore is None or not ignore(filename):
+                output.append(os.path.join(root, filename))
+    return output
+
+
+# ----------------------------------------------------------------------
+
+class ArtifactStore(object):
+    """
+    Stores files by their content digest, along with a manifest of the
+    files each build step produced for a given input key.  Files are written
+    to a temporary file next to their final location and renamed into place,
+    so readers never see partially written artifacts, and a store can be
+    shared between builds and machines through a common filesystem.
+    
+    The store layout is:
+    
+        objects/<digest[:2]>/<digest[2:]>   file contents
+        keys/<key[:2]>/<key>.json           step output manifests
+    
+    Manifests record the output files relative to the step's output paths,
+    so they can be restored to a different location.  Artifacts are touched
+    whenever they are used, and once the store grows past its maximum size
+    the least recently used artifacts are evicted.
+
+    :param      path    | <str>
+                maxSize | <int> | bytes, 0 for no limit
+    """
+    def __init__(self, path, maxSize=0):
+        self._path = os.path.abspath(path)
+        self._maxSize = maxSize
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _manifestPath(self, key):
+        """
+        Returns the location of the manifest for the inputted key.
+
+        :param      key | <str>
+
+        :return     <str>
+        """
+        return os.path.join(self._path, 'keys', key[:2], key + '.json')
+
+    def _miss(self):
+        """
+        Records a lookup that was not found in this store.
+
+        :return     <bool> | False
+        """
+        with self._lock:
+            self._misses += 1
+        return False
+
+    def _touch(self, filename):
+        """
+        Marks the inputted file as recently used.
+
+        :param      filename | <str>
+        """
+        try:
+            os.utime(filename, None)
+        except OSError:
+            pass
+
+    def evict(self, maxSize=None):
+        """
+        Removes the least recently used artifacts until the store is within
+        its maximum size.  Manifests whose artifacts were removed will be
+        treated as misses.
+
+        :param      maxSize | <int> || None | defaults to the store's size
+
+        :return     <int> | number of artifacts removed
+        """
+        if maxSize is None:
+            maxSize = self._maxSize
+        if not maxSize:
+            return 0
+
+        entries = []
+        total = 0
+        for root, folders, files in os.walk(os.path.join(self._path, 'objects')):
+            for filename in files:
+                if filename.endswith('.tmp'):
+                    continue
+
+                filepath = os.path.join(root, filename)
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, filepath))
+                total += stat.st_size
+
+        removed = 0
+        for mtime, size, filepath in sorted(entries):
+            if total <= maxSize:
+                break
+
+            try:
+                os.remove(filepath)
+            except OSError:
+                continue
+
+            total -= size
+            removed += 1
+
+        if removed:
+            log.info('Evicted {0} artifacts from {1}.'.format(removed, self._path))
+        return removed
+
+    def fetch(self, key, roots, digest=None):
+        """
+        Restores the outputs recorded for the inputted key to the given
+        output paths.  Outputs that are already up to date are left alone.
+
+        :param      key    | <str>
+                    roots  | [<str>, ..] | output files or folders
+                    digest | <callable> || None | used to check existing files
+
+        :return     <bool> | found
+        """
+        digest = digest or digestFile
+        manifest = self._manifestPath(key)
+        try:
+            with open(manifest, 'r') as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return self._miss()
+
+        # a manifest without files cannot restore anything
+        files = data.get('files', [])
+        if not files or data.get('roots') != len(roots) or not all(self.has(d) for _, _, d in files):
+            return self._miss()
+
+        for index, relpath, filedigest in files:
+            if relpath == '.':
+                filename = roots[index]
+            else:
+                filename = os.path.join(roots[index], *relpath.split('/'))
+
+            if not os.path.exists(filename) or digest(filename) != filedigest:
+                log.debug('Restoring %s...', filename)
+
+                # the object may have been evicted since it was checked
+                if not self.restore(filedigest, filename):
+                    log.debug('Missing artifact for %s.', filename)
+                    return self._miss()
+                digest(filename)
+
+            self._touch(self.filepath(filedigest))
+
+        self._touch(manifest)
+        with self._lock:
+            self._hits += 1
+        return True
+
+    def filepath(self, digest):
+        """
+        Returns the location of the artifact for the inputted digest.
+
+        :param      digest | <str>
+
+        :return     <str>
+        """
+        return os.path.join(self._path, 'objects', digest[:2], digest[2:])
+
+    def has(self, digest):
+        """
+        Returns whether or not this store has the artifact for the digest.
+
+        :param      digest | <str>
+
+        :return     <bool>
+        """
+        return os.path.exists(self.filepath(digest))
+
+    def maxSize(self):
+        """
+        Returns the maximum size for this store in bytes.
+
+        :return     <int> | 0 for no limit
+        """
+        return self._maxSize
+
+    def path(self):
+        """
+        Returns the root path for this store.
+
+        :return     <str>
+        """
+        return self._path
+
+    def publish(self, key, roots, digest=None, name=''):
+        """
+        Adds all of the files under the given output paths to the store and
+        records them in the manifest for the inputted key.
+
+        :param      key    | <str>
+                    roots  | [<str>, ..] | output files or folders
+                    digest | <callable> || None
+                    name   | <str> | name of the step that generated the files
+
+        :return     <bool> | recorded
+        """
+        # a step that did not produce all of its outputs must not be restored
+        # as a success later on
+        missing = [root for root in roots if not os.path.exists(root)]
+        if missing:
+            log.warning('Not caching {0}, missing outputs: {1}'.format(name or key, ', '.join(missing)))
+            return False
+
+        digest = digest or digestFile
+        files = []
+        for index, root in enumerate(roots):
+            for filename in walkFiles(root):
+                filedigest = self.put(filename, digest(filename))
+                if filename == root:
+                    relpath = '.'
+                else:
+                    relpath = os.path.relpath(filename, root).replace('\\', '/')
+                files.append((index, relpath, filedigest))
+
+        data = {'name': name, 'roots': len(roots), 'files': files, 'created': time.time()}
+
+        manifest = self._manifestPath(key)
+        folder = os.path.dirname(manifest)
+        if not os.path.exists(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:
+                if not os.path.isdir(folder):
+                    raise
+
+        handle, temp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                json.dump(data, f)
+            _replace(temp, manifest)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        return True
+
+    def put(self, filename, digest=None):
+        """
+        Adds the inputted file to the store.
+
+        :param      filename | <str>
+                    digest   | <str> || None
+
+        :return     <str> | digest
+        """
+        if digest is None:
+            digest = digestFile(filename)
+
+        target = self.filepath(digest)
+        if os.path.exists(target):
+            self._touch(target)
+            return digest
+
+        folder = os.path.dirname(target)
+        if not os.path.exists(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:
+                if not os.path.isdir(folder):
+                    raise
+
+        handle, temp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        os.close(handle)
+        try:
+            shutil.copyfile(filename, temp)
+            _replace(temp, target)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        return digest
+
+    def restore(self, digest, filename):
+        """
+        Copies the artifact for the inputted digest to the given filename.
+
+        :param      digest   | <str>
+                    filename | <str>
+
+        :return     <bool> | success
+        """
+        source = self.filepath(digest)
+        if not os.path.exists(source):
+            return False
+
+        folder = os.path.dirname(os.path.abspath(filename))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        handle, temp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        os.close(handle)
+        try:
+            try:
+                shutil.copyfile(source, temp)
+            except (IOError, OSError):
+                # evicted by another build while it was being copied
+                if not os.path.exists(source):
+                    return False
+                raise
+            _replace(temp, filename)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        return True
+
+    def stats(self):
+        """
+        Returns the lookup statistics for this store.
+
+        :return     {'hits': <int>, 'misses': <int>, 'hitRate': <float>}
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            rate = float(self._hits) / total if total else 0.0
+            return {'hits': self._hits, 'misses': self._misses, 'hitRate': rate}
+
+
+# ----------------------------------------------------------------------
+
+class BuildCache(object):
+    """
+    Looks up and records build step outputs in an artifact store by the
+    key of their inputs.  File digests are remembered along with the size
+    and modification time they were calculated for, so unchanged files are
+    not read again.
+
+    :param      path  | <str>
+                store | <ArtifactStore> || None
+    """
+    Version = 2
+
+    def __init__(self, path, store=None):
+        self._path = os.path.abspath(path)
+        self._store = store or ArtifactStore(path)
+        self._files = {}
+        self._changed = False
+
+        self.load()
+
+    def clear(self):
+        """
+        Clears the file digests for this cache.
+        """
+        self._files.clear()
+        self._changed = True
+
+    def digest(self, filename):
+        """
+        Returns the content digest for the inputted file, reusing the last
+        digest when the file's size and modification time are unchanged.
+
+        :param      filename | <str>
+
+        :return     <str> || None
+        """
+        filename = os.path.abspath(filename)
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+
+        known = self._files.get(filename)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime:
+            return known[2]
+
+        digest = digestFile(filename)
+        self._files[filename] = (stat.st_size, stat.st_mtime, digest)
+        self._changed = True
+        return digest
+
+    def key(self, *inputs):
+        """
+        Returns the key for the inputted values.  Values must be json
+        serializable -- reprs are not used, as they can include memory
+        addresses and would not match between processes.
+
+        :param      *inputs | <variant>
+
+        :return     <str>
+        """
+        data = json.dumps(inputs, sort_keys=True)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def load(self):
+        """
+        Loads the cache records from disk.
+        """
+        filename = os.path.join(self._path, 'cache.json')
+        try:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return
+
+        if data.get('version') != BuildCache.Version:
+            return
+
+        self._files = dict((k, tuple(v)) for k, v in data.get('files', {}).items())
+
+    def path(self):
+        """
+        Returns the root path for this cache.
+
+        :return     <str>
+        """
+        return self._path
+
+    def record(self, step, key, outputs):
+        """
+        Records the outputs for the given step and key in the artifact store.
+
+        :param      step    | <str>
+                    key     | <str>
+                    outputs | [<str>, ..] | files or folders
+
+        :return     <bool> | recorded
+        """
+        return self._store.publish(key, [os.path.abspath(o) for o in outputs], self.digest, step)
+
+    def restore(self, step, key, outputs):
+        """
+        Restores the outputs for the given step if they were recorded with
+        the same key, by this build or any other build sharing the store.
+        Outputs that are already up to date are left alone.
+
+        :param      step    | <str>
+                    key     | <str>
+                    outputs | [<str>, ..] | files or folders
+
+        :return     <bool> | restored
+        """
+        return self._store.fetch(key, [os.path.abspath(o) for o in outputs], self.digest)
+
+    def save(self):
+        """
+        Writes the cache records to disk if they have changed.
+        """
+        if not self._changed:
+            return
+
+        if not os.path.exists(self._path):
+            os.makedirs(self._path)
+
+        data = {'version': BuildCache.Version,
+                'files': self._files}
+
+        handle, temp = tempfile.mkstemp(dir=self._path, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                json.dump(data, f)
+            _replace(temp, os.path.join(self._path, 'cache.json'))
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+        self._changed = False
+
+    def store(self):
+        """
+        Returns the artifact store for this cache.
+
+        :return     <ArtifactStore>
+        """
+        return self._store
+
+    def treeDigest(self, path, ignore=None, ignorePaths=None):
+        """
+        Returns a digest for the contents of the inputted path, which can be
+        a file or a folder.
+
+        :sa         walkFiles
+
+        :param      path        | <str>
+                    ignore      | <callable> || None
+                    ignorePaths | [<str>, ..] || None
+
+        :return     <str> || None
+        """
+        if not path or not os.path.exists(path):
+            return None
+
+        base = os.path.abspath(path)
+        sha = hashlib.sha1()
+        for filename in walkFiles(base, ignore, ignorePaths):
+            relpath = os.path.relpath(filename, base).replace('\\', '/')
+            sha.update('{0}\0{1}\0'.format(relpath, self.digest(filename)).encode('utf-8'))
+        return sha.hexdigest()
@@ -0,0 +1,224 @@
+"""
+Defines the process runner used to execute external build tools.  The
+output of a command is streamed to logging line by line while it runs
+instead of being buffered until it exits.  Reader threads are used for the
+output pipes, as select does not support pipes on Windows.
+"""
+
+import collections
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class Process(object):
+    """
+    Runs a shell command, streaming its output to the logger (stdout at
+    info level and stderr at error level) and optionally to its own log
+    file.  Only the last lines of output are kept in memory.
+
+    :param      cmd     | <str>
+                timeout | <float> || None | seconds before the command is killed
+                logfile | <str> || None
+                name    | <str> | prefix for the logged lines
+                logger  | <logging.Logger> || None
+                tail    | <int> | number of lines to keep
+    """
+    def __init__(self, cmd, timeout=None, logfile=None, name='', logger=None, tail=100):
+        self._cmd = cmd
+        self._timeout = timeout
+        self._logfile = logfile
+        self._name = name
+        self._logger = logger or log
+        self._tail = collections.deque(maxlen=tail)
+        self._lock = threading.Lock()
+        self._log = None
+        self._proc = None
+        self._readers = []
+        self._timedOut = False
+
+    def _read(self, stream, level):
+        """
+        Logs each line from the inputted stream until it is closed.
+
+        :param      stream | <file>
+                    level  | <int>
+        """
+        prefix = '[{0}] '.format(self._name) if self._name else ''
+        for line in iter(stream.readline, b''):
+            line = line.rstrip('\r\n')
+            self._logger.log(level, prefix + line)
+            with self._lock:
+                self._tail.append(line)
+                if self._log is not None:
+                    self._log.write(line + '\n')
+                    self._log.flush()
+        stream.close()
+
+    def command(self):
+        """
+        Returns the command for this process.
+
+        :return     <str>
+        """
+        return self._cmd
+
+    def kill(self):
+        """
+        Kills this process along with any processes it started.
+        """
+        if self._proc is None or self._proc.poll() is not None:
+            return
+
+        try:
+            if os.name == 'posix':
+                os.killpg(self._proc.pid, signal.SIGKILL)
+            else:
+                subprocess.call(['taskkill', '/F', '/T', '/PID', str(self._proc.pid)],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+        except OSError:
+            pass
+
+        if self._proc.poll() is None:
+            self._proc.kill()
+
+    def returncode(self):
+        """
+        Returns the exit code for this process, or None while it is running.
+
+        :return     <int> || None
+        """
+        if self._proc is None:
+            return None
+        return self._proc.poll()
+
+    def run(self):
+        """
+        Starts this process and waits for it to finish.
+
+        :return     <int> | exit code
+        """
+        self.start()
+        return self.wait()
+
+    def start(self):
+        """
+        Starts this process.
+        """
+        if self._logfile:
+            folder = os.path.dirname(os.path.abspath(self._logfile))
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+            self._log = open(self._logfile, 'w')
+
+        # run the command in its own process group so that it can be killed
+        # along with everything it starts
+        options = {}
+        if os.name == 'posix':
+            options['preexec_fn'] = os.setsid
+
+        self._proc = subprocess.Popen(self._cmd,
+                                      stdout=subprocess.PIPE,
+                                      stderr=subprocess.PIPE,
+                                      shell=True,
+                                      **options)
+
+        for stream, level in ((self._proc.stdout, logging.INFO), (self._proc.stderr, logging.ERROR)):
+            thread = threading.Thread(target=self._read, args=(stream, level))
+            thread.daemon = True
+            thread.start()
+            self._readers.append(thread)
+
+    def tail(self):
+        """
+        Returns the last lines of output from this process.
+
+        :return     [<str>, ..]
+        """
+        with self._lock:
+            return list(self._tail)
+
+    def timedOut(self):
+        """
+        Returns whether or not this process was killed for taking too long.
+
+        :return     <bool>
+        """
+        return self._timedOut
+
+    def wait(self):
+        """
+        Waits for this process to finish, killing it if it runs past its
+        timeout.
+
+        :return     <int> | exit code
+        """
+        deadline = time.time() + self._timeout if self._timeout else None
+        while self._proc.poll() is None:
+            if deadline is not None and deadline < time.time():
+                self._logger.error('Timed out after {0}s: {1}'.format(self._timeout, self._cmd))
+                self._timedOut = True
+                self.kill()
+                self._proc.wait()
+                break
+            time.sleep(0.05)
+
+        for thread in self._readers:
+            thread.join()
+
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+        return self._proc.returncode
+
+
+def runMany(cmds, jobs=4, timeout=None, logpath=None):
+    """
+    Runs the inputted commands with up to the given number of them running
+    at once.  The output of each command is logged with its index as a
+    prefix, and is also written to its own log file when a log path is
+    provided.
+
+    :param      cmds    | [<str>, ..]
+                jobs    | <int>
+                timeout | <float> || None | seconds allowed for each command
+                logpath | <str> || None
+
+    :return     [<int> exit code, ..]
+    """
+    results = [None] * len(cmds)
+    slots = threading.Semaphore(max(1, jobs))
+
+    def run(index, cmd):
+        try:
+            logfile = None
+            if logpath:
+                logfile = os.path.join(logpath, 'cmd-{0}.log'.format(index))
+
+            proc = Process(cmd, timeout=timeout, logfile=logfile, name=str(index))
+            results[index] = proc.run()
+        except StandardError:
+            log.exception('Error occurred while running: {0}'.format(cmd))
+            results[index] = -1
+        finally:
+            slots.release()
+
+    threads = []
+    for index, cmd in enumerate(cmds):
+        slots.acquire()
+        thread = threading.Thread(target=run, args=(index, cmd))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    return results
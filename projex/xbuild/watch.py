@@ -0,0 +1,148 @@
+"""
+Defines the watcher used to rebuild a project as its files change.  The
+watched files are scanned for modification time and size changes, which
+only needs the standard library and works the same on every platform.
+Rebuilds go through the build cache, so only the steps whose inputs
+changed are run again.
+"""
+
+import logging
+import os
+import time
+
+from projex.xbuild import cache as build_cache
+from projex.xbuild.builder import Builder, BuildStep
+
+log = logging.getLogger(__name__)
+
+
+class BuildWatcher(object):
+    """
+    Watches the files for a build file and rebuilds it when they change.
+    Changes are debounced, so a burst of saves only triggers one rebuild.
+
+    :param      filename | <str> | build file
+                interval | <float> | seconds between scans
+                debounce | <float> | seconds without changes before rebuilding
+                jobs     | <int>
+    """
+    def __init__(self, filename, interval=1.0, debounce=0.5, jobs=1):
+        self._filename = os.path.abspath(filename)
+        self._interval = interval
+        self._debounce = debounce
+        self._jobs = jobs
+        self._builder = None
+
+    def build(self, clean=False):
+        """
+        Reloads the builder and builds it, logging a summary of the steps
+        that were run.
+
+        :param      clean | <bool>
+
+        :return     <bool> | success
+        """
+        start = time.time()
+        self._builder = Builder.fromFile(self._filename)
+        if self._builder is None:
+            log.error('Could not load builder: {0}'.format(self._filename))
+            return False
+
+        success = self._builder.build(clean=clean, jobs=self._jobs)
+
+        timings = self._builder.buildTimings()
+        built = [name for name, status, _ in timings if status == BuildStep.Status.Built]
+        cached = [name for name, status, _ in timings if status == BuildStep.Status.Cached]
+        log.info('{0} in {1:.2f}s, ran: {2}, cached: {3}'.format('Build finished' if success else 'Build failed',
+                                                                 time.time() - start,
+                                                                 ', '.join(built) or 'none',
+                                                                 ', '.join(cached) or 'none'))
+        return success
+
+    def paths(self):
+        """
+        Returns the files and folders that are watched for the current
+        builder: the build file, its source, license, spec, runtime, hooks
+        and installer plugins.
+
+        :return     [<str>, ..]
+        """
+        paths = [self._filename]
+
+        builder = self._builder
+        if builder is not None:
+            paths += builder.configFiles()
+            paths += [builder.sourcePath(), builder.licenseFile(), builder.specfile(), builder.runtime()]
+            paths += builder.hookPaths()
+            for key in ('pre_section_plugins', 'post_section_plugins',
+                        'install_section_plugins', 'uninstall_section_plugins'):
+                paths += builder.installerOption(key, [])
+
+        return [os.path.abspath(path) for path in paths if path]
+
+    def scan(self):
+        """
+        Returns the modification time and size for each watched file.
+        Files generated by the build itself are not included.
+
+        :return     {<str> filename: (<float> mtime, <int> size), ..}
+        """
+        ignore = None
+        ignorePaths = None
+        if self._builder is not None:
+            builder = self._builder
+            ignore = lambda x: (os.path.splitext(x)[1] in builder.ignoreFileTypes() or
+                                x in ('__plugins__.py', builder.revisionFilename()))
+            ignorePaths = builder.ignorePaths()
+
+        output = {}
+        for path in self.paths():
+            if not os.path.exists(path):
+                continue
+
+            for filename in build_cache.walkFiles(path, ignore, ignorePaths):
+                try:
+                    stat = os.stat(filename)
+                except OSError:
+                    continue
+                output[filename] = (stat.st_mtime, stat.st_size)
+        return output
+
+    def watch(self, clean=False):
+        """
+        Builds the project, then rebuilds it whenever the watched files
+        change until interrupted.
+
+        :param      clean | <bool> | clean the first build
+        """
+        # scan before building, so that changes made during a build are
+        # picked up afterwards (the build's own outputs are not scanned)
+        self._builder = Builder.fromFile(self._filename)
+        snapshot = self.scan()
+        self.build(clean=clean)
+        log.info('Watching {0} files for changes...'.format(len(snapshot)))
+
+        try:
+            while True:
+                time.sleep(self._interval)
+                current = self.scan()
+                if current == snapshot:
+                    continue
+
+                # wait for the changes to settle
+                while True:
+                    time.sleep(self._debounce)
+                    latest = self.scan()
+                    if latest == current:
+                        break
+                    current = latest
+
+                changed = set(k for k in set(current) | set(snapshot) if current.get(k) != snapshot.get(k))
+                log.info('{0} files changed, rebuilding...'.format(len(changed)))
+                for filename in sorted(changed)[:10]:
+                    log.debug('  {0}'.format(filename))
+
+                snapshot = current
+                self.build()
+        except KeyboardInterrupt:
+            log.info('Stopped watching.')
@@ -0,0 +1,74 @@
+"""
+Round trip tests for the zip archive writer, which writes pre-compressed
+members through the zipfile internals and so must produce archives that the
+zipfile module reads back unchanged.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from projex.xbuild import archive
+
+
+class WriteZipTest(unittest.TestCase):
+    def setUp(self):
+        self.rand = random.Random(1234)
+        self.tempdir = tempfile.mkdtemp()
+
+        # a mix of empty, compressible, random and multi block files
+        contents = [
+            b'',
+            b'projex ' * 1000,
+            bytearray(self.rand.getrandbits(8) for _ in xrange(10000)),
+            b'x' * (archive.READ_SIZE * 2 + 17),
+        ]
+
+        self.entries = []
+        for i, data in enumerate(contents):
+            filename = os.path.join(self.tempdir, 'file{0}.dat'.format(i))
+            with open(filename, 'wb') as f:
+                f.write(data)
+            self.entries.append((filename, 'folder/file{0}.dat'.format(i)))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def assertRoundTrip(self, outfile):
+        with zipfile.ZipFile(outfile, 'r') as zfile:
+            self.assertIsNone(zfile.testzip())
+            self.assertEqual(zfile.namelist(), [x[1] for x in self.entries])
+
+            for filename, arcname in self.entries:
+                with open(filename, 'rb') as f:
+                    self.assertEqual(zfile.read(arcname), f.read(), arcname)
+
+    def test_deflated(self):
+        outfile = os.path.join(self.tempdir, 'deflated.zip')
+        count, size, compressed, seconds = archive.writeZip(outfile, self.entries, workers=2)
+
+        self.assertEqual(count, len(self.entries))
+        self.assertEqual(size, sum(os.path.getsize(x[0]) for x in self.entries))
+        self.assertRoundTrip(outfile)
+
+    def test_stored(self):
+        outfile = os.path.join(self.tempdir, 'stored.zip')
+        archive.writeZip(outfile, self.entries, compression=zipfile.ZIP_STORED)
+        self.assertRoundTrip(outfile)
+
+    def test_timestamp(self):
+        first = os.path.join(self.tempdir, 'first.zip')
+        second = os.path.join(self.tempdir, 'second.zip')
+        archive.writeZip(first, self.entries, workers=1, timestamp=0)
+        archive.writeZip(second, self.entries, workers=3, timestamp=0)
+
+        self.assertRoundTrip(first)
+        with open(first, 'rb') as a, open(second, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Property tests for the array based date functions, which must give the same
+results as the scalar functions they are based on.
+"""
+
+import datetime
+import random
+import unittest
+
+from projex import dates
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SAMPLES = 20000
+
+
+def _randomDate(rand):
+    """
+    Returns a random date, favoring the end of the month where the month
+    math is clamped.
+
+    :param      rand | <random.Random>
+
+    :return     <datetime.date>
+    """
+    year = rand.randint(1900, 2100)
+    month = rand.randint(1, 12)
+    last = dates.daysInMonth(datetime.date(year, month, 1))
+    if rand.random() < 0.5:
+        day = rand.randint(max(1, last - 3), last)
+    else:
+        day = rand.randint(1, last)
+    return datetime.date(year, month, day)
+
+
+def _toDate(value):
+    """
+    Converts a numpy datetime64 value to a date.
+
+    :param      value | <numpy.datetime64>
+
+    :return     <datetime.date>
+    """
+    return value.astype('datetime64[D]').astype(datetime.date)
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class ManyTest(unittest.TestCase):
+    def setUp(self):
+        self.rand = random.Random(1234)
+
+    def test_addMonthsMany(self):
+        starts = [_randomDate(self.rand) for _ in xrange(SAMPLES)]
+        months = [self.rand.randint(-240, 240) for _ in xrange(SAMPLES)]
+
+        results = dates.addMonthsMany(starts, months)
+        for start, count, result in zip(starts, months, results):
+            self.assertEqual(_toDate(result), dates.addMonths(start, count),
+                             (start, count))
+
+    def test_addMonthsManyScalar(self):
+        starts = [_randomDate(self.rand) for _ in xrange(1000)]
+        results = dates.addMonthsMany(starts, 1)
+        for start, result in zip(starts, results):
+            self.assertEqual(_toDate(result), dates.addMonths(start, 1), start)
+
+    def test_daysInMonthMany(self):
+        values = [_randomDate(self.rand) for _ in xrange(SAMPLES)]
+        values += [datetime.date(year, 2, 1) for year in (1900, 2000, 2004, 2100)]
+
+        results = dates.daysInMonthMany(values)
+        for value, result in zip(values, results):
+            self.assertEqual(int(result), dates.daysInMonth(value), value)
+
+    def test_weekdaysMany(self):
+        starts = []
+        ends = []
+        for _ in xrange(SAMPLES):
+            start = _randomDate(self.rand)
+            if self.rand.random() < 0.1:
+                end = start
+            else:
+                end = start + datetime.timedelta(days=self.rand.randint(-400, 400))
+            starts.append(start)
+            ends.append(end)
+
+        results = dates.weekdaysMany(starts, ends)
+        for start, end, result in zip(starts, ends, results):
+            self.assertEqual(int(result), dates.weekdays(start, end), (start, end))
+
+    def test_aliases(self):
+        self.assertIs(dates.add_months_many, dates.addMonthsMany)
+        self.assertIs(dates.days_in_month_many, dates.daysInMonthMany)
+        self.assertIs(dates.weekdays_many, dates.weekdaysMany)
+
+        starts = [_randomDate(self.rand) for _ in xrange(100)]
+        results = dates.weekdays_many(starts, dates.add_months_many(starts, 1))
+        for start, result in zip(starts, results):
+            end = dates.addMonths(start, 1)
+            self.assertEqual(int(result), dates.weekdays(start, end), start)
+
+
+if __name__ == '__main__':
+    unittest.main()